@@ -1,14 +1,52 @@
 # -*- coding: utf-8 -*-
 """Advanced Table Component with pagination and scrolling"""
 
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
+from urllib.parse import urlencode
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QStyledItemDelegate, QStyle,
     QHeaderView, QAbstractItemView, QPushButton, QLabel, QComboBox,
-    QLineEdit, QFrame, QScrollArea
+    QLineEdit, QFrame
 )
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt, Signal, QTimer, QAbstractTableModel, QModelIndex, QRect, QSize, QEvent
+from PySide6.QtGui import QFont, QFontMetrics, QColor, QCursor, QPainter
+
+from client.services import api_client
+
+# Action button colors: (normal, hover)
+ACTION_COLORS = {
+    "حذف": ("#dc3545", "#c82333"),
+    "ویرایش": ("#ffc107", "#e0a800"),
+}
+DEFAULT_ACTION_COLORS = ("#28a745", "#218838")  # نمایش and others
+
+# Search folding: Arabic yeh/kaf to Persian, Persian/Arabic-Indic digits to ASCII
+_SEARCH_FOLD = str.maketrans({
+    "ي": "ی", "ى": "ی", "ك": "ک",
+    **{d: str(i) for i, d in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{d: str(i) for i, d in enumerate("٠١٢٣٤٥٦٧٨٩")},
+})
+# Separates values inside a row's haystack so a query never matches across two cells
+_FIELD_SEP = "\x1f"
+SEARCH_DEBOUNCE_MS = 200
+
+
+def normalize_search_text(text: str) -> str:
+    """Lowercase and fold Persian/Arabic letter variants and digits for matching."""
+    return text.lower().translate(_SEARCH_FOLD)
+
+
+def _row_haystack(item: Dict[str, Any]) -> str:
+    # Same fields the search always covered: every string value of the row
+    return normalize_search_text(_FIELD_SEP.join(v for v in item.values() if isinstance(v, str)))
+
+
+# Largest page the list endpoints serve (server utils.list_query)
+REMOTE_MAX_LIMIT = 500
+
+# "Show all" page size: the view only paints visible rows, so one page can hold everything
+ALL_ROWS_LABEL = "همه"
+ALL_ROWS = 10 ** 9
 
 
 class AdvancedTable(QWidget):
@@ -23,9 +61,22 @@ class AdvancedTable(QWidget):
         self.headers = headers
         self.all_data = []
         self.filtered_data = []
+        self._filtered: List[int] = []  # indices into all_data, in display order
+        self._haystacks: List[str] = []  # normalized search text per row of all_data
+        # Last query and its hits, narrowed instead of rescanned when the query grows
+        self._last_query = ""
+        self._last_hits: Optional[List[int]] = None
         self.current_page = 0
         self.rows_per_page = 20
         self.search_term = ""
+        # Remote mode (set_remote_source): the server searches, sorts and pages
+        self._remote_url: Optional[str] = None
+        self._remote_mapper: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+        self._remote_items_key = "items"
+        self._remote_params: Dict[str, Any] = {}
+        self._remote_sort_fields: Dict[str, str] = {}
+        self._remote_sort: Optional[str] = None  # e.g. "-amount"; None = server default
+        self._remote_cursor: Optional[str] = None  # next page after the loaded rows
         self._setup_ui()
     
     def _setup_ui(self):
@@ -64,12 +115,16 @@ class AdvancedTable(QWidget):
             }
         """)
         self.search_input.textChanged.connect(self._on_search)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._apply_filter)
         
         # Rows per page selector
         rows_label = QLabel("تعداد ردیف:")
         rows_label.setStyleSheet("font-weight: bold; color: #495057;")
         self.rows_combo = QComboBox()
-        self.rows_combo.addItems(["10", "20", "50", "100"])
+        self.rows_combo.addItems(["10", "20", "50", "100", ALL_ROWS_LABEL])
         self.rows_combo.setCurrentText("20")
         self.rows_combo.setStyleSheet("""
             QComboBox {
@@ -90,29 +145,24 @@ class AdvancedTable(QWidget):
         
         layout.addWidget(controls_frame)
         
-        # Table in scroll area
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: 1px solid #e9ecef;
-                border-radius: 6px;
-                background: white;
-            }
-        """)
-        
-        self.table = QTableWidget(0, len(self.headers))
-        self.table.setHorizontalHeaderLabels(self.headers)
+        # Model/view table: cells are painted from column arrays, no per-cell items or widgets
+        self.model = _TableModel(self.headers, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.table.setAlternatingRowColors(True)
+        self.table.setMouseTracking(True)
         self.table.verticalHeader().setDefaultSectionSize(45)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: white;
                 gridline-color: #e9ecef;
                 font-size: 13px;
+                border: 1px solid #e9ecef;
+                border-radius: 6px;
             }
             QHeaderView::section {
                 background: #f8f9fa;
@@ -121,18 +171,17 @@ class AdvancedTable(QWidget):
                 font-weight: bold;
                 color: #495057;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f1f3f5;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: #e3f2fd;
                 color: #1976d2;
             }
         """)
         
-        scroll_area.setWidget(self.table)
-        layout.addWidget(scroll_area, 1)
+        layout.addWidget(self.table, 1)
         
         # Pagination controls
         pagination_frame = QFrame()
@@ -205,39 +254,166 @@ class AdvancedTable(QWidget):
         layout.addWidget(pagination_frame)
         
         # Connect table selection
-        self.table.itemSelectionChanged.connect(self._on_selection_changed)
+        self.table.selectionModel().currentRowChanged.connect(self._on_selection_changed)
+        self.table.horizontalHeader().sectionClicked.connect(self._on_header_clicked)
     
     def set_data(self, data: List[Dict[str, Any]]):
         """Set table data"""
-        self.all_data = data
+        self._set_rows(data)
+        self._apply_filter()
+    
+    def append_data(self, rows: List[Dict[str, Any]]):
+        """Append rows (e.g. a further server page) without rebuilding the existing index"""
+        if not rows:
+            return
+        self._set_rows(rows, append=True)
+        page = self.current_page
         self._apply_filter()
+        # Stay on the page the user was reading
+        total_pages = max(1, (len(self.filtered_data) + self.rows_per_page - 1) // self.rows_per_page)
+        if page < total_pages:
+            self.current_page = page
+            self._update_display()
+    
+    def _set_rows(self, rows: List[Dict[str, Any]], append: bool = False):
+        # Display text per column and a search haystack per row, built once;
+        # paging and filtering only move row indices
+        if append:
+            self.all_data = self.all_data + list(rows)
+            if self.model.columns:
+                columns = [col + self._column_text(key, rows) for col, key in zip(self.model.columns, self._data_keys())]
+            else:
+                # Nothing loaded yet: build the columns from scratch
+                columns = [self._column_text(key, self.all_data) for key in self._data_keys()]
+            self.model.reset(columns=columns)
+            self._haystacks.extend(_row_haystack(item) for item in rows)
+        else:
+            self.all_data = rows
+            self.model.reset(columns=[self._column_text(key, rows) for key in self._data_keys()], rows=[])
+            self._haystacks = [_row_haystack(item) for item in rows]
+        self._last_hits = None
+    
+    def set_remote_source(self, url: str, row_mapper: Callable[[Dict[str, Any]], Dict[str, Any]],
+                          sort_fields: Optional[Dict[str, str]] = None, items_key: str = "items",
+                          params: Optional[Dict[str, Any]] = None):
+        """Let the server search, sort and page (GET url?q=&sort=&cursor=&limit=).
+        
+        row_mapper turns an API item into a row dict keyed like the headers;
+        sort_fields maps header text to the endpoint's sort names, making those
+        headers clickable. Only the pages the user visits are downloaded.
+        """
+        self._remote_url = url
+        self._remote_mapper = row_mapper
+        self._remote_sort_fields = dict(sort_fields or {})
+        self._remote_items_key = items_key
+        self._remote_params = dict(params or {})
+        self.table.horizontalHeader().setSectionsClickable(bool(self._remote_sort_fields))
+        self.reload()
+    
+    def reload(self):
+        """Fetch the first page again (remote mode)"""
+        if self._remote_url:
+            self._fetch_remote(append=False)
+    
+    def _remote_limit(self) -> int:
+        return min(self.rows_per_page, REMOTE_MAX_LIMIT)
+    
+    def _fetch_remote(self, append: bool):
+        params = dict(self._remote_params)
+        term = self.search_term.strip()
+        if term:
+            params["q"] = term
+        if self._remote_sort:
+            params["sort"] = self._remote_sort
+        params["limit"] = self._remote_limit()
+        if append:
+            if not self._remote_cursor:
+                return
+            params["cursor"] = self._remote_cursor
+        sep = "&" if "?" in self._remote_url else "?"
+        # Same key for every page request: a new search or sort supersedes a pending page
+        api_client.get_async(
+            f"{self._remote_url}{sep}{urlencode(params)}",
+            on_success=lambda resp: self._on_remote_page(resp, append),
+            on_error=lambda _e: self.total_info.setText("خطا در دریافت اطلاعات"),
+            owner=self, key="remote",
+        )
+    
+    def _on_remote_page(self, resp, append: bool):
+        data = api_client.parse_json(resp)
+        if data.get("status") != "success":
+            self.total_info.setText(data.get("message") or "خطا در دریافت اطلاعات")
+            return
+        rows = [self._remote_mapper(it) for it in data.get(self._remote_items_key) or []]
+        self._remote_cursor = data.get("next_cursor")
+        self._set_rows(rows, append=append)
+        self._filtered = list(range(len(self.all_data)))
+        self.filtered_data = self.all_data
+        if not append:
+            self.current_page = 0
+        elif (self.current_page + 1) * self.rows_per_page < len(self.all_data):
+            # The fetch was for the next page
+            self.current_page += 1
+        self._update_display()
+    
+    def _on_header_clicked(self, section: int):
+        """Sort by a header on the server (remote mode)"""
+        field = self._remote_sort_fields.get(self.headers[section]) if self._remote_url else None
+        if not field:
+            return
+        desc = self._remote_sort == field  # second click on the same column flips to descending
+        self._remote_sort = ("-" if desc else "") + field
+        header = self.table.horizontalHeader()
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(section, Qt.DescendingOrder if desc else Qt.AscendingOrder)
+        self.reload()
+    
+    @staticmethod
+    def _column_text(key: str, rows: List[Dict[str, Any]]) -> List[str]:
+        return [str(item.get(key, "")) for item in rows]
+    
+    def _data_keys(self) -> List[str]:
+        return [header.lower().replace(" ", "_") for header in self._data_headers()]
     
     def add_action_column(self, actions: List[str]):
         """Add action buttons column"""
         # Add action column to headers
         self.headers.append("عملیات")
-        self.table.setColumnCount(len(self.headers))
-        self.table.setHorizontalHeaderLabels(self.headers)
         
         # Store actions for later use under a safe name (avoid QWidget.actions method)
         self._row_actions = list(actions)
         self._has_action_column = True
+        
+        self._action_delegate = _ActionDelegate(self._row_actions, self.table)
+        self._action_delegate.clicked.connect(self.action_clicked.emit)
+        self.table.setItemDelegateForColumn(len(self.headers) - 1, self._action_delegate)
+        self.model.reset()
+    
+    def _data_headers(self) -> List[str]:
+        return self.headers[:-1] if getattr(self, '_has_action_column', False) else self.headers
     
     def _apply_filter(self):
         """Apply search filter to data"""
-        if not self.search_term:
-            self.filtered_data = self.all_data.copy()
+        if self._remote_url:
+            self.reload()
+            return
+        query = normalize_search_text(self.search_term.strip())
+        if not query:
+            self._filtered = list(range(len(self.all_data)))
+            self._last_hits = None
         else:
-            self.filtered_data = []
-            for item in self.all_data:
-                # Search in all string values
-                found = False
-                for value in item.values():
-                    if isinstance(value, str) and self.search_term.lower() in value.lower():
-                        found = True
-                        break
-                if found:
-                    self.filtered_data.append(item)
+            # Rows matching the new query are a subset of the previous query's hits
+            # whenever the previous query is contained in the new one
+            if self._last_hits is not None and self._last_query in query:
+                candidates = self._last_hits
+            else:
+                candidates = range(len(self._haystacks))
+            haystacks = self._haystacks
+            self._filtered = [i for i in candidates if query in haystacks[i]]
+            self._last_hits = self._filtered
+        self._last_query = query
+        all_data = self.all_data
+        self.filtered_data = [all_data[i] for i in self._filtered]
         
         self.current_page = 0
         self._update_display()
@@ -247,87 +423,37 @@ class AdvancedTable(QWidget):
         # Calculate pagination
         total_items = len(self.filtered_data)
         total_pages = max(1, (total_items + self.rows_per_page - 1) // self.rows_per_page)
+        # Remote mode only knows the pages loaded so far
+        more = bool(self._remote_url and self._remote_cursor)
         
         # Update page info
-        self.page_info.setText(f"صفحه {self.current_page + 1} از {total_pages}")
-        self.total_info.setText(f"مجموع: {total_items} رکورد")
+        if more:
+            self.page_info.setText(f"صفحه {self.current_page + 1}")
+            self.total_info.setText(f"مجموع: {total_items}+ رکورد")
+        else:
+            self.page_info.setText(f"صفحه {self.current_page + 1} از {total_pages}")
+            self.total_info.setText(f"مجموع: {total_items} رکورد")
         
         # Update button states
         self.prev_btn.setEnabled(self.current_page > 0)
-        self.next_btn.setEnabled(self.current_page < total_pages - 1)
+        self.next_btn.setEnabled(self.current_page < total_pages - 1 or more)
         
-        # Get current page data
+        # Point the model at the current page's rows; the view repaints only what is visible
         start_idx = self.current_page * self.rows_per_page
-        end_idx = min(start_idx + self.rows_per_page, total_items)
-        page_data = self.filtered_data[start_idx:end_idx]
-        
-        # Clear and populate table
-        self.table.setRowCount(0)
-        for row_idx, item in enumerate(page_data):
-            self.table.insertRow(row_idx)
-            
-            # Fill data columns
-            col_idx = 0
-            for header in self.headers[:-1] if getattr(self, '_has_action_column', False) else self.headers:
-                value = str(item.get(header.lower().replace(" ", "_"), ""))
-                cell_item = QTableWidgetItem(value)
-                cell_item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row_idx, col_idx, cell_item)
-                col_idx += 1
-            
-            # Add action buttons if configured
-            if getattr(self, '_has_action_column', False):
-                self._add_action_buttons(row_idx, col_idx, start_idx + row_idx)
-    
-    def _add_action_buttons(self, row: int, col: int, data_index: int):
-        """Add action buttons to a row"""
-        button_widget = QWidget()
-        button_layout = QHBoxLayout(button_widget)
-        button_layout.setContentsMargins(4, 4, 4, 4)
-        button_layout.setSpacing(4)
-        
-        for action in getattr(self, '_row_actions', []) or []:
-            btn = QPushButton(action)
-            
-            # Set different colors for different actions
-            if action == "حذف":
-                color = "#dc3545"
-                hover_color = "#c82333"
-            elif action == "ویرایش":
-                color = "#ffc107"
-                hover_color = "#e0a800"
-            else:  # نمایش and others
-                color = "#28a745"
-                hover_color = "#218838"
-            
-            btn.setStyleSheet(f"""
-                QPushButton {{
-                    background: {color};
-                    color: white;
-                    border: none;
-                    padding: 4px 8px;
-                    border-radius: 3px;
-                    font-size: 11px;
-                    font-weight: bold;
-                }}
-                QPushButton:hover {{
-                    background: {hover_color};
-                }}
-            """)
-            btn.clicked.connect(lambda checked, a=action, idx=data_index: self.action_clicked.emit(a, idx))
-            button_layout.addWidget(btn)
-        
-        self.table.setCellWidget(row, col, button_widget)
+        self.model.reset(rows=self._filtered[start_idx:start_idx + self.rows_per_page])
     
     def _on_search(self, text: str):
-        """Handle search input change"""
+        """Handle search input change (debounced)"""
         self.search_term = text
-        self._apply_filter()
+        self._search_timer.start()
     
     def _on_rows_changed(self, text: str):
         """Handle rows per page change"""
-        self.rows_per_page = int(text)
+        self.rows_per_page = ALL_ROWS if text == ALL_ROWS_LABEL else int(text)
         self.current_page = 0
+        if self._remote_url:
+            self.reload()
+            return
         self._update_display()
     
     def _prev_page(self):
@@ -342,21 +468,141 @@ class AdvancedTable(QWidget):
         if self.current_page < total_pages - 1:
             self.current_page += 1
             self._update_display()
+        elif self._remote_url and self._remote_cursor:
+            self._fetch_remote(append=True)
     
-    def _on_selection_changed(self):
+    def _on_selection_changed(self, current: QModelIndex, _previous: QModelIndex):
         """Handle table selection change"""
-        current_row = self.table.currentRow()
-        if current_row >= 0:
+        if current.isValid():
             # Calculate actual data index
-            data_index = self.current_page * self.rows_per_page + current_row
+            data_index = self.current_page * self.rows_per_page + current.row()
             if data_index < len(self.filtered_data):
                 self.row_selected.emit(data_index)
     
     def get_selected_data(self) -> Optional[Dict[str, Any]]:
         """Get currently selected row data"""
-        current_row = self.table.currentRow()
-        if current_row >= 0:
-            data_index = self.current_page * self.rows_per_page + current_row
+        current = self.table.currentIndex()
+        if current.isValid():
+            data_index = self.current_page * self.rows_per_page + current.row()
             if data_index < len(self.filtered_data):
                 return self.filtered_data[data_index]
-        return None
\ No newline at end of file
+        return None
+
+
+class _TableModel(QAbstractTableModel):
+    """Rows of the current page; cell text lives in one list per column."""
+    
+    def __init__(self, headers: List[str], parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.columns: List[List[str]] = []
+        self.rows: List[int] = []  # index into the column lists for each visible row
+    
+    def reset(self, columns: Optional[List[List[str]]] = None, rows: Optional[List[int]] = None):
+        self.beginResetModel()
+        if columns is not None:
+            self.columns = columns
+        if rows is not None:
+            self.rows = rows
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            col = index.column()
+            # The action column has no text; the delegate paints it
+            if col < len(self.columns):
+                return self.columns[col][self.rows[index.row()]]
+            return None
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section < len(self.headers):
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+
+class _ActionDelegate(QStyledItemDelegate):
+    """Paints the row action buttons and maps clicks back to (action, row)."""
+    
+    clicked = Signal(str, int)
+    
+    MARGIN = 4
+    SPACING = 4
+    BUTTON_PADDING = 8
+    
+    def __init__(self, actions: List[str], view: QTableView):
+        super().__init__(view)
+        self.actions = actions
+        self.view = view
+        self._font: Optional[QFont] = None
+    
+    def _button_font(self, option) -> QFont:
+        if self._font is None:
+            self._font = QFont(option.font)
+            self._font.setPixelSize(11)
+            self._font.setBold(True)
+        return self._font
+    
+    def _button_rects(self, option) -> List[QRect]:
+        fm = QFontMetrics(self._button_font(option))
+        widths = [fm.horizontalAdvance(a) + 2 * self.BUTTON_PADDING for a in self.actions]
+        total = sum(widths) + self.SPACING * max(0, len(widths) - 1)
+        rect = option.rect
+        height = max(0, rect.height() - 2 * self.MARGIN)
+        x = rect.left() + max(self.MARGIN, (rect.width() - total) // 2)
+        rects = []
+        for w in widths:
+            rects.append(QRect(x, rect.top() + self.MARGIN, w, height))
+            x += w + self.SPACING
+        if option.direction == Qt.RightToLeft:
+            # Mirror so the first action sits on the right, as a layout would place it
+            rects = [QRect(rect.left() + rect.right() - r.right(), r.top(), r.width(), r.height()) for r in rects]
+        return rects
+    
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        hover_pos = None
+        if option.state & QStyle.State_MouseOver:
+            hover_pos = self.view.viewport().mapFromGlobal(QCursor.pos())
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(self._button_font(option))
+        for action, rect in zip(self.actions, self._button_rects(option)):
+            color, hover_color = ACTION_COLORS.get(action, DEFAULT_ACTION_COLORS)
+            hovered = hover_pos is not None and rect.contains(hover_pos)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(hover_color if hovered else color))
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignCenter, action)
+        painter.restore()
+    
+    def sizeHint(self, option, index):
+        rects = self._button_rects(option)
+        width = (rects[-1].right() - rects[0].left() if rects else 0) + 2 * self.MARGIN
+        return QSize(abs(width), super().sizeHint(option, index).height())
+    
+    def editorEvent(self, event, model, option, index):
+        etype = event.type()
+        if etype == QEvent.MouseMove:
+            # Hover color is per button, so repaint while moving inside the cell
+            self.view.viewport().update(option.rect)
+            return False
+        if etype == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pos = event.position().toPoint()
+            for action, rect in zip(self.actions, self._button_rects(option)):
+                if rect.contains(pos):
+                    # Row within the current page, as the widget buttons reported it
+                    self.clicked.emit(action, index.row())
+                    return True
+        return False
@@ -50,7 +50,7 @@ API_EMP_CREATE = "/api/employees"
 
 
 class پنجره_داشبورد(QWidget):
-    def __init__(self, نمایش_نام: str, نقش: str, توکن: str, بازگشت_به_ورود):
+    def __init__(self, نمایش_نام: str, نقش: str, توکن: str, بازگشت_به_ورود, کد_ملی: str | None = None):
         super().__init__()
         self.setWindowTitle("Phoenix")
         # Fullscreen layout per requirements
@@ -62,7 +62,7 @@ class پنجره_داشبورد(QWidget):
             from client.state import session as _session
         except Exception:
             from client.state import session as _session
-        _session.set_session(توکن, نقش, نمایش_نام)
+        _session.set_session(توکن, نقش, نمایش_نام, کد_ملی)
 
         # Auto check-in on login
         self._auto_check_in()
@@ -262,7 +262,12 @@ class پنجره_داشبورد(QWidget):
         except Exception:
             pass  # Ignore errors during logout
         
-        # Clear session first to prevent further API calls
+        # Drop this user's replica rows, then clear the session to prevent further API calls
+        try:
+            from client.services import local_store
+            local_store.clear_scope()
+        except Exception:
+            pass
         from client.state import session as _session
         _session.clear_session()
         
@@ -941,7 +946,7 @@ class پنجره_ورود(QWidget):
             def back_to_login():
                 self.show()
                 self.کدملی.clear(); self.رمز_عبور.clear(); self.برچسب_وضعیت.clear()
-            self.پنجره_داشبورد = پنجره_داشبورد(display_name, role, token, back_to_login)
+            self.پنجره_داشبورد = پنجره_داشبورد(display_name, role, token, back_to_login, national_id)
             self.پنجره_داشبورد.show()
             self.hide()
         else:
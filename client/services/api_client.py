@@ -3,14 +3,24 @@
 Use this instead of calling requests directly in views.
 - Supports absolute URLs (http/https) and relative paths like "/api/..."
 - Base URL can be configured via SERVER_BASE_URL environment variable.
+- Requests go through a keep-alive requests.Session (one per thread) with a
+  pooled HTTPAdapter, so repeated calls reuse the TCP/TLS connection.
+  Idempotent requests are retried with backoff on connection errors and
+  502/503/504 (API_MAX_RETRIES, default 2).
 """
 from typing import Any, Dict, Optional
+from collections import OrderedDict
 import json
 import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from client.state import session
 
 DEFAULT_TIMEOUT = 15
+MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "2"))
+POOL_MAXSIZE = 10
 try:
     # Prefer config module for base URL (env > config.json > default)
     from client import config as _cfg
@@ -19,6 +29,35 @@ except Exception:
     BASE_URL = os.getenv("SERVER_BASE_URL", "http://127.0.0.1:5000").rstrip("/")
 
 
+def _retry_policy() -> Retry:
+    kwargs = dict(
+        total=MAX_RETRIES, connect=MAX_RETRIES, read=MAX_RETRIES, status=MAX_RETRIES,
+        backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False,
+    )
+    # POST/PATCH are not idempotent: never replay them
+    methods = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+    try:
+        return Retry(allowed_methods=methods, **kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=methods, **kwargs)
+
+
+_local = threading.local()
+
+
+def _http() -> requests.Session:
+    """Keep-alive session for the calling thread (Session objects are not thread-safe)."""
+    sess = getattr(_local, "session", None)
+    if sess is None:
+        sess = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=_retry_policy())
+        sess.mount("http://", adapter)
+        sess.mount("https://", adapter)
+        _local.session = sess
+    return sess
+
+
 def _normalize_url(url: str) -> str:
     if url.startswith("http://") or url.startswith("https://"):
         return url
@@ -38,23 +77,54 @@ def _headers(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
     return h
 
 
+# Conditional GET: last ETag and body per (url, token). A 304 reply is turned
+# back into a 200 carrying the cached body, so callers see no difference.
+_ETAG_CACHE_SIZE = 128
+_etag_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def _remember(key: tuple, resp: requests.Response) -> None:
+    etag = resp.headers.get("ETag")
+    with _etag_lock:
+        if resp.status_code == 200 and etag:
+            _etag_cache[key] = (etag, resp.content, resp.headers.get("Content-Type", "application/json"))
+            _etag_cache.move_to_end(key)
+            while len(_etag_cache) > _ETAG_CACHE_SIZE:
+                _etag_cache.popitem(last=False)
+        else:
+            _etag_cache.pop(key, None)
+
+
 def get(url: str, timeout: int = DEFAULT_TIMEOUT) -> requests.Response:
-    return requests.get(_normalize_url(url), headers=_headers(), timeout=timeout)
+    full_url = _normalize_url(url)
+    key = (full_url, session.get_token())
+    with _etag_lock:
+        cached = _etag_cache.get(key)
+    extra = {"If-None-Match": cached[0]} if cached else None
+    resp = _http().get(full_url, headers=_headers(extra), timeout=timeout)
+    if resp.status_code == 304 and cached:
+        resp.status_code = 200
+        resp._content = cached[1]
+        resp.headers["Content-Type"] = cached[2]
+        return resp
+    _remember(key, resp)
+    return resp
 
 
 def post_json(url: str, payload: Dict[str, Any], timeout: int = DEFAULT_TIMEOUT) -> requests.Response:
-    return requests.post(_normalize_url(url), headers=_headers(), data=json.dumps(payload).encode("utf-8"), timeout=timeout)
+    return _http().post(_normalize_url(url), headers=_headers(), data=json.dumps(payload).encode("utf-8"), timeout=timeout)
 
 # Backwards-compat alias
 post = post_json
 
 
 def delete(url: str, timeout: int = DEFAULT_TIMEOUT) -> requests.Response:
-    return requests.delete(_normalize_url(url), headers=_headers(), timeout=timeout)
+    return _http().delete(_normalize_url(url), headers=_headers(), timeout=timeout)
 
 
 def patch_json(url: str, payload: Dict[str, Any], timeout: int = DEFAULT_TIMEOUT) -> requests.Response:
-    return requests.patch(_normalize_url(url), headers=_headers(), data=json.dumps(payload).encode("utf-8"), timeout=timeout)
+    return _http().patch(_normalize_url(url), headers=_headers(), data=json.dumps(payload).encode("utf-8"), timeout=timeout)
 
 
 def parse_json(resp: requests.Response) -> Dict[str, Any]:
@@ -71,3 +141,31 @@ def parse_json(resp: requests.Response) -> Dict[str, Any]:
     if isinstance(data, dict) and "status" not in data and resp.status_code != 200:
         return {"status": "error", "message": f"HTTP {resp.status_code}"}
     return data
+
+
+# Non-blocking variants for Qt views: the call runs on a worker thread and the
+# callbacks run on the main thread. See client.services.async_api.
+def get_async(url: str, **kw):
+    from client.services import async_api
+    return async_api.get_async(url, **kw)
+
+
+def post_json_async(url: str, payload: Dict[str, Any], **kw):
+    from client.services import async_api
+    return async_api.post_json_async(url, payload, **kw)
+
+
+def patch_json_async(url: str, payload: Dict[str, Any], **kw):
+    from client.services import async_api
+    return async_api.patch_json_async(url, payload, **kw)
+
+
+def delete_async(url: str, **kw):
+    from client.services import async_api
+    return async_api.delete_async(url, **kw)
+
+
+def cancel_requests(owner) -> None:
+    """Drop the pending background requests started for `owner`."""
+    from client.services import async_api
+    async_api.cancel_all(owner)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Background execution of API calls for Qt views.
+
+HTTP calls run on a QThreadPool; results come back through a queued signal so
+callbacks always execute on the Qt main thread and may touch widgets.
+
+    api_client.get_async("/api/loans", on_success=self._on_loans, owner=self, key="loans")
+
+- on_success(resp) / on_error(exc) receive the requests.Response / exception.
+- key: starting a request with the same (owner, key) cancels the previous one,
+  so only the latest refresh of a view delivers its result.
+- owner: a QObject; its pending requests are cancelled when it is destroyed.
+- The returned handle has cancel(); a cancelled request still finishes on the
+  worker thread but its callbacks are dropped.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Optional, Tuple
+import itertools
+import logging
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from client.services import api_client
+
+log = logging.getLogger(__name__)
+
+MAX_THREADS = 4
+
+
+class RequestHandle:
+    """A pending background request."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, key: Optional[Tuple], on_success: Optional[Callable], on_error: Optional[Callable]):
+        self.id = next(self._ids)
+        self.key = key
+        self.on_success = on_success
+        self.on_error = on_error
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self.on_success = self.on_error = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+
+class _Bridge(QObject):
+    """Lives on the main thread; worker threads emit, the slot runs there."""
+
+    finished = Signal(object, object, object)  # handle, response, exception
+
+    def __init__(self):
+        super().__init__()
+        self.finished.connect(self._deliver)
+        self._pending: Dict[Tuple, RequestHandle] = {}
+
+    def _deliver(self, handle: RequestHandle, resp: Any, exc: Any) -> None:
+        if handle.key is not None and self._pending.get(handle.key) is handle:
+            del self._pending[handle.key]
+        if handle.cancelled:
+            return
+        try:
+            if exc is not None:
+                if handle.on_error:
+                    handle.on_error(exc)
+                else:
+                    log.warning("Background request failed: %s", exc)
+            elif handle.on_success:
+                handle.on_success(resp)
+        except RuntimeError as e:
+            # Target widget was deleted meanwhile
+            log.debug("Dropped result for a deleted widget: %s", e)
+        except Exception:
+            log.exception("Error in request callback")
+
+    def track(self, handle: RequestHandle) -> None:
+        if handle.key is None:
+            return
+        previous = self._pending.get(handle.key)
+        if previous is not None:
+            previous.cancel()
+        self._pending[handle.key] = handle
+
+    def cancel_owner(self, owner_id: int) -> None:
+        for key, handle in list(self._pending.items()):
+            if key[0] == owner_id:
+                handle.cancel()
+                del self._pending[key]
+
+
+class _Task(QRunnable):
+    def __init__(self, bridge: _Bridge, handle: RequestHandle, fn: Callable, args: tuple):
+        super().__init__()
+        self.bridge = bridge
+        self.handle = handle
+        self.fn = fn
+        self.args = args
+
+    def run(self) -> None:
+        if self.handle.cancelled:
+            self.bridge.finished.emit(self.handle, None, None)
+            return
+        resp, exc = None, None
+        try:
+            resp = self.fn(*self.args)
+        except Exception as e:
+            exc = e
+        self.bridge.finished.emit(self.handle, resp, exc)
+
+
+_bridge: Optional[_Bridge] = None
+_pool: Optional[QThreadPool] = None
+_watched_owners: set = set()
+
+
+def _setup() -> Tuple[_Bridge, QThreadPool]:
+    # First call happens on the main thread, which makes the bridge live there
+    global _bridge, _pool
+    if _bridge is None:
+        _bridge = _Bridge()
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(MAX_THREADS)
+    return _bridge, _pool
+
+
+def submit(fn: Callable, *args, on_success: Optional[Callable] = None, on_error: Optional[Callable] = None,
+           owner: Optional[QObject] = None, key: Any = None) -> RequestHandle:
+    """Run fn(*args) on the pool and deliver its result on the main thread."""
+    bridge, pool = _setup()
+    track_key = None
+    if key is not None or owner is not None:
+        owner_id = id(owner) if owner is not None else 0
+        track_key = (owner_id, key if key is not None else getattr(fn, "__name__", "call"))
+        if owner is not None and owner_id not in _watched_owners:
+            _watched_owners.add(owner_id)
+            owner.destroyed.connect(lambda *_: (_watched_owners.discard(owner_id), bridge.cancel_owner(owner_id)))
+    handle = RequestHandle(track_key, on_success, on_error)
+    bridge.track(handle)
+    pool.start(_Task(bridge, handle, fn, args))
+    return handle
+
+
+def get_async(url: str, **kw) -> RequestHandle:
+    return submit(api_client.get, url, **kw)
+
+
+def post_json_async(url: str, payload: Dict[str, Any], **kw) -> RequestHandle:
+    return submit(api_client.post_json, url, payload, **kw)
+
+
+def patch_json_async(url: str, payload: Dict[str, Any], **kw) -> RequestHandle:
+    return submit(api_client.patch_json, url, payload, **kw)
+
+
+def delete_async(url: str, **kw) -> RequestHandle:
+    return submit(api_client.delete, url, **kw)
+
+
+def cancel_all(owner: QObject) -> None:
+    """Cancel every tracked request started for `owner`."""
+    if _bridge is not None:
+        _bridge.cancel_owner(id(owner))
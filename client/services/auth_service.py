@@ -14,7 +14,7 @@ def login(national_id: str, password: str) -> Dict:
     resp = api_client.post_json(API_LOGIN, {"national_id": national_id, "password": password})
     data = resp.json()
     if data.get("status") == "success":
-        session.set_session(data.get("token"), data.get("role"), data.get("display_name"))
+        session.set_session(data.get("token"), data.get("role"), data.get("display_name"), national_id)
     return data
 
 
@@ -22,4 +22,6 @@ def logout() -> None:
     try:
         api_client.post_json(API_LOGOUT, {})
     finally:
+        from client.services import local_store
+        local_store.clear_scope()
         session.clear_session()
\ No newline at end of file
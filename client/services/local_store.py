@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Local SQLite replica of server lists (loan buyers, creditors).
+
+Views read the replica for an instant first paint, then sync in the
+background: the list endpoint is called with ``updated_since=<watermark>`` and
+only rows changed since the last sync come back, plus the ids still visible,
+which drop deleted rows (see server utils.delta).
+
+Rows are stored per scope (server URL, role and the national id the user
+logged in with), so switching accounts never shows another user's rows; a
+scope's rows are dropped on logout. The file lives under the user profile;
+override with PHONIX_REPLICA_PATH.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+import json
+import os
+import sqlite3
+import threading
+
+from client.services import api_client
+from client.state import session
+
+# Replicated resource -> list endpoint supporting updated_since. Loans page and
+# filter on the server, and branch rows need derived employee counts, so those
+# views keep reading their list endpoints.
+RESOURCES: Dict[str, str] = {
+    "loan_buyers": "/api/loan-buyers",
+    "creditors": "/api/creditors",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    resource TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (resource, scope, id)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    resource TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    PRIMARY KEY (resource, scope)
+);
+"""
+
+_local = threading.local()
+# One sync per resource at a time; a second caller waits and then pulls the small remainder
+_sync_locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in RESOURCES}
+
+
+def db_path() -> str:
+    path = os.getenv("PHONIX_REPLICA_PATH")
+    if path:
+        return path
+    return os.path.join(os.path.expanduser("~"), ".phonixsuite", "replica.sqlite3")
+
+
+def _conn() -> sqlite3.Connection:
+    """Connection for the calling thread (sqlite3 connections are per thread)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        path = db_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        # WAL lets the UI thread read while a worker applies a sync
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _scope() -> str:
+    return f"{api_client.BASE_URL}|{session.get_role() or ''}|{session.get_national_id() or ''}"
+
+
+def rows(resource: str) -> List[Dict[str, Any]]:
+    """Replicated rows of `resource`, newest id first (empty before the first sync)."""
+    cur = _conn().execute(
+        "SELECT data FROM records WHERE resource=? AND scope=? ORDER BY id DESC", (resource, _scope())
+    )
+    return [json.loads(r[0]) for r in cur.fetchall()]
+
+
+def watermark(resource: str) -> Optional[str]:
+    row = _conn().execute(
+        "SELECT watermark FROM watermarks WHERE resource=? AND scope=?", (resource, _scope())
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _apply(resource: str, scope: str, delta: Dict[str, Any]) -> None:
+    conn = _conn()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO records (resource, scope, id, data) VALUES (?,?,?,?)",
+            [(resource, scope, int(it["id"]), json.dumps(it, ensure_ascii=False)) for it in delta.get("items") or []],
+        )
+        visible = {int(i) for i in delta.get("ids") or []}
+        stored = [r[0] for r in conn.execute(
+            "SELECT id FROM records WHERE resource=? AND scope=?", (resource, scope)
+        ).fetchall()]
+        gone = [(resource, scope, i) for i in stored if i not in visible]
+        if gone:
+            conn.executemany("DELETE FROM records WHERE resource=? AND scope=? AND id=?", gone)
+        conn.execute(
+            "INSERT OR REPLACE INTO watermarks (resource, scope, watermark) VALUES (?,?,?)",
+            (resource, scope, delta["watermark"]),
+        )
+
+
+def sync(resource: str) -> bool:
+    """Pull changes for `resource` since the last sync (blocking). Returns True on success."""
+    with _sync_locks[resource]:
+        scope = _scope()
+        url = f"{RESOURCES[resource]}?updated_since={quote(watermark(resource) or '')}"
+        data = api_client.parse_json(api_client.get(url))
+        if data.get("status") != "success" or "watermark" not in data:
+            return False
+        _apply(resource, scope, data)
+        return True
+
+
+def sync_async(resource: str, on_done: Callable[[List[Dict[str, Any]]], None],
+               on_error: Optional[Callable[[Exception], None]] = None, owner=None, key: Any = None):
+    """Sync on a worker thread, then call on_done(rows) on the UI thread."""
+    from client.services import async_api
+
+    def work():
+        sync(resource)
+        return rows(resource)
+
+    return async_api.submit(work, on_success=on_done, on_error=on_error, owner=owner,
+                            key=key if key is not None else resource)
+
+
+def clear_scope() -> None:
+    """Forget the current user's replicated rows (called on logout)."""
+    scope = _scope()
+    conn = _conn()
+    with conn:
+        conn.execute("DELETE FROM records WHERE scope=?", (scope,))
+        conn.execute("DELETE FROM watermarks WHERE scope=?", (scope,))
+
+
+def clear() -> None:
+    """Forget every replicated row (e.g. after the server was reset)."""
+    conn = _conn()
+    with conn:
+        conn.execute("DELETE FROM records")
+        conn.execute("DELETE FROM watermarks")
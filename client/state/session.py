@@ -1,26 +1,29 @@
 # -*- coding: utf-8 -*-
 """Simple in-memory session store for the desktop client.
-Holds the current auth token and role.
+Holds the current auth token, role and the national id the user logged in with.
 """
 from typing import Optional
 
 _token: Optional[str] = None
 _role: Optional[str] = None
 _display_name: Optional[str] = None
+_national_id: Optional[str] = None
 
 
-def set_session(token: str, role: str, display_name: str) -> None:
-    global _token, _role, _display_name
+def set_session(token: str, role: str, display_name: str, national_id: Optional[str] = None) -> None:
+    global _token, _role, _display_name, _national_id
     _token = token or ""
     _role = role or "user"
     _display_name = display_name or ""
+    _national_id = national_id or ""
 
 
 def clear_session() -> None:
-    global _token, _role, _display_name
+    global _token, _role, _display_name, _national_id
     _token = None
     _role = None
     _display_name = None
+    _national_id = None
 
 
 def get_token() -> Optional[str]:
@@ -32,4 +35,8 @@ def get_role() -> Optional[str]:
 
 
 def get_display_name() -> Optional[str]:
-    return _display_name
\ No newline at end of file
+    return _display_name
+
+
+def get_national_id() -> Optional[str]:
+    return _national_id
@@ -8,10 +8,10 @@ from __future__ import annotations
 from typing import List, Dict, Any
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QComboBox, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QComboBox, QHeaderView, QAbstractItemView,
     QGroupBox
 )
-from client.components.styled_table import StyledTableWidget
+from client.components.advanced_table import AdvancedTable
 from PySide6.QtCore import Qt
 
 from client.services import api_client
@@ -50,9 +50,8 @@ class ActivityView(QWidget):
         fl.addStretch(1); fl.addWidget(btn_clear); fl.addWidget(btn_refresh)
         root.addWidget(box)
 
-        # Table
-        self.tbl = StyledTableWidget(0, 5)
-        self.tbl.setHorizontalHeaderLabels(["زمان", "کاربر", "اقدام", "جزئیات", "وضعیت"]) 
+        # Table: the server searches, sorts and pages the log
+        self.tbl = AdvancedTable(["زمان", "کاربر", "اقدام", "جزئیات", "وضعیت"])
         root.addWidget(self.tbl)
 
     def _load_employees(self):
@@ -72,44 +71,34 @@ class ActivityView(QWidget):
         self._refresh()
 
     def _refresh(self):
-        params = []
+        # An explicit sort selects the keyset protocol (see server routes/activity.py)
+        params: Dict[str, Any] = {"sort": "-created_at"}
         emp_id = self.cb_employee.currentData()
         if emp_id and emp_id != -1:
-            params.append(f"user_id={emp_id}")
+            params["user_id"] = emp_id
         df = self.date_from.get_gregorian_iso()
         dt = self.date_to.get_gregorian_iso()
         if df:
-            params.append(f"date_from={df}")
+            params["date_from"] = df
         if dt:
-            params.append(f"date_to={dt}")
-        url = API_ACTIVITY + ("?" + "&".join(params) if params else "")
-        try:
-            data = api_client.parse_json(api_client.get(url))
-        except Exception:
-            data = {"status": "error"}
-        items = data.get("items", []) if data.get("status") == "success" else []
-        self._render(items)
+            params["date_to"] = dt
+        self.tbl.set_remote_source(
+            API_ACTIVITY,
+            self._activity_row,
+            sort_fields={"زمان": "created_at", "کاربر": "user_name", "اقدام": "action", "وضعیت": "status"},
+            params=params,
+        )
 
-    def _render(self, items: List[Dict[str, Any]]):
-        self.tbl.setRowCount(0)
-        for it in items:
-            row = self.tbl.rowCount(); self.tbl.insertRow(row)
-            
-            # Make action more human-readable
-            action = self._humanize_action(it.get("action", ""))
-            
-            # Make details more readable
-            details = self._humanize_details(it.get("details", ""))
-            
-            vals = [
-                to_jalali_dt_str(it.get("created_at")),
-                str(it.get("user_name") or ""),
-                action,
-                details,
-                ("✅ موفق" if it.get("status") == "success" else "❌ خطا" if it.get("status") == "error" else "⚠️ ناموفق"),
-            ]
-            for c,v in enumerate(vals):
-                self.tbl.setItem(row, c, QTableWidgetItem(v))
+    def _activity_row(self, it: Dict[str, Any]) -> Dict[str, Any]:
+        status = it.get("status")
+        return {
+            "زمان": to_jalali_dt_str(it.get("created_at")),
+            "کاربر": str(it.get("user_name") or ""),
+            # Human-readable action and details
+            "اقدام": self._humanize_action(it.get("action", "")),
+            "جزئیات": self._humanize_details(it.get("details", "")),
+            "وضعیت": "✅ موفق" if status == "success" else "❌ خطا" if status == "error" else "⚠️ ناموفق",
+        }
     
     def _humanize_action(self, action: str) -> str:
         """Convert technical action names to human-readable Persian"""
@@ -7,7 +7,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 
-from client.services import api_client
+from client.services import api_client, local_store
 from client.utils.styles import PRIMARY, SECONDARY, DANGER
 from client.components.loan_dialogs import LoanViewDialog  # reuse dialog styling patterns
 from client.components.buyer_dialogs import BuyerAddDialog, BuyerEditDialog
@@ -167,25 +167,23 @@ class BuyersView(QWidget):
             self._load_history()
 
     def _load_active(self):
-        try:
-            r = api_client.get(API_BUYERS)
-            data = r.json()
-        except Exception:
-            data = {"status": "error", "items": []}
-        items = data.get("items", []) if data.get("status") == "success" else []
+        # Paint the local replica at once, then apply the delta sync.
+        # Both tabs render into the same table: share a key so the last tab wins
+        self._apply_active(local_store.rows("loan_buyers"))
+        local_store.sync_async("loan_buyers", self._apply_active, owner=self, key="list")
+
+    def _apply_active(self, items: List[Dict[str, Any]]):
         # Active dataset = exclude completed (loan_paid)
         actives = [it for it in items if it.get("processing_status") != "loan_paid"]
         self._all = actives
         self._apply_filters()
 
     def _load_history(self):
-        # Reuse same endpoint for now; in future backend can expose closed-only list
-        try:
-            r = api_client.get(API_BUYERS)
-            data = r.json()
-        except Exception:
-            data = {"status": "error", "items": []}
-        items = data.get("items", []) if data.get("status") == "success" else []
+        # Same replica as the active tab; history is the completed subset
+        self._apply_history(local_store.rows("loan_buyers"))
+        local_store.sync_async("loan_buyers", self._apply_history, owner=self, key="list")
+
+    def _apply_history(self, items: List[Dict[str, Any]]):
         # History dataset = only completed (loan_paid)
         hist = [it for it in items if it.get("processing_status") == "loan_paid"]
         # Render history columns: Buyer, Loan ID, Amount, Completion Date, Registered Employee
@@ -291,8 +289,12 @@ class BuyersView(QWidget):
             self._load_timeline(self._selected_id)
 
     def _load_timeline(self, buyer_id: int):
+        # Clicking through rows quickly supersedes the previous buyer's request
+        api_client.get_async(f"{API_BUYERS}/{buyer_id}/history", on_success=self._apply_timeline,
+                             on_error=lambda _e: self._apply_timeline(None), owner=self, key="timeline")
+
+    def _apply_timeline(self, r):
         try:
-            r = api_client.get(f"{API_BUYERS}/{buyer_id}/history")
             data = r.json()
         except Exception:
             data = {"status": "error", "items": []}
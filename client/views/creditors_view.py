@@ -6,7 +6,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 
-from client.services import api_client
+from client.services import api_client, local_store
 from client.components.creditor_dialogs import (
     CreditorAddDialog, CreditorEditDialog, CreditorViewDialog, PayDialog
 )
@@ -100,20 +100,16 @@ class CreditorsView(QWidget):
             self._load_all()
 
     def _load_all(self):
-        try:
-            a = api_client.get(f"{API_CREDITORS}?status=unsettled").json()
-            s = api_client.get(f"{API_CREDITORS}?status=settled").json()
-        except Exception:
-            self.lbl_status.setText("بارگذاری لیست بستانکاران ناموفق بود.")
-            return
-        if a.get("status") == "success":
-            self._all_active = a.get("items", [])
-        else:
-            self._all_active = []
-        if s.get("status") == "success":
-            self._all_settled = s.get("items", [])
-        else:
-            self._all_settled = []
+        # Paint the local replica at once, then apply the delta sync
+        self._apply_items(local_store.rows("creditors"))
+        local_store.sync_async(
+            "creditors", self._apply_items, owner=self,
+            on_error=lambda _e: self.lbl_status.setText("بارگذاری لیست بستانکاران ناموفق بود."),
+        )
+
+    def _apply_items(self, items: List[Dict[str, Any]]):
+        self._all_active = [it for it in items if it.get("settlement_status") != "settled"]
+        self._all_settled = [it for it in items if it.get("settlement_status") == "settled"]
         self._apply_filters()
 
     def _apply_filters(self):
@@ -8,7 +8,7 @@
 """
 from __future__ import annotations
 from typing import List, Dict, Any, Optional
-from datetime import datetime, date
+from datetime import datetime
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QGroupBox, QHBoxLayout, QTableWidgetItem, QHeaderView
 from client.components.styled_table import StyledTableWidget
 from PySide6.QtCore import Qt, QTimer
@@ -22,6 +22,7 @@ API_EMP_LIST = "/api/employees"
 API_FIN_METRICS = "/api/finance/metrics"
 API_LOANS = "/api/loans"
 API_ATT_ADMIN = "/api/attendance/admin"
+API_SUMMARY = "/api/dashboard/summary"
 
 
 class DashboardOverview(QWidget):
@@ -145,48 +146,50 @@ class DashboardOverview(QWidget):
         return box
 
     def _load_cards(self):
-        # total loan value (available/active only) -> sum of 'amount' excluding purchased/failed/cancelled
-        try:
-            data = api_client.parse_json(api_client.get(API_LOANS))
-        except Exception:
-            data = {"status": "error"}
+        # total loan value (available/active only), aggregated on the server
+        api_client.get_async(API_SUMMARY, on_success=self._apply_summary,
+                             on_error=lambda _e: self._apply_summary(None), owner=self, key="summary")
+
+        # monthly income (placeholder -> use finance metrics if available)
+        from client.state import session as client_session
+        role = (client_session.get_role() or "").lower()
+        if role not in ("admin", "accountant", "secretary"):
+            self.card_month_income._value_label.setText("محدود")
+        else:
+            api_client.get_async(API_FIN_METRICS, on_success=self._apply_month_income,
+                                 on_error=lambda _e: self.card_month_income._value_label.setText("خطا"),
+                                 owner=self, key="metrics")
+
+    def _apply_summary(self, resp):
+        data = api_client.parse_json(resp) if resp is not None else {"status": "error"}
         total = 0.0
         if data.get("status") == "success":
-            for it in data.get("items", []):
-                try:
-                    status = str(it.get("loan_status", "")).lower()
-                    if status in ("purchased", "failed", "cancelled"):
-                        continue
-                    total += float(it.get("amount") or 0)
-                except Exception:
-                    continue
+            summary = data.get("summary", {})
+            try:
+                total = float(summary.get("loans", {}).get("available_amount") or 0)
+            except Exception:
+                total = 0.0
+            self._apply_attendance_summary(summary.get("attendance"))
         self.card_total_loans._value_label.setText(f"{int(total):,} تومان".replace(",", ","))
 
-
-
-        # monthly income (placeholder -> use finance metrics if available)
+    def _apply_month_income(self, resp):
         try:
-            from client.state import session as client_session
-            role = (client_session.get_role() or "").lower()
-            if role not in ("admin", "accountant", "secretary"):
+            if resp.status_code == 403:
                 self.card_month_income._value_label.setText("محدود")
-            else:
-                resp = api_client.get(API_FIN_METRICS)
-                if resp.status_code == 403:
-                    self.card_month_income._value_label.setText("محدود")
-                else:
-                    met = api_client.parse_json(resp)
-                    if met.get("status") == "success":
-                        m = float(met.get("metrics", {}).get("monthly_income", 0))
-                        self.card_month_income._value_label.setText(f"{int(m):,} تومان".replace(",", ","))
+                return
+            met = api_client.parse_json(resp)
+            if met.get("status") == "success":
+                m = float(met.get("metrics", {}).get("monthly_income", 0))
+                self.card_month_income._value_label.setText(f"{int(m):,} تومان".replace(",", ","))
         except Exception:
             self.card_month_income._value_label.setText("خطا")
 
     def _load_recent(self):
-        try:
-            data = api_client.parse_json(api_client.get(API_RECENT + "?limit=10"))
-        except Exception:
-            data = {"status": "error"}
+        api_client.get_async(API_RECENT + "?limit=10", on_success=self._apply_recent,
+                             on_error=lambda _e: self._apply_recent(None), owner=self, key="recent")
+
+    def _apply_recent(self, resp):
+        data = api_client.parse_json(resp) if resp is not None else {"status": "error"}
         items = data.get("items", []) if data.get("status") == "success" else []
         self.tbl_recent.setRowCount(0)
         for it in items[:10]:
@@ -228,16 +231,11 @@ class DashboardOverview(QWidget):
         return action_map.get(action, f"📋 {action}")
 
     def _load_attendance_summary(self):
-        # Today in ISO
-        today_iso = date.today().strftime("%Y-%m-%d")
-        try:
-            data = api_client.parse_json(api_client.get(f"{API_ATT_ADMIN}?date_from={today_iso}&date_to={today_iso}"))
-        except Exception:
-            data = {"status": "error"}
-        present = 0
-        if data.get("status") == "success":
-            items = data.get("items", [])
-            present = len(items)
+        # The summary response also carries the attendance block
+        api_client.get_async(API_SUMMARY, on_success=self._apply_summary, owner=self, key="summary")
+
+    def _apply_attendance_summary(self, attendance: Optional[dict]):
+        present = int((attendance or {}).get("present") or 0)
         self.lbl_attendance.setText(f"امروز: حاضر {present} نفر")
 
     def _tick_session(self):
@@ -20,6 +20,7 @@ API_LOANS = "/api/loans"
 API_BUYERS = "/api/loan-buyers"
 API_CREDITORS = "/api/creditors"
 API_RECENT = "/api/activity"
+API_SUMMARY = "/api/dashboard/summary"
 
 
 class EmployeeOverview(QWidget):
@@ -71,29 +72,21 @@ class EmployeeOverview(QWidget):
         return box
 
     def _load_cards(self):
-        # Active loans count (for employee - only available/non-purchased loans)
+        # Loan and buyer counts come pre-aggregated (and role-scoped) from the server
         try:
-            data = api_client.parse_json(api_client.get(API_LOANS))
-            if data.get("status") == "success":
-                # Employee sees only available loans
-                active_loans = [item for item in data.get("items", []) 
-                               if str(item.get("loan_status", "")).lower() != "purchased"]
-                self.card_active_loans.property("value_label").setText(str(len(active_loans)))
-            else:
-                self.card_active_loans.property("value_label").setText("خطا")
+            data = api_client.parse_json(api_client.get(API_SUMMARY))
         except Exception:
+            data = {"status": "error"}
+        if data.get("status") == "success":
+            summary = data.get("summary", {})
+            # Employee sees only available loans
+            loans = summary.get("loans", {}).get("by_status", {})
+            active_loans = sum(int(v.get("count") or 0) for st, v in loans.items() if str(st).lower() != "purchased")
+            self.card_active_loans.property("value_label").setText(str(active_loans))
+            # All buyers counted are the employee's own due to backend filtering
+            self.card_my_buyers.property("value_label").setText(str(int(summary.get("buyers", {}).get("count") or 0)))
+        else:
             self.card_active_loans.property("value_label").setText("خطا")
-
-        # My buyers count
-        try:
-            data = api_client.parse_json(api_client.get(API_BUYERS))
-            if data.get("status") == "success":
-                # All buyers returned should be employee's own buyers due to backend filtering
-                buyer_count = len(data.get("items", []))
-                self.card_my_buyers.property("value_label").setText(str(buyer_count))
-            else:
-                self.card_my_buyers.property("value_label").setText("خطا")
-        except Exception:
             self.card_my_buyers.property("value_label").setText("خطا")
 
         # Active creditors count - REMOVED as per user request
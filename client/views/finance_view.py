@@ -470,8 +470,13 @@ class FinanceView(QWidget):
                 self.creditors_card.update_value(format_persian_currency(0), "محدود")
                 return
 
-            response = api_client.get("/api/finance/metrics")
-            
+            api_client.get_async("/api/finance/metrics", on_success=self._apply_metrics, owner=self, key="metrics")
+        except Exception as e:
+            logging.error(f"Error loading metrics: {e}")
+    
+    def _apply_metrics(self, response):
+        """Update the metric cards from a metrics response"""
+        try:
             if response.status_code == 403:
                 # Silent handling: keep UI clean
                 self.revenue_card.update_value(format_persian_currency(0), "محدود")
@@ -529,8 +534,13 @@ class FinanceView(QWidget):
                 self.trend_table.set_data([])
                 return
 
-            response = api_client.get("/api/finance/trend")
-            
+            api_client.get_async("/api/finance/trend", on_success=self._apply_trend_data, owner=self, key="trend")
+        except Exception:
+            logging.exception("Error loading trend data")
+    
+    def _apply_trend_data(self, response):
+        """Fill the chart and trend table from a trend response"""
+        try:
             if response.status_code == 403:
                 # Silent: show empty
                 self.financial_chart.set_data([])
@@ -588,35 +598,29 @@ class FinanceView(QWidget):
             logging.exception("Error loading trend data")
     
     def _load_transactions(self):
-        """Load financial transactions"""
-        try:
-            response = api_client.get("/api/finance/transactions")
-            
-            if response.status_code == 403:
-                return
-            
-            data = api_client.parse_json(response)
-            
-            if data.get("status") == "success":
-                transactions = data.get("transactions", [])
-                
-                # Format for table (fields per backend: id,type,description,amount,date)
-                table_data = []
-                for trans in transactions:
-                    desc = trans.get("description", "") or ""
-                    table_data.append({
-                        "نوع": "💰 درآمد" if trans.get("type") == "revenue" else "💸 هزینه",
-                        "منبع": desc,
-                        "مبلغ": format_persian_currency(trans.get("amount", 0)),
-                        "تاریخ": to_jalali_dt_str(trans.get("date", "")),
-                        "توضیحات": desc[:50] + "..." if len(desc) > 50 else desc,
-                        "شناسه": str(trans.get("id"))
-                    })
-                
-                self.transactions_table.set_data(table_data)
-                
-        except Exception as e:
-            logging.error(f"Error loading transactions: {e}")
+        """Load financial transactions; the server searches, sorts and pages them"""
+        if self.transactions_table._remote_url:
+            self.transactions_table.reload()
+            return
+        self.transactions_table.set_remote_source(
+            "/api/finance/transactions",
+            self._transaction_row,
+            sort_fields={"مبلغ": "amount", "تاریخ": "date"},
+            items_key="transactions",
+        )
+    
+    @staticmethod
+    def _transaction_row(trans: Dict[str, Any]) -> Dict[str, Any]:
+        """Format one transaction for the table (fields per backend: id,type,description,amount,date)"""
+        desc = trans.get("description", "") or ""
+        return {
+            "نوع": "💰 درآمد" if trans.get("type") == "revenue" else "💸 هزینه",
+            "منبع": desc,
+            "مبلغ": format_persian_currency(trans.get("amount", 0)),
+            "تاریخ": to_jalali_dt_str(trans.get("date", "")),
+            "توضیحات": desc[:50] + "..." if len(desc) > 50 else desc,
+            "شناسه": str(trans.get("id"))
+        }
     
     def _add_transaction(self, transaction_type: str):
         """Add new financial transaction"""
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlencode
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel,
     QComboBox, QDoubleSpinBox, QTableWidget, QTableWidgetItem, QHeaderView,
@@ -7,7 +8,7 @@ from PySide6.QtWidgets import (
 )
 from client.components.advanced_table import AdvancedTable
 from client.components.jalali_date import format_persian_currency, to_jalali_dt_str
-from PySide6.QtCore import Qt, QLocale
+from PySide6.QtCore import Qt, QLocale, QTimer
 
 from client.services import api_client
 from client.components.loan_dialogs import (
@@ -16,6 +17,9 @@ from client.components.loan_dialogs import (
 from client.utils.i18n import t_status
 
 API_LOANS = "/api/loans"
+API_LOAN_FILTERS = "/api/loans/filters"
+PAGE_SIZE = 100
+ACTIVE_STATUSES = "available,failed"
 
 
 class LoansView(QWidget):
@@ -66,12 +70,15 @@ class LoansView(QWidget):
         self.in_amount_max.setAlignment(Qt.AlignRight | Qt.AlignVCenter); self.in_amount_max.setStyleSheet("QDoubleSpinBox{padding:6px 8px;}")
         self.in_amount_max.setValue(0)
 
-        self.in_search.textChanged.connect(self._apply_filters)
+        # Filters run on the server; debounce typing so each keystroke is not a request
+        self._filter_timer = QTimer(self); self._filter_timer.setSingleShot(True); self._filter_timer.setInterval(300)
+        self._filter_timer.timeout.connect(self._apply_filters)
+        self.in_search.textChanged.connect(lambda _: self._filter_timer.start())
         self.cb_bank.currentIndexChanged.connect(self._apply_filters)
         self.cb_type.currentIndexChanged.connect(self._apply_filters)
         self.cb_duration.currentIndexChanged.connect(self._apply_filters)
-        self.in_amount_min.valueChanged.connect(lambda _: self._apply_filters())
-        self.in_amount_max.valueChanged.connect(lambda _: self._apply_filters())
+        self.in_amount_min.valueChanged.connect(lambda _: self._filter_timer.start())
+        self.in_amount_max.valueChanged.connect(lambda _: self._filter_timer.start())
 
         filters_bar.addWidget(self.in_search)
         filters_bar.addWidget(self.cb_bank)
@@ -112,7 +119,10 @@ class LoansView(QWidget):
         
         btn_refresh = QPushButton("نوسازی فهرست"); btn_refresh.clicked.connect(self._load_loans)
         btn_refresh.setStyleSheet("QPushButton{background:#6c757d;color:white;padding:6px 12px;border-radius:4px;} QPushButton:hover{background:#5c636a}")
-        controls.addStretch(1); controls.addWidget(btn_refresh)
+        self.btn_more = QPushButton("بارگذاری بیشتر"); self.btn_more.setVisible(False)
+        self.btn_more.setStyleSheet("QPushButton{background:#f1f3f5;color:#212529;padding:6px 12px;border-radius:4px;border:1px solid #dee2e6;} QPushButton:hover{background:#e9ecef}")
+        self.btn_more.clicked.connect(lambda: self._load_page("active", append=True))
+        controls.addStretch(1); controls.addWidget(self.btn_more); controls.addWidget(btn_refresh)
         card_layout.addLayout(controls)
 
         card.setLayout(card_layout)
@@ -137,7 +147,10 @@ class LoansView(QWidget):
             btn_refresh_history = QPushButton("نوسازی فهرست")
             btn_refresh_history.clicked.connect(self._load_loans)
             btn_refresh_history.setStyleSheet("QPushButton{background:#6c757d;color:white;padding:6px 12px;border-radius:4px;} QPushButton:hover{background:#5c636a}")
-            history_controls.addStretch(1); history_controls.addWidget(btn_refresh_history)
+            self.btn_more_history = QPushButton("بارگذاری بیشتر"); self.btn_more_history.setVisible(False)
+            self.btn_more_history.setStyleSheet("QPushButton{background:#f1f3f5;color:#212529;padding:6px 12px;border-radius:4px;border:1px solid #dee2e6;} QPushButton:hover{background:#e9ecef}")
+            self.btn_more_history.clicked.connect(lambda: self._load_page("history", append=True))
+            history_controls.addStretch(1); history_controls.addWidget(self.btn_more_history); history_controls.addWidget(btn_refresh_history)
             history_card_layout.addLayout(history_controls)
 
             history_card.setLayout(history_card_layout)
@@ -147,18 +160,16 @@ class LoansView(QWidget):
         self.setStyleSheet("QWidget{background:white;color:black;}")
 
         self._all: List[Dict[str, Any]] = []
+        # Loaded pages per list and the server cursor for the next one
+        self._rows: Dict[str, List[Dict[str, Any]]] = {"active": [], "history": []}
+        self._cursors: Dict[str, Optional[str]] = {"active": None, "history": None}
         self._load_loans()
 
         # Expose a refresh hook so navigation can re-fetch on page load
         self._load_data = self._load_loans
 
-    def _populate_filter_values(self):
-        # Fill bank/type/duration from data
-        banks, types, durations = set(), set(), set()
-        for it in self._all:
-            if it.get("bank_name"): banks.add(it.get("bank_name"))
-            if it.get("loan_type"): types.add(it.get("loan_type"))
-            if it.get("duration"): durations.add(it.get("duration"))
+    def _populate_filter_values(self, values: Dict[str, List[str]]):
+        # Fill bank/type/duration from the server's distinct values
         def refill(cb: QComboBox, items: List[str], all_label: str):
             cur = cb.currentText()
             cb.blockSignals(True)
@@ -169,68 +180,75 @@ class LoansView(QWidget):
             idx = cb.findText(cur)
             if idx >= 0: cb.setCurrentIndex(idx)
             cb.blockSignals(False)
-        refill(self.cb_bank, list(banks), "همه بانک‌ها")
-        refill(self.cb_type, list(types), "همه نوع وام‌ها")
-        refill(self.cb_duration, list(durations), "همه مدت‌ها")
+        refill(self.cb_bank, values.get("bank_name") or [], "همه بانک‌ها")
+        refill(self.cb_type, values.get("loan_type") or [], "همه نوع وام‌ها")
+        refill(self.cb_duration, values.get("duration") or [], "همه مدت‌ها")
 
     def _load_loans(self):
-        try:
-            r = api_client.get(API_LOANS)
-            data = api_client.parse_json(r)
-        except Exception:
-            self.lbl_status.setText("بارگذاری لیست وام‌ها ناموفق بود.")
-            return
+        api_client.get_async(API_LOAN_FILTERS, on_success=self._on_filter_values, owner=self, key="filters")
+        self._apply_filters()
+
+    def _on_filter_values(self, r):
+        data = api_client.parse_json(r)
         if data.get("status") == "success":
-            self._all = data.get("items", [])
-            self._populate_filter_values()
-            self._apply_filters()
-            self.lbl_status.setText("" if self._all else "رکوردی وجود ندارد.")
-        else:
-            self.lbl_status.setText(data.get("message", "خطا در دریافت لیست وام‌ها."))
+            self._populate_filter_values(data)
 
-    def _apply_filters(self):
-        txt = (self.in_search.text() or "").strip().lower()
-        bank = self.cb_bank.currentData()
-        typ = self.cb_type.currentData()
-        dur = self.cb_duration.currentData()
+    def _filter_params(self) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        txt = (self.in_search.text() or "").strip()
+        if txt:
+            params["q"] = txt
+        for key, cb in (("bank_name", self.cb_bank), ("loan_type", self.cb_type), ("duration", self.cb_duration)):
+            if cb.currentData():
+                params[key] = cb.currentData()
         min_amount = float(self.in_amount_min.value())
         max_amount = float(self.in_amount_max.value())
-        def match(it: Dict[str, Any]) -> bool:
-            if txt:
-                if self.employee_mode:
-                    # Employee can only search by bank name
-                    name = (it.get("bank_name") or "").lower()
-                else:
-                    # Admin can search by bank name and owner name
-                    name = ((it.get("bank_name") or "") + " " + (it.get("owner_full_name") or "")).lower()
-                if txt not in name:
-                    return False
-            if bank and it.get("bank_name") != bank:
-                return False
-            if typ and it.get("loan_type") != typ:
-                return False
-            if dur and it.get("duration") != dur:
-                return False
-            try:
-                amt = float(it.get("amount") or 0)
-            except Exception:
-                amt = 0
-            if amt < min_amount:
-                return False
-            if max_amount > 0 and amt > max_amount:
-                return False
-            return True
-        filtered = [it for it in self._all if match(it)]
-        
-        # Split into Active (not purchased) and History (purchased)
+        if min_amount > 0:
+            params["min_amount"] = min_amount
+        if max_amount > 0:
+            params["max_amount"] = max_amount
+        return params
+
+    def _load_page(self, which: str, append: bool = False) -> None:
+        """Request the first (or next) page of the active / history list in the background.
+        A newer request for the same list supersedes a pending one.
+        """
+        params = self._filter_params()
+        params["limit"] = PAGE_SIZE
         # Employee mode doesn't see purchased loans at all (filtered by server)
-        active = [it for it in filtered if str(it.get("loan_status", "")).lower() != "purchased"]
-        self._render_active(active)
-        
+        params["loan_status"] = "purchased" if which == "history" else ACTIVE_STATUSES
+        if append:
+            if not self._cursors[which]:
+                return
+            params["cursor"] = self._cursors[which]
+        api_client.get_async(
+            f"{API_LOANS}?{urlencode(params)}",
+            on_success=lambda r: self._on_page(which, append, api_client.parse_json(r)),
+            on_error=lambda _e: self.lbl_status.setText("بارگذاری لیست وام‌ها ناموفق بود."),
+            owner=self, key=which,
+        )
+
+    def _on_page(self, which: str, append: bool, data: Dict[str, Any]):
+        if data.get("status") != "success":
+            self.lbl_status.setText(data.get("message", "خطا در دریافت لیست وام‌ها."))
+            return
+        items = data.get("items", [])
+        self._rows[which] = (self._rows[which] + items) if append else items
+        self._cursors[which] = data.get("next_cursor")
+        self._all = self._rows["active"] + self._rows["history"]
+        if which == "history":
+            self.btn_more_history.setVisible(bool(self._cursors[which]))
+            self._render_history(self._rows[which])
+        else:
+            self.btn_more.setVisible(bool(self._cursors[which]))
+            self._render_active(self._rows[which])
+        self.lbl_status.setText("" if self._all else "رکوردی وجود ندارد.")
+
+    def _apply_filters(self):
+        self._load_page("active")
         if not self.employee_mode:
             # Only admin sees history
-            history = [it for it in filtered if str(it.get("loan_status", "")).lower() == "purchased"]
-            self._render_history(history)
+            self._load_page("history")
 
     def _render_active(self, items: List[Dict[str, Any]]):
         # Render Active Loans (non-purchased) in main table
@@ -13,7 +13,9 @@ except Exception:
     pass
 
 # Local imports (module-local, not package-relative to allow running as a script)
-from database import get_connection
+from database import get_connection, init_app as init_db_scope
+from utils.cache import init_app as init_response_cache
+from utils.etag import init_app as init_etags
 from models.employee import (
     ensure_employee_schema,
     get_employee_by_national_id,
@@ -29,13 +31,20 @@ from routes.creditors import bp_creditors
 from routes.finance import bp_finance
 from routes.attendance import bp_attendance
 from routes.branches import bp_branches
-from models.activity import ensure_activity_schema, add_log, list_recent, cleanup_old_logs
+from routes.dashboard import bp_dashboard
+from models.activity import ensure_activity_schema, add_log, list_recent
 from routes.activity import bp_activity
-from models.auth_token import ensure_auth_token_schema, cleanup_expired_tokens
+from models.auth_token import ensure_auth_token_schema
 
 app = Flask(__name__)
 app.config["JSON_AS_ASCII"] = False
 app.config["JSON_SORT_KEYS"] = False
+# One pooled connection / transaction per request (registered first so it commits last)
+init_db_scope(app)
+# Cached GET responses are evicted once a mutation has committed
+init_response_cache(app)
+# Change counters for conditional GETs, bumped inside the request's transaction
+init_etags(app)
 
 # Global activity logging for mutating requests
 @app.before_request
@@ -72,23 +81,8 @@ def _log_activity_after(response):
 # ----- Database bootstrap -----
 
 def ensure_database_exists():
-    dbname = os.getenv("DB_NAME", "myapp")
-    host = os.getenv("DB_HOST", "127.0.0.1")
-    user = os.getenv("DB_USER", "root")
-    password = os.getenv("DB_PASSWORD", "1234")
-    port = int(os.getenv("DB_PORT", "3306"))
-
-    # Connect without DB selected
-    import mysql.connector
-
-    conn = mysql.connector.connect(host=host, user=user, password=password, port=port, autocommit=True)
-    cur = conn.cursor()
-    cur.execute("SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = %s", (dbname,))
-    exists = cur.fetchone()
-    if not exists:
-        cur.execute(f"CREATE DATABASE `{dbname}` CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;")
-    cur.close()
-    conn.close()
+    from migrations import ensure_database
+    ensure_database()
 
 
 def ensure_admin_wizard(force: bool = False, prefer_interactive: bool = False):
@@ -98,8 +92,7 @@ def ensure_admin_wizard(force: bool = False, prefer_interactive: bool = False):
     - Otherwise, create a temporary admin with env/defaults and log the credentials.
     """
     import sys, os
-    # Ensure schema first
-    ensure_employee_schema()
+    # Callers apply the schema first (start_server via migrations, CLI explicitly)
 
     conn = get_connection(database=True)
     cur = conn.cursor()
@@ -270,13 +263,8 @@ def api_logout():
 def api_active_users():
     """Return count of currently active sessions (non-expired tokens)."""
     try:
-        from models.auth_token import cleanup_expired_tokens
         from database import get_connection
-        # Clean up first (non-blocking if fails)
-        try:
-            cleanup_expired_tokens()
-        except Exception:
-            pass
+        # Expired rows are purged by the retention job; just exclude them here
         conn = get_connection(True)
         cur = conn.cursor()
         cur.execute("SELECT COUNT(*) FROM auth_tokens WHERE expires_at > CURRENT_TIMESTAMP")
@@ -287,6 +275,14 @@ def api_active_users():
         return jsonify({"status": "error", "message": str(exc)}), 500
 
 
+@app.get("/api/admin/retention")
+@require_admin
+def api_retention_metrics():
+    """Rows deleted by the retention job in this worker process."""
+    from services.retention import get_retention_metrics
+    return jsonify({"status": "success", "metrics": get_retention_metrics()})
+
+
 # Register blueprints
 app.register_blueprint(bp_employees)
 app.register_blueprint(bp_loans)
@@ -296,6 +292,7 @@ app.register_blueprint(bp_finance)
 app.register_blueprint(bp_attendance)
 app.register_blueprint(bp_branches)
 app.register_blueprint(bp_activity)
+app.register_blueprint(bp_dashboard)
 
 
 # Client-side logs receiver
@@ -319,25 +316,20 @@ def api_client_logs():
 
 def start_server(skip_admin_wizard: bool = True):
     """Initialize database and schemas. In production, skip interactive admin wizard by default."""
-    ensure_database_exists()
-    # Ensure all module schemas
-    ensure_employee_schema()
-    ensure_auth_token_schema()
-    ensure_loan_schema()
-    ensure_loan_buyer_schema()
-    ensure_creditor_schema()
-    ensure_finance_schema()
-    from models.attendance import ensure_attendance_schema
-    ensure_attendance_schema()
-    ensure_activity_schema()
-    # Cleanup logs and expired tokens
-    cleanup_old_logs()
+    # Versioned migrations: a warm start is a single version check
+    from migrations import run_migrations
+    applied = run_migrations()
+    if applied:
+        app.logger.info("Applied %s schema migration(s)", applied)
+    # Heartbeats are buffered in memory; close sessions a crash left open
     try:
-        removed = cleanup_expired_tokens()
-        if removed:
-            app.logger.info("Auth tokens cleanup: removed %s expired tokens", removed)
-    except Exception:
-        pass
+        from services.presence import recover_stale_sessions
+        recover_stale_sessions()
+    except Exception as exc:
+        app.logger.warning("Stale attendance session recovery failed: %s", exc)
+    # Old logs and expired tokens are purged in the background, off the hot path
+    from services.retention import start_retention_scheduler
+    start_retention_scheduler()
     # Avoid interactive prompts in production unless explicitly requested
     if not skip_admin_wizard:
         ensure_admin_wizard()
@@ -409,6 +401,54 @@ def backfill_creditors():
     print(f"Backfill creditors completed. Created={created}, Skipped={skipped}")
 
 
+def rebuild_finance_rollup_cli():
+    """Recompute the Gregorian and Jalali finance rollups from revenues, expenses and paid loan buyers."""
+    ensure_database_exists()
+    ensure_loan_schema()
+    ensure_loan_buyer_schema()
+    ensure_finance_schema()
+    from models.finance import rebuild_finance_rollup
+    written = rebuild_finance_rollup()
+    print(f"Finance rollup rebuilt. Months written={written}")
+
+
+def reconcile_creditors_cli():
+    """Recompute creditors.paid_amount (and settlement status) from their installments."""
+    ensure_database_exists()
+    ensure_creditor_schema()
+    from models.creditor import reconcile_paid_amounts
+    fixed = reconcile_paid_amounts()
+    if fixed:
+        # Let polling clients' ETags for /api/creditors go stale
+        from models.resource_version import bump_versions
+        bump_versions(["creditors"])
+    print(f"Creditor balances reconciled. Rows corrected={fixed}")
+
+
+def repair_attendance_cli(day: str):
+    """Recompute daily attendance rows from sessions for one day (YYYY-MM-DD or 'today')."""
+    ensure_database_exists()
+    from datetime import date
+    from models.attendance import ensure_attendance_schema, repair_daily_rollups
+    ensure_attendance_schema()
+    target = None if day == "today" else date.fromisoformat(day)
+    repaired = repair_daily_rollups(target)
+    print(f"Attendance daily rows repaired. Employees processed={repaired}")
+
+
+def run_retention_once():
+    """Purge old activity logs and expired tokens once (CLI / cron)."""
+    ensure_database_exists()
+    ensure_activity_schema()
+    ensure_auth_token_schema()
+    from services.retention import run_retention
+    result = run_retention()
+    if result is None:
+        print("Retention skipped: another process is already running it.")
+    else:
+        print(f"Retention completed. Activity logs removed={result['activity_logs']}, expired tokens removed={result['auth_tokens']}")
+
+
 def configure_logging():
     logs_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "logs"))
     os.makedirs(logs_dir, exist_ok=True)
@@ -496,6 +536,10 @@ if __name__ == "__main__":
     parser.add_argument("--migrate-passwords", action="store_true", help="Hash existing plain-text passwords with bcrypt")
     parser.add_argument("--backfill-creditors", action="store_true", help="Create creditors for already purchased loans that don't have creditors")
     parser.add_argument("--backfill-creditor-metadata", action="store_true", help="Populate missing creditor metadata from related loans")
+    parser.add_argument("--rebuild-finance-rollup", action="store_true", help="Recompute monthly finance totals from raw ledger tables")
+    parser.add_argument("--reconcile-creditors", action="store_true", help="Recompute creditor paid amounts from installments")
+    parser.add_argument("--repair-attendance", nargs="?", const="today", metavar="YYYY-MM-DD", help="Recompute daily attendance rows from sessions (default today)")
+    parser.add_argument("--run-retention", action="store_true", help="Purge old activity logs and expired tokens once")
     parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
     parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
     parser.add_argument("--debug", action="store_true", help="Enable debug mode (development only)")
@@ -510,6 +554,14 @@ if __name__ == "__main__":
         backfill_creditors()
     elif args.backfill_creditor_metadata:
         backfill_creditor_metadata()
+    elif args.rebuild_finance_rollup:
+        rebuild_finance_rollup_cli()
+    elif args.reconcile_creditors:
+        reconcile_creditors_cli()
+    elif args.repair_attendance:
+        repair_attendance_cli(args.repair_attendance)
+    elif args.run_retention:
+        run_retention_once()
     else:
         # Development runner only; do not use in production
         start_server(skip_admin_wizard=True)
@@ -13,5 +13,3 @@ class Config:
     DB_USER = os.getenv("DB_USER", "root")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "1234")
     DB_NAME = os.getenv("DB_NAME", "myapp")
-
-
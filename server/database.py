@@ -1,12 +1,36 @@
 # -*- coding: utf-8 -*-
+"""MySQL connection helpers.
+
+Connections to the application database are drawn from a process-wide pool so
+that model functions can keep the simple ``conn = get_connection(); ...;
+conn.close()`` pattern without paying a TCP + auth handshake on every call.
+``close()`` on a pooled connection hands it back to the pool instead of
+disconnecting.
+
+Inside a Flask request all calls share one request-bound connection; mutating
+requests run as a single transaction committed after the handler (see
+``init_app``).
+
+Pool tuning (environment variables, per worker process):
+- DB_POOL_SIZE: idle connections kept open (default 5)
+- DB_POOL_MAX_OVERFLOW: extra connections allowed under load (default 10)
+- DB_POOL_TIMEOUT: seconds to wait for a free connection (default 10)
+- DB_POOL_RECYCLE: max lifetime of a connection in seconds (default 1800)
+- DB_POOL_PRE_PING: ping idle connections older than N seconds before reuse (default 30)
+"""
 import os
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+
 import mysql.connector
 
+log = logging.getLogger(__name__)
 
-def get_connection(database: bool = True):
-    """Create a MySQL connection. If database=False, connects without selecting a DB.
-    Ensures UTF-8 settings after connect.
-    """
+
+def _connect_kwargs(database: bool = True) -> dict:
     host = os.getenv("DB_HOST", "127.0.0.1")
     port = int(os.getenv("DB_PORT", "3306"))
     user = os.getenv("DB_USER", "root")
@@ -16,8 +40,14 @@ def get_connection(database: bool = True):
     kwargs = dict(host=host, port=port, user=user, password=password, autocommit=True)
     if database:
         kwargs["database"] = dbname
+        # Buffered cursors let nested model calls share one connection safely
+        kwargs["buffered"] = True
+    return kwargs
+
 
-    conn = mysql.connector.connect(**kwargs)
+def _open_raw_connection(database: bool = True):
+    """Open a new physical connection and apply UTF-8 session settings."""
+    conn = mysql.connector.connect(**_connect_kwargs(database))
     try:
         cur = conn.cursor()
         # Ensure proper charset/collation after connect
@@ -25,4 +55,321 @@ def get_connection(database: bool = True):
         cur.close()
     except Exception:
         pass
-    return conn
\ No newline at end of file
+    return conn
+
+
+class PoolTimeoutError(mysql.connector.errors.PoolError):
+    """Raised when no connection becomes available within DB_POOL_TIMEOUT."""
+
+
+class PooledConnection:
+    """Thin proxy around a pooled mysql connection.
+
+    Everything is delegated to the underlying connection except ``close()``,
+    which returns the connection to its pool. Closing twice is a no-op.
+    A connection that is garbage-collected without ``close()`` (e.g. a helper
+    raised before reaching it) is discarded and its pool slot freed.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw, created_at: float):
+        self._pool = pool
+        # Shared with the finalizer, which must not reference self
+        self._slot = [raw]
+        self._created_at = created_at
+        self._finalizer = weakref.finalize(self, pool._reclaim, self._slot)
+        self._finalizer.atexit = False
+
+    def __getattr__(self, name):
+        slot = self.__dict__.get("_slot")
+        raw = slot[0] if slot else None
+        if raw is None:
+            raise mysql.connector.errors.OperationalError("Connection already returned to the pool")
+        return getattr(raw, name)
+
+    def close(self):
+        raw, self._slot[0] = self._slot[0], None
+        self._finalizer.detach()
+        if raw is not None:
+            self._pool._release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections.
+
+    - Keeps up to ``size`` idle connections; up to ``size + max_overflow`` may be
+      checked out at once, further callers wait up to ``timeout`` seconds.
+    - Connections older than ``recycle`` seconds are discarded on check-in/out.
+    - Connections idle for more than ``pre_ping`` seconds are pinged before reuse
+      and transparently replaced if the server dropped them.
+    """
+
+    def __init__(self, size: int = 5, max_overflow: int = 10, timeout: float = 10.0,
+                 recycle: float = 1800.0, pre_ping: float = 30.0):
+        self.size = max(int(size), 1)
+        self.max_overflow = max(int(max_overflow), 0)
+        self.timeout = float(timeout)
+        self.recycle = float(recycle)
+        self.pre_ping = float(pre_ping)
+        self.pid = os.getpid()
+        # idle entries: (raw_conn, created_at, returned_at)
+        self._idle = deque()
+        self._checked_out = 0
+        # Reentrant: a finalizer (see _reclaim) may run while this thread holds it
+        self._cond = threading.Condition(threading.RLock())
+
+    @classmethod
+    def from_env(cls) -> "ConnectionPool":
+        return cls(
+            size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            recycle=float(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pre_ping=float(os.getenv("DB_POOL_PRE_PING", "30")),
+        )
+
+    # ----- checkout / checkin -----
+
+    def connect(self) -> PooledConnection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, created_at, returned_at = self._idle.pop()
+                    self._checked_out += 1
+                    break
+                if self._checked_out < self.size + self.max_overflow:
+                    raw, created_at, returned_at = None, None, None
+                    self._checked_out += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No database connection available within {self.timeout:.0f}s "
+                        f"(pool size={self.size}, overflow={self.max_overflow})"
+                    )
+                self._cond.wait(remaining)
+
+        # Network I/O happens outside the lock
+        try:
+            now = time.monotonic()
+            if raw is not None and not self._is_usable(raw, created_at, returned_at, now):
+                self._discard(raw)
+                raw = None
+            if raw is None:
+                raw = _open_raw_connection(True)
+                created_at = now
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def _is_usable(self, raw, created_at: float, returned_at: float, now: float) -> bool:
+        if self.recycle > 0 and now - created_at > self.recycle:
+            return False
+        if self.pre_ping >= 0 and now - returned_at > self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _release(self, raw, created_at: float) -> None:
+        keep = True
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if raw.unread_result:
+                raw.consume_results()
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            keep = False
+        now = time.monotonic()
+        if self.recycle > 0 and now - created_at > self.recycle:
+            keep = False
+        with self._cond:
+            self._checked_out -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append((raw, created_at, now))
+                raw = None
+            self._cond.notify()
+        if raw is not None:
+            self._discard(raw)
+
+    def _reclaim(self, slot: list) -> None:
+        """Finalizer of a PooledConnection that was never closed."""
+        raw, slot[0] = slot[0], None
+        if raw is None:
+            return
+        log.warning("Database connection was not closed; discarding it")
+        with self._cond:
+            self._checked_out -= 1
+            self._cond.notify()
+        self._discard(raw)
+
+    @staticmethod
+    def _discard(raw) -> None:
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def dispose(self) -> None:
+        """Close all idle connections (checked-out ones close on return)."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "idle": len(self._idle),
+                "checked_out": self._checked_out,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it lazily.
+
+    A fresh pool is created after fork (e.g. gunicorn --preload) so that worker
+    processes never share sockets with their parent.
+    """
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool.from_env()
+        return _pool
+
+
+# ----- Request-scoped unit of work -----
+
+_MUTATING_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class RequestConnection:
+    """View of the request's pooled connection handed to model code.
+
+    ``commit()`` and ``close()`` are no-ops: the unit of work is committed (or
+    rolled back) once per request by the hooks installed with ``init_app``.
+    """
+
+    def __init__(self, conn: PooledConnection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["_conn"], name)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+def _request_connection():
+    """Return the connection bound to the current Flask request, if any."""
+    try:
+        from flask import g, has_request_context, request
+    except Exception:
+        return None
+    if not has_request_context():
+        return None
+    conn = g.get("_db_conn")
+    if conn is None:
+        pooled = get_pool().connect()
+        try:
+            # Reads stay in autocommit mode; mutations run as one transaction
+            if request.method in _MUTATING_METHODS:
+                pooled.start_transaction()
+        except Exception:
+            pooled.close()
+            raise
+        conn = RequestConnection(pooled)
+        g._db_conn = conn
+    return conn
+
+
+def finish_request_connection(commit: bool) -> None:
+    """Commit or roll back the request's unit of work and return its connection."""
+    from flask import g
+    conn = g.pop("_db_conn", None)
+    if conn is None:
+        return
+    pooled = conn._conn
+    try:
+        if pooled.in_transaction:
+            if commit:
+                pooled.commit()
+            else:
+                pooled.rollback()
+    finally:
+        pooled.close()
+
+
+def init_app(app) -> None:
+    """Install the request-scoped connection hooks on a Flask app.
+
+    Register this before other after_request hooks so the commit runs last and
+    a failed commit can still turn the response into an error.
+    """
+    from flask import jsonify
+
+    @app.after_request
+    def _commit_request_connection(response):
+        try:
+            # Error responses (4xx included) may follow partial writes: roll them back
+            finish_request_connection(commit=response.status_code < 400)
+        except Exception as exc:
+            app.logger.exception("Commit failed: %s", exc)
+            return jsonify({"status": "error", "message": "Database error"}), 500
+        return response
+
+    @app.teardown_request
+    def _release_request_connection(exc):
+        # Only reached with a live connection when after_request did not run
+        try:
+            finish_request_connection(commit=False)
+        except Exception:
+            pass
+
+
+def get_connection(database: bool = True, scoped: bool = True):
+    """Return a MySQL connection. If database=False, connects without selecting a DB.
+
+    Connections with the database selected come from the process-wide pool;
+    calling ``close()`` returns them to the pool. Server-level connections
+    (database=False) are rare bootstrap operations and are opened directly.
+
+    Inside a Flask request (and unless scoped=False) every call returns the same
+    request-bound connection, so a handler uses one connection and one commit.
+    """
+    if not database:
+        return _open_raw_connection(False)
+    if scoped:
+        conn = _request_connection()
+        if conn is not None:
+            return conn
+    return get_pool().connect()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""Versioned schema migrations.
+
+Applied steps are recorded in ``schema_migrations``; a warm start is a single
+``SELECT MAX(version)`` and only steps above it run. Steps must be idempotent:
+databases created before this registry existed start at version 0 and replay
+every step, and the baseline steps are the original ``ensure_*_schema``
+functions, which already tolerate existing tables and columns.
+
+Add new schema changes as new steps at the end of ``MIGRATIONS``; never
+renumber or edit a released step.
+"""
+from __future__ import annotations
+from typing import Callable, List, Tuple
+import logging
+import os
+
+from database import get_connection
+
+log = logging.getLogger(__name__)
+
+# Named MySQL lock so concurrent workers do not migrate at the same time
+_LOCK_NAME = "phonix_schema_migrations"
+_LOCK_TIMEOUT = 120
+
+# MySQL error codes
+_ER_BAD_DB = 1049
+_ER_NO_SUCH_TABLE = 1146
+
+
+def _employees():
+    from models.employee import ensure_employee_schema
+    ensure_employee_schema()
+
+
+def _branches():
+    from models.branch import ensure_branch_schema
+    ensure_branch_schema()
+
+
+def _auth_tokens():
+    from models.auth_token import ensure_auth_token_schema
+    ensure_auth_token_schema()
+
+
+def _loans():
+    from models.loan import ensure_loan_schema
+    ensure_loan_schema()
+
+
+def _loan_buyers():
+    from models.loan_buyer import ensure_loan_buyer_schema
+    ensure_loan_buyer_schema()
+
+
+def _creditors():
+    from models.creditor import ensure_creditor_schema
+    ensure_creditor_schema()
+
+
+def _finance():
+    from models.finance import ensure_finance_schema
+    ensure_finance_schema()
+
+
+def _attendance():
+    from models.attendance import ensure_attendance_schema
+    ensure_attendance_schema()
+
+
+def _activity_logs():
+    from models.activity import ensure_activity_schema
+    ensure_activity_schema()
+
+
+def _loan_list_indexes():
+    from models.loan import ensure_loan_list_indexes
+    ensure_loan_list_indexes()
+
+
+def _resource_versions():
+    from models.resource_version import ensure_resource_version_schema
+    ensure_resource_version_schema()
+
+
+def _branch_updated_at():
+    from models.branch import ensure_branch_updated_at
+    ensure_branch_updated_at()
+
+
+def _change_feed_indexes():
+    from models.change_feed import ensure_change_feed_indexes
+    ensure_change_feed_indexes()
+
+
+def _tombstones():
+    from models.change_feed import ensure_tombstone_schema
+    ensure_tombstone_schema()
+
+
+# (version, name, step) in application order
+MIGRATIONS: List[Tuple[int, str, Callable[[], None]]] = [
+    (1, "employees", _employees),
+    (2, "branches", _branches),
+    (3, "auth_tokens", _auth_tokens),
+    (4, "loans", _loans),
+    (5, "loan_buyers", _loan_buyers),
+    (6, "creditors", _creditors),
+    (7, "finance", _finance),
+    (8, "attendance", _attendance),
+    (9, "activity_logs", _activity_logs),
+    (10, "loan_list_indexes", _loan_list_indexes),
+    (11, "resource_versions", _resource_versions),
+    (12, "branch_updated_at", _branch_updated_at),
+    (13, "change_feed_indexes", _change_feed_indexes),
+    (14, "tombstones", _tombstones),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def ensure_database() -> None:
+    """Create the application database if it does not exist yet."""
+    dbname = os.getenv("DB_NAME", "myapp")
+    conn = get_connection(False)
+    cur = conn.cursor()
+    cur.execute("SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = %s", (dbname,))
+    exists = cur.fetchone()
+    if not exists:
+        cur.execute(f"CREATE DATABASE `{dbname}` CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;")
+    cur.close()
+    conn.close()
+
+
+def _ensure_registry(cur) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+        """
+    )
+
+
+def current_version() -> int:
+    """Highest applied version; 0 for a database without the registry.
+    Creates the database when it is missing.
+    """
+    try:
+        conn = get_connection(True, scoped=False)
+    except Exception as exc:
+        if getattr(exc, "errno", None) != _ER_BAD_DB:
+            raise
+        ensure_database()
+        return 0
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        return int(cur.fetchone()[0] or 0)
+    except Exception as exc:
+        if getattr(exc, "errno", None) == _ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    finally:
+        cur.close(); conn.close()
+
+
+def run_migrations() -> int:
+    """Apply pending steps; returns how many ran (0 on a warm start)."""
+    version = current_version()
+    if version >= LATEST_VERSION:
+        if version > LATEST_VERSION:
+            log.warning("Database schema version %s is newer than this code (%s)", version, LATEST_VERSION)
+        return 0
+
+    conn = get_connection(True, scoped=False)
+    cur = conn.cursor()
+    applied = 0
+    try:
+        cur.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NAME, _LOCK_TIMEOUT))
+        row = cur.fetchone()
+        if not row or int(row[0] or 0) != 1:
+            raise RuntimeError("Timed out waiting for the schema migration lock")
+        try:
+            _ensure_registry(cur)
+            # Another worker may have migrated while we waited for the lock
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+            version = int(cur.fetchone()[0] or 0)
+            for step_version, name, step in MIGRATIONS:
+                if step_version <= version:
+                    continue
+                log.info("Applying schema migration %s (%s)", step_version, name)
+                step()
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s,%s)",
+                    (step_version, name),
+                )
+                conn.commit()
+                applied += 1
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+            cur.fetchone()
+    finally:
+        cur.close(); conn.close()
+    return applied
@@ -2,12 +2,39 @@
 """Activity logging model.
 - Persistent storage of user actions with status and details
 - Query with filters (by user, date range)
-- Auto-cleanup rows older than 30 days
+- Rows older than LOG_RETENTION_DAYS are purged in chunks by the retention
+  job (services/retention.py), never on the insert path
+- Writes are queued and flushed in batches by a background thread so logging
+  stays off the response path (ACTIVITY_LOG_ASYNC=0 restores direct inserts)
 """
 from __future__ import annotations
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, date, timedelta
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
 from database import get_connection
+from utils.list_query import ListQuery, fetch_page
+
+log = logging.getLogger(__name__)
+
+ACTIVITY_LOG_ASYNC = os.getenv("ACTIVITY_LOG_ASYNC", "1").lower() in ("1", "true", "yes", "on")
+# Seconds between batched flushes
+FLUSH_INTERVAL = float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL", "0.25"))
+# Bounded queue; when full, producers wait ENQUEUE_TIMEOUT then drop the row
+QUEUE_SIZE = int(os.getenv("ACTIVITY_LOG_QUEUE_SIZE", "10000"))
+ENQUEUE_TIMEOUT = float(os.getenv("ACTIVITY_LOG_ENQUEUE_TIMEOUT", "0.05"))
+MAX_BATCH = 500
+
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+
+_INSERT_SQL = """
+        INSERT INTO activity_logs (user_id, user_name, action, details, status)
+        VALUES (%s,%s,%s,%s,%s)
+        """
 
 
 def ensure_activity_schema():
@@ -31,30 +58,171 @@ def ensure_activity_schema():
     conn.commit(); cur.close(); conn.close()
 
 
-def cleanup_old_logs():
-    """Delete logs older than 30 days."""
+def cleanup_old_logs(days: int = LOG_RETENTION_DAYS, batch_size: int = 1000, pause: float = 0.0) -> int:
+    """Delete logs older than `days` in chunks of `batch_size`; returns rows removed.
+
+    Each chunk is its own short statement so row locks are never held long.
+    """
+    removed = 0
     conn = get_connection(True)
     cur = conn.cursor()
-    cur.execute("DELETE FROM activity_logs WHERE created_at < (NOW() - INTERVAL 30 DAY)")
-    conn.commit(); cur.close(); conn.close()
+    try:
+        while True:
+            cur.execute(
+                "DELETE FROM activity_logs WHERE created_at < (NOW() - INTERVAL %s DAY) ORDER BY created_at LIMIT %s",
+                (int(days), int(batch_size)),
+            )
+            affected = cur.rowcount or 0
+            conn.commit()
+            removed += affected
+            if affected < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        cur.close(); conn.close()
+    return removed
+
+
+class ActivityLogWriter:
+    """Background writer: bounded queue + worker thread doing multi-row INSERTs."""
+
+    _STOP = object()
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, maxsize: int = QUEUE_SIZE,
+                 enqueue_timeout: float = ENQUEUE_TIMEOUT):
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.pid = os.getpid()
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: Tuple) -> bool:
+        """Queue a row; returns False if it was dropped because the queue stayed full."""
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                log.warning("Activity log queue full; dropped %s row(s) so far", self.dropped)
+            return False
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush pending rows and stop the worker."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get()
+            except Exception:
+                continue
+            batch: List[Tuple] = []
+            if item is self._STOP:
+                stopping = True
+            else:
+                batch.append(item)
+            # Collect whatever arrives within the flush window
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < MAX_BATCH:
+                remaining = 0 if stopping else deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    continue
+                batch.append(item)
+            if batch:
+                self._write(batch)
+            if stopping and not self._queue.empty():
+                # Batch limit reached while draining: keep going until empty
+                stopping = False
+                try:
+                    self._queue.put_nowait(self._STOP)
+                except queue.Full:
+                    pass
+
+    def _write(self, batch: List[Tuple]) -> None:
+        for attempt in range(2):
+            try:
+                conn = get_connection(True, scoped=False)
+            except Exception as exc:
+                error = exc
+                continue
+            try:
+                cur = conn.cursor()
+                # mysql-connector rewrites executemany INSERTs into one multi-row INSERT
+                cur.executemany(_INSERT_SQL, batch)
+                conn.commit(); cur.close()
+                self.written += len(batch)
+                return
+            except Exception as exc:
+                error = exc
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            finally:
+                conn.close()
+        self.dropped += len(batch)
+        log.error("Failed to write %s activity log row(s): %s", len(batch), error)
+
+
+_writer: Optional[ActivityLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> ActivityLogWriter:
+    global _writer
+    w = _writer
+    if w is not None and w.pid == os.getpid():
+        return w
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = ActivityLogWriter()
+        return _writer
+
+
+def flush_activity_logs(timeout: float = 5.0) -> None:
+    """Flush queued log rows and stop the writer (called at interpreter exit)."""
+    global _writer
+    with _writer_lock:
+        w, _writer = _writer, None
+    if w is not None and w.pid == os.getpid():
+        w.close(timeout)
+
+
+atexit.register(flush_activity_logs)
 
 
 def add_log(user_id: Optional[int], user_name: Optional[str], action: str, details: Optional[str], status: str = "success") -> int:
-    conn = get_connection(True)
+    """Record an activity row.
+
+    Returns the new row id for direct inserts, or 0 when the row was queued for
+    the background writer.
+    """
+    row = (user_id, user_name, action[:191], details, status)
+    if ACTIVITY_LOG_ASYNC:
+        _get_writer().submit(row)
+        return 0
+    # Own connection: log rows must survive a rolled-back request transaction
+    conn = get_connection(True, scoped=False)
     cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO activity_logs (user_id, user_name, action, details, status)
-        VALUES (%s,%s,%s,%s,%s)
-        """,
-        (user_id, user_name, action[:191], details, status),
-    )
+    cur.execute(_INSERT_SQL, row)
     new_id = cur.lastrowid
-    # Auto cleanup opportunistically
-    try:
-        cur2 = conn.cursor(); cur2.execute("DELETE FROM activity_logs WHERE created_at < (NOW() - INTERVAL 30 DAY)"); cur2.close()
-    except Exception:
-        pass
     conn.commit(); cur.close(); conn.close()
     return new_id
 
@@ -87,5 +255,36 @@ def list_logs(user_id: Optional[int] = None, date_from: Optional[date] = None, d
     return [dict(zip(cols, r)) for r in rows]
 
 
+# Public sort names for paged listings -> SQL key expression
+ACTIVITY_SORT_FIELDS = {
+    "created_at": "created_at",
+    "action": "action",
+    "user_name": "COALESCE(user_name, '')",
+    "status": "CAST(status AS CHAR)",
+}
+ACTIVITY_SEARCH_COLUMNS = ("user_name", "action", "details")
+
+
+def list_logs_page(query: ListQuery, user_id: Optional[int] = None, date_from: Optional[date] = None,
+                   date_to: Optional[date] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One keyset page of activity logs; returns (items, next_cursor)."""
+    where: List[str] = []
+    params: List[Any] = []
+    if user_id:
+        where.append("user_id=%s"); params.append(user_id)
+    if date_from:
+        where.append("created_at >= %s"); params.append(datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        where.append("created_at <= %s"); params.append(datetime.combine(date_to, datetime.max.time()))
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        return fetch_page(cur, "activity_logs", ["id", "created_at", "user_name", "action", "details", "status"],
+                          query, ACTIVITY_SORT_FIELDS, search_columns=ACTIVITY_SEARCH_COLUMNS,
+                          where=where, params=params)
+    finally:
+        cur.close(); conn.close()
+
+
 def list_recent(limit: int = 10) -> List[Dict[str, Any]]:
     return list_logs(limit=limit)
\ No newline at end of file
@@ -109,17 +109,12 @@ def _serialize_time(t: Optional[Any]) -> Optional[str]:
 def _ensure_daily_row(conn, employee_id: int, day: date) -> None:
     """Ensure a daily summary row exists; create as 'present' when first seen."""
     cur = conn.cursor()
+    # uniq_emp_date makes this a no-op when the row is already there
     cur.execute(
-        "SELECT id FROM attendance WHERE employee_id=%s AND date=%s",
+        "INSERT IGNORE INTO attendance (employee_id, date, status) VALUES (%s,%s,'present')",
         (employee_id, day),
     )
-    row = cur.fetchone()
-    if not row:
-        cur.execute(
-            "INSERT INTO attendance (employee_id, date, status) VALUES (%s,%s,'present')",
-            (employee_id, day),
-        )
-        conn.commit()
+    conn.commit()
     cur.close()
 
 
@@ -233,39 +228,186 @@ def check_out(employee_id: int, day: Optional[date] = None, t: Optional[time] =
     return sid
 
 
-def heartbeat(employee_id: int, day: Optional[date] = None) -> None:
+def _extend_daily_rollup(conn, employee_id: int, day: date, delta_seconds: int) -> bool:
+    """Advance the daily row by the time an open session gained since its last touch.
+    Returns False when there is no daily row to extend (caller should recompute).
+    """
+    cur = conn.cursor()
+    cur.execute(
+        """
+        UPDATE attendance
+        SET total_seconds = total_seconds + %s,
+            check_out = GREATEST(COALESCE(check_out, TIME(CURRENT_TIMESTAMP)), TIME(CURRENT_TIMESTAMP)),
+            status = 'present'
+        WHERE employee_id=%s AND date=%s
+        """,
+        (max(int(delta_seconds or 0), 0), employee_id, day),
+    )
+    extended = cur.rowcount > 0
+    conn.commit(); cur.close()
+    return extended
+
+
+def repair_daily_rollups(day: Optional[date] = None) -> int:
+    """Recompute the daily rows of every employee with sessions on `day` (default today).
+    Returns the number of employees processed.
+    """
+    day = day or _def_today()
+    conn = get_connection(True)
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT employee_id FROM attendance_sessions WHERE date=%s", (day,))
+    employee_ids = [int(r[0]) for r in cur.fetchall()]
+    cur.close()
+    for emp_id in employee_ids:
+        _recompute_daily_rollup(conn, emp_id, day)
+    conn.close()
+    return len(employee_ids)
+
+
+def heartbeat(employee_id: int, day: Optional[date] = None) -> Optional[int]:
     """Update or create today's open session for crash-safe tracking.
-    - If an open session exists for today: touch updated_at to now
-    - Else: auto check-in to start a session
-    Then recompute the daily rollup.
+    - If an open session exists for today: touch updated_at to now and extend the
+      daily rollup by the seconds elapsed since the previous touch
+    - Else: auto check-in to start a session (check_in recomputes the rollup)
+    Returns the open session id (None if check-in failed).
     """
     day = day or _def_today()
     conn = get_connection(True)
     cur = conn.cursor()
     cur.execute(
         """
-        SELECT id FROM attendance_sessions
+        SELECT id, GREATEST(TIMESTAMPDIFF(SECOND, updated_at, CURRENT_TIMESTAMP), 0)
+        FROM attendance_sessions
         WHERE employee_id=%s AND date=%s AND check_out IS NULL
         ORDER BY id DESC LIMIT 1
+        FOR UPDATE
         """,
         (employee_id, day),
     )
     row = cur.fetchone()
+    sid = None
     if row:
-        sid = int(row[0])
-        try:
-            cur2 = conn.cursor(); cur2.execute("UPDATE attendance_sessions SET updated_at=CURRENT_TIMESTAMP WHERE id=%s", (sid,)); conn.commit(); cur2.close()
-        except Exception:
-            pass
+        sid, delta = int(row[0]), int(row[1] or 0)
+        cur.execute("UPDATE attendance_sessions SET updated_at=CURRENT_TIMESTAMP WHERE id=%s", (sid,))
+        conn.commit()
+        if not _extend_daily_rollup(conn, employee_id, day, delta):
+            _recompute_daily_rollup(conn, employee_id, day)
     else:
         try:
             # Start a session automatically
-            check_in(employee_id, day=day)
+            sid = check_in(employee_id, day=day)
         except Exception:
             pass
-    # Recompute rollup
-    _recompute_daily_rollup(conn, employee_id, day)
     cur.close(); conn.close()
+    return sid
+
+
+def flush_presence(seen: Dict[int, datetime]) -> List[int]:
+    """Persist buffered heartbeats in one transaction: {session_id: last_seen}.
+    Moves each still-open session's updated_at forward to last_seen and adds the
+    gained seconds to the daily rows, using one statement per table. Returns the
+    ids of sessions that are no longer open (closed elsewhere or deleted).
+    """
+    if not seen:
+        return []
+    ids = list(seen.keys())
+    marks = ",".join(["%s"] * len(ids))
+    conn = get_connection(True, scoped=False)
+    cur = conn.cursor()
+    try:
+        conn.start_transaction()
+        cur.execute(
+            f"""
+            SELECT id, employee_id, date, updated_at FROM attendance_sessions
+            WHERE id IN ({marks}) AND check_out IS NULL
+            FOR UPDATE
+            """,
+            tuple(ids),
+        )
+        rows = cur.fetchall()
+        open_ids = set()
+        touched: List[Tuple[int, datetime]] = []
+        gained: Dict[Tuple[int, date], List[Any]] = {}
+        for sid, emp_id, day, updated_at in rows:
+            sid = int(sid)
+            open_ids.add(sid)
+            last_seen = seen[sid]
+            # Another worker may already have written a later heartbeat
+            if updated_at is not None and last_seen <= updated_at:
+                continue
+            delta = int((last_seen - updated_at).total_seconds()) if updated_at is not None else 0
+            touched.append((sid, last_seen))
+            key = (int(emp_id), day)
+            acc = gained.setdefault(key, [0, last_seen.time().replace(microsecond=0)])
+            acc[0] += max(delta, 0)
+            acc[1] = max(acc[1], last_seen.time().replace(microsecond=0))
+        if touched:
+            cases = " ".join(["WHEN %s THEN %s"] * len(touched))
+            params: List[Any] = []
+            for sid, last_seen in touched:
+                params += [sid, last_seen]
+            params += [sid for sid, _ in touched]
+            cur.execute(
+                f"UPDATE attendance_sessions SET updated_at = CASE id {cases} END "
+                f"WHERE id IN ({','.join(['%s'] * len(touched))})",
+                tuple(params),
+            )
+            values, params = [], []
+            for (emp_id, day), (delta, last_out) in gained.items():
+                values.append("(%s,%s,'present',%s,%s)")
+                params += [emp_id, day, delta, last_out]
+            cur.execute(
+                f"""
+                INSERT INTO attendance (employee_id, date, status, total_seconds, check_out)
+                VALUES {','.join(values)}
+                ON DUPLICATE KEY UPDATE
+                    total_seconds = total_seconds + VALUES(total_seconds),
+                    check_out = GREATEST(COALESCE(check_out, VALUES(check_out)), VALUES(check_out)),
+                    status = 'present'
+                """,
+                tuple(params),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close(); conn.close()
+    return [sid for sid in ids if sid not in open_ids]
+
+
+def close_stale_sessions(max_idle_minutes: float) -> int:
+    """Close open sessions not touched for `max_idle_minutes` at their last-seen time
+    (e.g. after a server crash dropped buffered heartbeats) and recompute the
+    affected daily rows. Returns the number of sessions closed.
+    """
+    conn = get_connection(True, scoped=False)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, employee_id, date FROM attendance_sessions
+        WHERE check_out IS NULL AND updated_at < NOW() - INTERVAL %s SECOND
+        """,
+        (int(max_idle_minutes * 60),),
+    )
+    rows = cur.fetchall()
+    if rows:
+        ids = [int(r[0]) for r in rows]
+        # updated_at=updated_at keeps the ON UPDATE clause from moving the last-seen mark
+        cur.execute(
+            f"""
+            UPDATE attendance_sessions
+            SET check_out = IF(DATE(updated_at) > date, '23:59:59', GREATEST(TIME(updated_at), check_in)),
+                updated_at = updated_at
+            WHERE id IN ({','.join(['%s'] * len(ids))})
+            """,
+            tuple(ids),
+        )
+        conn.commit()
+        for emp_id, day in {(int(r[1]), r[2]) for r in rows}:
+            _recompute_daily_rollup(conn, emp_id, day)
+    cur.close(); conn.close()
+    return len(rows)
 
 
 def list_attendance(employee_id: int) -> List[dict]:
@@ -294,6 +436,23 @@ def list_attendance(employee_id: int) -> List[dict]:
     return items
 
 
+def attendance_changes(since, limit: int, cursor=None, employee_id: Optional[int] = None) -> Dict[str, Any]:
+    """One page of the attendance change feed (see models.change_feed),
+    optionally limited to one employee's rows."""
+    from models.change_feed import list_changes
+    where, params = (["employee_id=%s"], [employee_id]) if employee_id else ([], [])
+    page = list_changes(
+        "attendance", ["id", "employee_id", "date", "check_in", "check_out", "status", "total_seconds", "notes"],
+        since, limit, cursor=cursor, where=where, params=params,
+    )
+    for d in page["items"]:
+        d["date"] = _serialize_date(d.get("date"))
+        d["check_in"] = _serialize_time(d.get("check_in"))
+        d["check_out"] = _serialize_time(d.get("check_out"))
+        d["total_seconds"] = int(d.get("total_seconds") or 0)
+    return page
+
+
 def list_attendance_admin(
     employee_id: Optional[int] = None,
     date_from: Optional[date] = None,
@@ -2,10 +2,16 @@
 """DB-backed auth tokens with TTL and sliding expiration.
 - Tokens are stored in MySQL with expires_at
 - Each valid use extends expiry (sliding expiration)
+- Validated tokens are cached in-process (bounded LRU with a short TTL); the
+  sliding extension is written back at most once per EXTEND_WRITE_INTERVAL
 """
 from __future__ import annotations
 from typing import Optional, Dict
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import os
+import threading
+import time
 import uuid
 
 from database import get_connection
@@ -13,6 +19,16 @@ from database import get_connection
 # Default TTL in minutes
 DEFAULT_TTL_MINUTES = 60
 
+# Token cache (per worker process). A revoked token stays valid in *other*
+# workers for at most TOKEN_CACHE_TTL_SECONDS.
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "2048"))
+# Persist sliding expiry at most once per N minutes per token (must be < TTL)
+EXTEND_WRITE_INTERVAL = timedelta(minutes=int(os.getenv("AUTH_TOKEN_EXTEND_INTERVAL", "5")))
+
+_cache: "OrderedDict[str, dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
 
 def ensure_auth_token_schema() -> None:
     """Create auth_tokens table if not exists."""
@@ -45,9 +61,76 @@ def _new_token() -> str:
     return uuid.uuid4().hex + uuid.uuid4().hex[:32]
 
 
+# ----- Token cache -----
+
+def _cache_get(token: str) -> Optional[dict]:
+    with _cache_lock:
+        entry = _cache.get(token)
+        if entry is None:
+            return None
+        if time.monotonic() - entry["cached_at"] > TOKEN_CACHE_TTL_SECONDS:
+            del _cache[token]
+            return None
+        _cache.move_to_end(token)
+        # A snapshot: the live entry is only changed under the lock
+        return dict(entry)
+
+
+def _cache_put(token: str, user: Dict, expires_at: datetime, persisted_expires_at: datetime) -> None:
+    with _cache_lock:
+        _cache[token] = {
+            "user": user,
+            "expires_at": expires_at,
+            "persisted_expires_at": persisted_expires_at,
+            "cached_at": time.monotonic(),
+        }
+        _cache.move_to_end(token)
+        while len(_cache) > TOKEN_CACHE_MAX_SIZE:
+            _cache.popitem(last=False)
+
+
+def _cache_extend(token: str, new_exp: datetime) -> Optional[datetime]:
+    """Slide a cached entry's expiry under the lock. When the stored expiry is
+    due for a write, claims it for this caller and returns the previous value
+    (to restore if the write fails); otherwise returns None."""
+    with _cache_lock:
+        entry = _cache.get(token)
+        if entry is None:
+            return None
+        entry["expires_at"] = max(entry["expires_at"], new_exp)
+        previous = entry["persisted_expires_at"]
+        if new_exp - previous < EXTEND_WRITE_INTERVAL:
+            return None
+        entry["persisted_expires_at"] = new_exp
+        return previous
+
+
+def _cache_unclaim(token: str, claimed: datetime, previous: datetime) -> None:
+    with _cache_lock:
+        entry = _cache.get(token)
+        if entry is not None and entry["persisted_expires_at"] == claimed:
+            entry["persisted_expires_at"] = previous
+
+
+def invalidate_cached_token(token: str) -> None:
+    with _cache_lock:
+        _cache.pop(token, None)
+
+
+def _persist_expiry(token: str, expires_at: datetime) -> bool:
+    try:
+        conn = get_connection(True)
+        cur = conn.cursor()
+        cur.execute("UPDATE auth_tokens SET expires_at=%s WHERE token=%s", (expires_at, token))
+        conn.commit(); cur.close(); conn.close()
+        return True
+    except Exception:
+        # Non-fatal: if extend fails, still return current user
+        return False
+
+
 def issue_db_token(user: dict, ttl_minutes: int = DEFAULT_TTL_MINUTES) -> str:
     """Create and persist a token for the given user, returning the token string."""
-    ensure_auth_token_schema()  # defensive ensure
     token = _new_token()[:64]
     expires_at = _now() + timedelta(minutes=int(ttl_minutes or DEFAULT_TTL_MINUTES))
     conn = get_connection(True)
@@ -67,14 +150,42 @@ def issue_db_token(user: dict, ttl_minutes: int = DEFAULT_TTL_MINUTES) -> str:
         ),
     )
     conn.commit(); cur.close(); conn.close()
+    _cache_put(
+        token,
+        {
+            "user_id": user.get("id"),
+            "national_id": user.get("national_id"),
+            "full_name": user.get("full_name"),
+            "role": user.get("role") or "user",
+        },
+        expires_at,
+        expires_at,
+    )
     return token
 
 
 def get_user_by_token(token: str, sliding_extend: bool = True, ttl_minutes: int = DEFAULT_TTL_MINUTES) -> Optional[Dict]:
-    """Return user payload for a valid token, optionally extending expiry (sliding)."""
+    """Return user payload for a valid token, optionally extending expiry (sliding).
+
+    Served from the in-process cache when possible; the new expiry is only
+    written to MySQL once it is EXTEND_WRITE_INTERVAL ahead of the stored one.
+    """
     if not token:
         return None
     now = _now()
+    ttl = timedelta(minutes=int(ttl_minutes or DEFAULT_TTL_MINUTES))
+
+    entry = _cache_get(token)
+    if entry is not None and entry["expires_at"] > now:
+        user = dict(entry["user"])
+        if sliding_extend:
+            new_exp = now + ttl
+            previous = _cache_extend(token, new_exp)
+            # Only the request that claimed the write persists it
+            if previous is not None and not _persist_expiry(token, new_exp):
+                _cache_unclaim(token, new_exp, previous)
+        return user
+
     conn = get_connection(True)
     cur = conn.cursor()
     cur.execute(
@@ -87,8 +198,9 @@ def get_user_by_token(token: str, sliding_extend: bool = True, ttl_minutes: int
         (token, now),
     )
     row = cur.fetchone()
+    cur.close(); conn.close()
     if not row:
-        cur.close(); conn.close()
+        invalidate_cached_token(token)
         return None
 
     user = {
@@ -98,34 +210,46 @@ def get_user_by_token(token: str, sliding_extend: bool = True, ttl_minutes: int
         "role": row[3],
     }
 
+    persisted_exp = row[4]
+    expires_at = persisted_exp
     if sliding_extend:
-        new_exp = now + timedelta(minutes=int(ttl_minutes or DEFAULT_TTL_MINUTES))
-        try:
-            cur2 = conn.cursor()
-            cur2.execute("UPDATE auth_tokens SET expires_at=%s WHERE token=%s", (new_exp, token))
-            conn.commit(); cur2.close()
-        except Exception:
-            # Non-fatal: if extend fails, still return current user
-            pass
+        expires_at = now + ttl
+        if expires_at - persisted_exp >= EXTEND_WRITE_INTERVAL:
+            if _persist_expiry(token, expires_at):
+                persisted_exp = expires_at
 
-    cur.close(); conn.close()
-    return user
+    _cache_put(token, user, expires_at, persisted_exp)
+    return dict(user)
 
 
 def revoke_db_token(token: str) -> None:
     if not token:
         return
+    invalidate_cached_token(token)
     conn = get_connection(True)
     cur = conn.cursor()
     cur.execute("DELETE FROM auth_tokens WHERE token=%s", (token,))
     conn.commit(); cur.close(); conn.close()
 
 
-def cleanup_expired_tokens() -> int:
-    """Delete expired tokens; returns number of removed rows."""
+def cleanup_expired_tokens(batch_size: int = 1000, pause: float = 0.0) -> int:
+    """Delete expired tokens in chunks of `batch_size`; returns number of removed rows."""
+    removed = 0
     conn = get_connection(True)
     cur = conn.cursor()
-    cur.execute("DELETE FROM auth_tokens WHERE expires_at <= %s", (_now(),))
-    affected = cur.rowcount or 0
-    conn.commit(); cur.close(); conn.close()
-    return affected
\ No newline at end of file
+    try:
+        while True:
+            cur.execute(
+                "DELETE FROM auth_tokens WHERE expires_at <= %s ORDER BY expires_at LIMIT %s",
+                (_now(), int(batch_size)),
+            )
+            affected = cur.rowcount or 0
+            conn.commit()
+            removed += affected
+            if affected < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        cur.close(); conn.close()
+    return removed
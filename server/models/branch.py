@@ -4,6 +4,7 @@ Provides ensure_branch_schema and basic CRUD utilities for branches.
 """
 from typing import List, Dict, Any, Optional
 from database import get_connection
+from utils.delta import fetch_delta
 
 
 def ensure_branch_schema():
@@ -39,6 +40,30 @@ def ensure_branch_schema():
     conn.commit(); cur.close(); conn.close()
 
 
+def ensure_branch_updated_at():
+    """Track row changes on branches so replicas can sync deltas."""
+    conn = get_connection(database=True)
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "ALTER TABLE branches ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+        )
+    except Exception:
+        pass
+    conn.commit(); cur.close(); conn.close()
+
+
+def branches_delta(since=None) -> Dict[str, Any]:
+    """Branches changed since `since` for a client replica (base columns only;
+    employee counts are derived and not tracked by updated_at)."""
+    conn = get_connection(database=True)
+    cur = conn.cursor()
+    try:
+        return fetch_delta(cur, "branches", ["id", "name", "location", "manager_id"], since)
+    finally:
+        cur.close(); conn.close()
+
+
 def list_branches_with_counts() -> List[Dict[str, Any]]:
     conn = get_connection(database=True)
     cur = conn.cursor()
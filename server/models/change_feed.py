@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Incremental change feeds keyed on updated_at.
+
+    GET /api/<resource>/changes?since=<watermark>&cursor=&limit=
+
+A feed walks rows with ``updated_at >= since`` in (updated_at, id) order and
+reports deletions from the ``deleted_rows`` tombstone table, which the delete
+paths fill in the same transaction as the DELETE. A response carries:
+
+- items: inserted or updated rows visible to the caller (with updated_at)
+- deleted: ids deleted since the watermark, or changed rows the caller can no
+  longer see (e.g. a loan that became purchased, for employees)
+- next_cursor: pass back with the same `since` for the next page; None at the end
+- watermark: the `since` for the next sync, taken before the first page and
+  moved back by the late-commit safety window of utils.delta (which also
+  covers tombstones, stamped when the DELETE ran rather than when it committed)
+- resync: True when `since` is older than the tombstone retention window; the
+  caller must drop its copy and start again without `since`
+
+Without `since` the feed is a full snapshot. Tombstones are purged by the
+retention job after TOMBSTONE_RETENTION_DAYS.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import datetime, timedelta
+import os
+import time
+
+from database import get_connection
+from utils.delta import WATERMARK_FORMAT, safe_watermark
+from utils.pagination import encode_cursor
+
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "90"))
+
+# Feed resource -> table; each table gets an (updated_at, id) index
+FEED_TABLES = {
+    "loans": "loans",
+    "loan_buyers": "loan_buyers",
+    "creditors": "creditors",
+    "attendance": "attendance",
+}
+
+
+def ensure_change_feed_indexes():
+    """(updated_at, id) indexes so feeds read a range instead of scanning."""
+    conn = get_connection(True)
+    cur = conn.cursor()
+    for table in FEED_TABLES.values():
+        name = f"idx_{table}_updated_id"
+        try:
+            cur.execute("""
+                SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+            """, (table, name))
+            if cur.fetchone()[0] == 0:
+                cur.execute(f"CREATE INDEX {name} ON {table} (updated_at, id)")
+        except Exception:
+            pass
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def ensure_tombstone_schema():
+    conn = get_connection(True)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS deleted_rows (
+            id BIGINT PRIMARY KEY AUTO_INCREMENT,
+            resource VARCHAR(50) NOT NULL,
+            row_id INT NOT NULL,
+            deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            KEY idx_deleted_resource_at (resource, deleted_at),
+            KEY idx_deleted_at (deleted_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+        """
+    )
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def record_deletion(cur, resource: str, row_id: int) -> None:
+    """Tombstone a deleted row; call on the cursor that runs the DELETE."""
+    cur.execute("INSERT INTO deleted_rows (resource, row_id) VALUES (%s,%s)", (resource, int(row_id)))
+
+
+def list_changes(resource: str, columns: Sequence[str], since: Optional[datetime], limit: int,
+                 cursor: Optional[List[Any]] = None, where: Sequence[str] = (), params: Sequence[Any] = (),
+                 visible: Optional[str] = None) -> Dict[str, Any]:
+    """One page of the `resource` feed.
+
+    `where` limits the rows the caller may ever see (ownership); `visible` is a
+    SQL condition for state-dependent visibility, whose changed-and-hidden rows
+    are reported as deleted. `cursor` is [watermark, updated_at, id] from the
+    previous page's next_cursor.
+    """
+    table = FEED_TABLES[resource]
+    columns = [c for c in columns if c != "updated_at"]
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        first_page = cursor is None
+        if first_page:
+            cur.execute("SELECT CURRENT_TIMESTAMP")
+            watermark = cur.fetchone()[0]
+        else:
+            watermark = datetime.strptime(cursor[0], WATERMARK_FORMAT)
+            if since is not None and since > watermark:
+                raise ValueError("cursor does not match since")
+        horizon = watermark - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        if since is not None and since < horizon:
+            return {"items": [], "deleted": [], "next_cursor": None,
+                    "watermark": safe_watermark(watermark), "resync": True}
+
+        conds, values = list(where), list(params)
+        if since is not None:
+            conds.append("updated_at >= %s")
+            values.append(since)
+        if not first_page:
+            conds.append("(updated_at, id) > (%s, %s)")
+            values += [cursor[1], cursor[2]]
+        select = columns + ["updated_at", f"({visible})" if visible else "1"]
+        sql = f"SELECT {', '.join(select)} FROM {table}"
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += " ORDER BY updated_at, id LIMIT %s"
+        values.append(limit + 1)
+        cur.execute(sql, tuple(values))
+        rows = cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([watermark.strftime(WATERMARK_FORMAT), last[-2], last[columns.index("id")]])
+
+        keys = columns + ["updated_at"]
+        items, deleted = [], []
+        for r in rows:
+            item = dict(zip(keys, r[:-1]))
+            if r[-1]:
+                items.append(item)
+            else:
+                deleted.append(item["id"])
+        if first_page and since is not None:
+            cur.execute(
+                "SELECT DISTINCT row_id FROM deleted_rows WHERE resource=%s AND deleted_at >= %s",
+                (resource, since),
+            )
+            deleted += [r[0] for r in cur.fetchall()]
+        return {"items": items, "deleted": deleted, "next_cursor": next_cursor,
+                "watermark": safe_watermark(watermark), "resync": False}
+    finally:
+        cur.close()
+        conn.close()
+
+
+def cleanup_tombstones(days: int = TOMBSTONE_RETENTION_DAYS, batch_size: int = 1000, pause: float = 0.0) -> int:
+    """Delete tombstones older than `days` in chunks; returns rows removed."""
+    removed = 0
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        while True:
+            cur.execute(
+                "DELETE FROM deleted_rows WHERE deleted_at < (NOW() - INTERVAL %s DAY) ORDER BY deleted_at LIMIT %s",
+                (int(days), int(batch_size)),
+            )
+            affected = cur.rowcount or 0
+            conn.commit()
+            removed += affected
+            if affected < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        cur.close(); conn.close()
+    return removed
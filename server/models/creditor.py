@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List
 from database import get_connection
+from utils.list_query import ListQuery, fetch_page
+from utils.delta import fetch_delta
+from models.change_feed import record_deletion, list_changes
 
 
 def ensure_creditor_schema():
@@ -17,9 +20,11 @@ def ensure_creditor_schema():
             amount DECIMAL(14,2) NOT NULL,
             description VARCHAR(500) NULL,
             settlement_status ENUM('settled','unsettled') NOT NULL DEFAULT 'unsettled',
+            paid_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_creditors_loan_id (loan_id)
+            INDEX idx_creditors_loan_id (loan_id),
+            INDEX idx_creditors_status_id (settlement_status, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
         """
     )
@@ -98,6 +103,17 @@ def ensure_creditor_schema():
     except Exception:
         pass
 
+    try:
+        cur.execute("""
+            SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'creditors' AND INDEX_NAME = 'idx_creditors_status_id'
+        """)
+        need_idx = cur.fetchone()[0] == 0
+        if need_idx:
+            cur.execute("CREATE INDEX idx_creditors_status_id ON creditors(settlement_status, id)")
+    except Exception:
+        pass
+
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS creditor_installments (
@@ -112,29 +128,73 @@ def ensure_creditor_schema():
         """
     )
 
+    # Denormalized SUM(creditor_installments.amount), kept in step by the write paths
+    need_backfill = False
+    try:
+        cur.execute("""
+            SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'creditors' AND COLUMN_NAME = 'paid_amount'
+        """)
+        need_backfill = cur.fetchone()[0] == 0
+        if need_backfill:
+            cur.execute("ALTER TABLE creditors ADD COLUMN paid_amount DECIMAL(14,2) NOT NULL DEFAULT 0 AFTER settlement_status")
+    except Exception:
+        need_backfill = False
+
     conn.commit()
     cur.close()
     conn.close()
+    if need_backfill:
+        reconcile_paid_amounts()
 
 
-def _compute_paid(conn, creditor_id: int) -> float:
+def reconcile_paid_amounts() -> int:
+    """Recompute creditors.paid_amount from installments; returns the number of rows corrected."""
+    conn = get_connection(True)
     cur = conn.cursor()
-    cur.execute("SELECT COALESCE(SUM(amount),0) FROM creditor_installments WHERE creditor_id=%s", (creditor_id,))
-    paid = float(cur.fetchone()[0] or 0)
+    cur.execute(
+        """
+        UPDATE creditors c
+        LEFT JOIN (
+            SELECT creditor_id, SUM(amount) AS paid FROM creditor_installments GROUP BY creditor_id
+        ) t ON t.creditor_id = c.id
+        SET c.paid_amount = COALESCE(t.paid, 0),
+            c.settlement_status = IF(COALESCE(t.paid, 0) >= c.amount AND c.amount > 0, 'settled', 'unsettled')
+        WHERE c.paid_amount <> COALESCE(t.paid, 0)
+        """
+    )
+    fixed = cur.rowcount
+    conn.commit()
     cur.close()
-    return paid
+    conn.close()
+    return fixed
+
+
+def _apply_paid_delta(cur, creditor_id: int, delta: float):
+    # MySQL evaluates single-table SET clauses left to right, so the status sees the new paid_amount
+    cur.execute(
+        """
+        UPDATE creditors
+        SET paid_amount = paid_amount + %s,
+            settlement_status = IF(paid_amount >= amount AND amount > 0, 'settled', 'unsettled')
+        WHERE id=%s
+        """,
+        (delta, creditor_id),
+    )
 
 
 def _recalc_status(conn, creditor_id: int):
+    """Recompute one creditor's paid_amount and status after installments were edited or removed."""
     cur = conn.cursor()
-    cur.execute("SELECT amount FROM creditors WHERE id=%s", (creditor_id,))
-    row = cur.fetchone()
-    if not row:
-        cur.close(); return
-    total = float(row[0] or 0)
-    paid = _compute_paid(conn, creditor_id)
-    new_status = 'settled' if paid >= total and total > 0 else 'unsettled'
-    cur.execute("UPDATE creditors SET settlement_status=%s WHERE id=%s", (new_status, creditor_id))
+    cur.execute(
+        """
+        UPDATE creditors
+        SET paid_amount = (SELECT COALESCE(SUM(amount),0) FROM creditor_installments WHERE creditor_id=%s),
+            settlement_status = IF(paid_amount >= amount AND amount > 0, 'settled', 'unsettled')
+        WHERE id=%s
+        """,
+        (creditor_id, creditor_id),
+    )
     conn.commit()
     cur.close()
 
@@ -170,8 +230,8 @@ def update_creditor(creditor_id: int, data: Dict[str, Any]):
     conn = get_connection(True)
     cur = conn.cursor()
     cur.execute(f"UPDATE creditors SET {', '.join(fields)} WHERE id=%s", tuple(values))
-    # After amount change, recalc status
-    _recalc_status(conn, creditor_id)
+    # After amount change, recalc status against the stored paid_amount
+    _apply_paid_delta(cur, creditor_id, 0)
     conn.commit(); cur.close(); conn.close()
 
 
@@ -179,6 +239,8 @@ def delete_creditor(creditor_id: int):
     conn = get_connection(True)
     cur = conn.cursor()
     cur.execute("DELETE FROM creditors WHERE id=%s", (creditor_id,))
+    if cur.rowcount:
+        record_deletion(cur, "creditors", creditor_id)
     conn.commit(); cur.close(); conn.close()
 
 
@@ -189,45 +251,79 @@ def add_installment(creditor_id: int, amount: float, pay_date: str, notes: str =
         "INSERT INTO creditor_installments (creditor_id, amount, pay_date, notes) VALUES (%s,%s,%s,%s)",
         (creditor_id, amount, pay_date, notes),
     )
-    # Check if fully settled
-    cur.execute("SELECT amount FROM creditors WHERE id=%s", (creditor_id,))
-    total_row = cur.fetchone()
-    total = float(total_row[0] or 0) if total_row else 0
-    paid = _compute_paid(conn, creditor_id)
-    if paid >= total and total > 0:
-        cur.execute("UPDATE creditors SET settlement_status='settled' WHERE id=%s", (creditor_id,))
-    else:
-        cur.execute("UPDATE creditors SET settlement_status='unsettled' WHERE id=%s", (creditor_id,))
+    # Bump paid_amount and flip to settled once fully paid
+    _apply_paid_delta(cur, creditor_id, amount)
     conn.commit()
     cur.close()
     conn.close()
 
 
-def list_creditors(status: Optional[str] = None) -> List[dict]:
-    conn = get_connection(True)
-    cur = conn.cursor()
-    where = ""
-    vals: Tuple[Any, ...] = tuple()
-    if status:
-        where = " WHERE settlement_status=%s"
-        vals = (status,)
-    cur.execute(
-        f"SELECT id, full_name, amount, description, settlement_status FROM creditors{where} ORDER BY id DESC",
-        vals,
-    )
-    rows = cur.fetchall()
-    cols = ["id","full_name","amount","description","settlement_status"]
-    items = [dict(zip(cols, r)) for r in rows]
-    # enrich with paid and remaining
+_LIST_COLS = ["id","full_name","amount","description","settlement_status","paid_amount"]
+# Public sort names for paged listings -> SQL key expression
+CREDITOR_SORT_FIELDS = {
+    "id": "id",
+    "full_name": "full_name",
+    "amount": "amount",
+    "remaining_amount": "(amount - paid_amount)",
+}
+CREDITOR_SEARCH_COLUMNS = ("full_name", "description", "bank_name")
+
+
+def _with_remaining(items: List[dict]) -> List[dict]:
     for it in items:
-        paid = _compute_paid(conn, it["id"])  # uses its own cursor
+        paid = float(it.get("paid_amount") or 0)
         total = float(it.get("amount") or 0)
         it["paid_amount"] = paid
         it["remaining_amount"] = max(total - paid, 0)
-    cur.close(); conn.close()
     return items
 
 
+def list_creditors(status: Optional[str] = None, query: Optional[ListQuery] = None):
+    """Creditors, optionally by settlement status.
+    Without `query` the full list is returned; with a ListQuery, (items, next_cursor).
+    """
+    where: List[str] = []
+    vals: List[Any] = []
+    if status:
+        where.append("settlement_status=%s")
+        vals.append(status)
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        if query is not None:
+            items, next_cursor = fetch_page(cur, "creditors", _LIST_COLS, query, CREDITOR_SORT_FIELDS,
+                                            search_columns=CREDITOR_SEARCH_COLUMNS, where=where, params=vals)
+            return _with_remaining(items), next_cursor
+        cur.execute(
+            f"SELECT {', '.join(_LIST_COLS)} FROM creditors"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY id DESC",
+            tuple(vals),
+        )
+        return _with_remaining([dict(zip(_LIST_COLS, r)) for r in cur.fetchall()])
+    finally:
+        cur.close(); conn.close()
+
+
+def creditors_delta(since=None) -> Dict[str, Any]:
+    """Creditors changed since `since` for a client replica."""
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        delta = fetch_delta(cur, "creditors", _LIST_COLS, since)
+    finally:
+        cur.close(); conn.close()
+    _with_remaining(delta["items"])
+    return delta
+
+
+def creditor_changes(since, limit: int, cursor=None) -> Dict[str, Any]:
+    """One page of the creditors change feed (see models.change_feed)."""
+    page = list_changes("creditors", _LIST_COLS, since, limit, cursor=cursor)
+    _with_remaining(page["items"])
+    return page
+
+
 def get_creditor(creditor_id: int) -> Optional[dict]:
     conn = get_connection(True)
     cur = conn.cursor()
@@ -278,13 +374,13 @@ def get_creditor(creditor_id: int) -> Optional[dict]:
 def settle_creditor(creditor_id: int, pay_date: str, notes: Optional[str] = None):
     conn = get_connection(True)
     cur = conn.cursor()
-    # compute remaining
-    cur.execute("SELECT amount FROM creditors WHERE id=%s", (creditor_id,))
+    # compute remaining (row locked so concurrent installments can't double-settle)
+    cur.execute("SELECT amount, paid_amount FROM creditors WHERE id=%s FOR UPDATE", (creditor_id,))
     row = cur.fetchone()
     if not row:
         cur.close(); conn.close(); return
     total = float(row[0] or 0)
-    paid = _compute_paid(conn, creditor_id)
+    paid = float(row[1] or 0)
     remaining = max(total - paid, 0)
     if remaining > 0:
         cur.execute(
@@ -292,7 +388,11 @@ def settle_creditor(creditor_id: int, pay_date: str, notes: Optional[str] = None
             (creditor_id, remaining, pay_date, notes or "Full settlement"),
         )
     cur.execute(
-        "UPDATE creditors SET settlement_status='settled', settlement_date=%s, settlement_notes=%s WHERE id=%s",
-        (pay_date, notes, creditor_id),
+        """
+        UPDATE creditors SET paid_amount = paid_amount + %s, settlement_status='settled',
+               settlement_date=%s, settlement_notes=%s
+        WHERE id=%s
+        """,
+        (remaining, pay_date, notes, creditor_id),
     )
     conn.commit(); cur.close(); conn.close()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Dashboard aggregates.
+Counts and sums for the overview screens computed with GROUP BY queries, so
+clients no longer download whole tables to total them. The route caches the
+result per user scope for DASHBOARD_CACHE_TTL seconds (see utils.cache).
+"""
+from __future__ import annotations
+from typing import Dict, Any, Optional
+from datetime import datetime
+import os
+from database import get_connection
+
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "15"))
+
+# Roles allowed to see the attendance block (same as /api/attendance/admin)
+_ATTENDANCE_ROLES = ("admin", "accountant", "secretary")
+
+
+def _loan_totals(cur, admin: bool) -> Dict[str, Any]:
+    scope = "" if admin else " WHERE loan_status != 'purchased'"
+    cur.execute(f"SELECT loan_status, COUNT(*), COALESCE(SUM(amount), 0) FROM loans{scope} GROUP BY loan_status")
+    by_status = {st: {"count": int(cnt or 0), "amount": float(total or 0)} for st, cnt, total in cur.fetchall()}
+    return {
+        "by_status": by_status,
+        "count": sum(v["count"] for v in by_status.values()),
+        # "Active" loan value as shown on the dashboard: still available for sale
+        "available_amount": by_status.get("available", {}).get("amount", 0.0),
+    }
+
+
+def _buyer_totals(cur, admin: bool, national_id: Optional[str]) -> Dict[str, Any]:
+    if admin:
+        cur.execute("SELECT processing_status, COUNT(*) FROM loan_buyers GROUP BY processing_status")
+    elif national_id:
+        # Non-admins only count the buyers they registered
+        cur.execute(
+            "SELECT processing_status, COUNT(*) FROM loan_buyers WHERE created_by_nid=%s GROUP BY processing_status",
+            (national_id,),
+        )
+    else:
+        return {"by_status": {}, "count": 0}
+    by_status = {st: int(cnt or 0) for st, cnt in cur.fetchall()}
+    return {"by_status": by_status, "count": sum(by_status.values())}
+
+
+def _attendance_today(cur) -> Dict[str, Any]:
+    today = datetime.now().date()
+    cur.execute(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM employees),
+            (SELECT COUNT(DISTINCT employee_id) FROM (
+                SELECT employee_id FROM attendance_sessions WHERE date=%s
+                UNION
+                SELECT employee_id FROM attendance WHERE date=%s AND check_in IS NOT NULL
+            ) p),
+            (SELECT COUNT(*) FROM attendance_sessions WHERE date=%s AND check_out IS NULL)
+        """,
+        (today, today, today),
+    )
+    total, present, open_sessions = cur.fetchone() or (0, 0, 0)
+    total, present = int(total or 0), int(present or 0)
+    return {
+        "date": today.isoformat(),
+        "employees": total,
+        "present": present,
+        "absent": max(total - present, 0),
+        "checked_in_now": int(open_sessions or 0),
+    }
+
+
+def dashboard_summary(role: str, national_id: Optional[str] = None) -> Dict[str, Any]:
+    """Aggregates visible to `role`."""
+    admin = role == "admin"
+    conn = get_connection(True)
+    cur = conn.cursor()
+    summary: Dict[str, Any] = {
+        "loans": _loan_totals(cur, admin),
+        "buyers": _buyer_totals(cur, admin, national_id),
+    }
+    if role in _ATTENDANCE_ROLES:
+        summary["attendance"] = _attendance_today(cur)
+    cur.close(); conn.close()
+    summary["generated_at"] = datetime.now().isoformat(timespec="seconds")
+    return summary
@@ -1,7 +1,25 @@
 # -*- coding: utf-8 -*-
 from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from database import get_connection
+from utils.list_query import like_pattern
+from utils.jalali import CALENDAR_START, CALENDAR_END, calendar_rows, last_jalali_months, month_label
+
+
+def _ensure_index(cur, table: str, index_name: str, columns: str) -> None:
+    """Create an index if INFORMATION_SCHEMA says it is missing (best-effort)."""
+    try:
+        cur.execute(
+            """
+            SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+            """,
+            (table, index_name),
+        )
+        if cur.fetchone()[0] == 0:
+            cur.execute(f"CREATE INDEX {index_name} ON {table} {columns}")
+    except Exception:
+        pass
 
 
 def ensure_finance_schema():
@@ -16,7 +34,9 @@ def ensure_finance_schema():
             amount DECIMAL(14,2) NOT NULL,
             ref_id INT NULL,
             ref_type VARCHAR(50) NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_revenues_created_amount (created_at, amount),
+            INDEX idx_revenues_created_id (created_at, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
         """
     )
@@ -28,19 +48,204 @@ def ensure_finance_schema():
             amount DECIMAL(14,2) NOT NULL,
             ref_id INT NULL,
             ref_type VARCHAR(50) NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_expenses_created_amount (created_at, amount),
+            INDEX idx_expenses_created_id (created_at, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
         """
     )
+    # Covering indexes for monthly range sums (existing databases)
+    _ensure_index(cur, "revenues", "idx_revenues_created_amount", "(created_at, amount)")
+    _ensure_index(cur, "expenses", "idx_expenses_created_amount", "(created_at, amount)")
+    # Keyset order of the transaction feed: (created_at DESC, id DESC)
+    _ensure_index(cur, "revenues", "idx_revenues_created_id", "(created_at, id)")
+    _ensure_index(cur, "expenses", "idx_expenses_created_id", "(created_at, id)")
+
+    # Materialized per-month totals, maintained incrementally by the write paths:
+    # finance_monthly_rollup (Gregorian months) and finance_jalali_rollup (Jalali months)
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME IN ('finance_monthly_rollup', 'finance_jalali_rollup')
+        """
+    )
+    rollups_exist = cur.fetchone()[0] == 2
+    for table in ROLLUP_TABLES:
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                year SMALLINT NOT NULL,
+                month TINYINT NOT NULL,
+                revenue DECIMAL(16,2) NOT NULL DEFAULT 0,
+                expenses DECIMAL(16,2) NOT NULL DEFAULT 0,
+                auto_margin DECIMAL(16,2) NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (year, month)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+            """
+        )
+
+    # Calendar dimension: Gregorian date -> Jalali year/month/day
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jalali_calendar (
+            gdate DATE PRIMARY KEY,
+            jy SMALLINT NOT NULL,
+            jm TINYINT NOT NULL,
+            jd TINYINT NOT NULL,
+            KEY idx_jalali_month (jy, jm)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+        """
+    )
+    cur.execute("SELECT COUNT(*) FROM jalali_calendar")
+    if cur.fetchone()[0] < (CALENDAR_END - CALENDAR_START).days + 1:
+        _fill_jalali_calendar(cur)
     conn.commit()
     cur.close()
     conn.close()
+    if not rollups_exist:
+        # First start with the rollups: seed them from existing ledger rows
+        rebuild_finance_rollup()
+
+
+def _fill_jalali_calendar(cur, chunk: int = 5000) -> None:
+    batch = []
+    for row in calendar_rows():
+        batch.append(row)
+        if len(batch) >= chunk:
+            cur.executemany("INSERT IGNORE INTO jalali_calendar (gdate, jy, jm, jd) VALUES (%s,%s,%s,%s)", batch)
+            batch = []
+    if batch:
+        cur.executemany("INSERT IGNORE INTO jalali_calendar (gdate, jy, jm, jd) VALUES (%s,%s,%s,%s)", batch)
+
+
+# ----- Monthly rollups -----
+# Each amount is booked in two rollups: by Gregorian (year, month) of the
+# transaction and by Jalali (year, month) via the jalali_calendar dimension.
+# Auto-sale margin (sale_price - purchase_rate) is booked in the month the
+# buyer last moved to 'loan_paid' (status history), falling back to updated_at.
+
+GREGORIAN_ROLLUP = "finance_monthly_rollup"
+JALALI_ROLLUP = "finance_jalali_rollup"
+ROLLUP_TABLES = (GREGORIAN_ROLLUP, JALALI_ROLLUP)
+
+_BUYER_PAID_AT_SQL = """
+    COALESCE(
+        (SELECT MAX(h.changed_at) FROM loan_buyer_status_history h
+         WHERE h.loan_buyer_id = lb.id AND h.status = 'loan_paid'),
+        lb.updated_at
+    )
+"""
+
+
+def _rollup_key_sql(table: str, date_expr: str) -> tuple:
+    """(select expressions for y/m, join clause) bucketing `date_expr` for a rollup table."""
+    if table == JALALI_ROLLUP:
+        return "jc.jy AS y, jc.jm AS m", f"JOIN jalali_calendar jc ON jc.gdate = DATE({date_expr})"
+    return f"YEAR({date_expr}) AS y, MONTH({date_expr}) AS m", ""
+
+
+def _bump_rollups(cur, column: str, date_expr: str, delta_expr: str, from_sql: str, where_sql: str, params: tuple) -> None:
+    """Add `delta_expr` of the matched row to `column` in both rollups."""
+    for table in ROLLUP_TABLES:
+        key_sql, join_sql = _rollup_key_sql(table, date_expr)
+        cur.execute(
+            f"""
+            INSERT INTO {table} (year, month, {column})
+            SELECT * FROM (
+                SELECT {key_sql}, {delta_expr} AS delta
+                FROM {from_sql} {join_sql}
+                WHERE {where_sql}
+            ) AS src
+            ON DUPLICATE KEY UPDATE {column} = {column} + delta
+            """,
+            params,
+        )
+
+
+def rollup_apply_transaction(cur, table: str, txn_id: int, sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) a revenues/expenses row from the rollups."""
+    column = "revenue" if table == "revenues" else "expenses"
+    _bump_rollups(cur, column, "t.created_at", "%s * t.amount", f"{table} t", "t.id=%s", (sign, txn_id))
+
+
+def rollup_apply_buyer_margin(cur, buyer_id: int, sign: int = 1) -> None:
+    """Add or remove a paid buyer's auto-sale margin in the month it became paid."""
+    _bump_rollups(
+        cur, "auto_margin", _BUYER_PAID_AT_SQL, "%s * (lb.sale_price - l.purchase_rate)",
+        "loan_buyers lb JOIN loans l ON lb.loan_id = l.id",
+        "lb.id=%s AND lb.sale_price IS NOT NULL AND l.purchase_rate IS NOT NULL",
+        (sign, buyer_id),
+    )
+
+
+def rebuild_finance_rollup() -> int:
+    """Recompute both rollups from the raw tables with one GROUP BY each; returns rows written.
+    Runs as one transaction, so readers keep seeing the old rows until the new ones commit."""
+    source = f"""
+        SELECT created_at AS d, amount AS rev, 0 AS exp, 0 AS auto
+        FROM revenues
+        UNION ALL
+        SELECT created_at, 0, amount, 0
+        FROM expenses
+        UNION ALL
+        SELECT {_BUYER_PAID_AT_SQL}, 0, 0, lb.sale_price - l.purchase_rate
+        FROM loan_buyers lb
+        JOIN loans l ON lb.loan_id = l.id
+        WHERE lb.processing_status = 'loan_paid'
+          AND lb.sale_price IS NOT NULL AND l.purchase_rate IS NOT NULL
+    """
+    conn = get_connection(True, scoped=False)
+    cur = conn.cursor()
+    written = 0
+    try:
+        conn.start_transaction()
+        for table in ROLLUP_TABLES:
+            key_sql, join_sql = _rollup_key_sql(table, "src.d")
+            cur.execute(f"DELETE FROM {table}")
+            cur.execute(
+                f"""
+                INSERT INTO {table} (year, month, revenue, expenses, auto_margin)
+                SELECT y, m, SUM(rev), SUM(exp), SUM(auto)
+                FROM (
+                    SELECT {key_sql}, src.rev, src.exp, src.auto
+                    FROM ({source}) src {join_sql}
+                ) bucketed
+                GROUP BY y, m
+                """
+            )
+            written += cur.rowcount or 0
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close(); conn.close()
+    return written
+
+
+def _read_rollup(cur, months: List[tuple], table: str = GREGORIAN_ROLLUP) -> Dict[tuple, Dict[str, float]]:
+    """Fetch rollup rows for the given (year, month) keys; missing months are zeros."""
+    result = {ym: {"revenue": 0.0, "expenses": 0.0, "auto_margin": 0.0} for ym in months}
+    if not months:
+        return result
+    placeholders = ",".join(["(%s,%s)"] * len(months))
+    params = tuple(v for ym in months for v in ym)
+    cur.execute(
+        f"SELECT year, month, revenue, expenses, auto_margin FROM {table} WHERE (year, month) IN ({placeholders})",
+        params,
+    )
+    for y, m, rev, exp, auto in cur.fetchall():
+        result[(int(y), int(m))] = {"revenue": float(rev or 0), "expenses": float(exp or 0), "auto_margin": float(auto or 0)}
+    return result
 
 
 def add_revenue(source: str, amount: float, ref_id=None, ref_type=None):
     conn = get_connection(True)
     cur = conn.cursor()
     cur.execute("INSERT INTO revenues (source, amount, ref_id, ref_type) VALUES (%s,%s,%s,%s)", (source, amount, ref_id, ref_type))
+    rollup_apply_transaction(cur, "revenues", cur.lastrowid)
     conn.commit()
     cur.close()
     conn.close()
@@ -50,6 +255,7 @@ def add_expense(source: str, amount: float, ref_id=None, ref_type=None):
     conn = get_connection(True)
     cur = conn.cursor()
     cur.execute("INSERT INTO expenses (source, amount, ref_id, ref_type) VALUES (%s,%s,%s,%s)", (source, amount, ref_id, ref_type))
+    rollup_apply_transaction(cur, "expenses", cur.lastrowid)
     conn.commit()
     cur.close()
     conn.close()
@@ -58,365 +264,232 @@ def add_expense(source: str, amount: float, ref_id=None, ref_type=None):
 def monthly_summary(year: int, month: int) -> Dict[str, float]:
     conn = get_connection(True)
     cur = conn.cursor()
-    cur.execute("SELECT COALESCE(SUM(amount),0) FROM revenues WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s", (year, month))
-    total_rev = cur.fetchone()[0]
-    cur.execute("SELECT COALESCE(SUM(amount),0) FROM expenses WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s", (year, month))
-    total_exp = cur.fetchone()[0]
+    row = _read_rollup(cur, [(year, month)])[(year, month)]
     cur.close()
     conn.close()
-    return {"total_revenues": float(total_rev or 0), "total_expenses": float(total_exp or 0)}
+    return {"total_revenues": row["revenue"], "total_expenses": row["expenses"]}
 
 
-def get_total_unpaid_creditors() -> float:
-    """Calculate total unpaid loan amounts from unsettled creditors"""
-    conn = get_connection(True)
-    cur = conn.cursor()
-    
-    # Get all unsettled creditors with their amounts and paid installments
-    cur.execute(
-        """
-        SELECT c.id, c.amount, COALESCE(SUM(ci.amount), 0) as paid_amount
-        FROM creditors c
-        LEFT JOIN creditor_installments ci ON c.id = ci.creditor_id
-        WHERE c.settlement_status = 'unsettled'
-        GROUP BY c.id, c.amount
-        """
-    )
-    
-    rows = cur.fetchall()
-    total_unpaid = 0.0
-    
-    for creditor_id, total_amount, paid_amount in rows:
-        remaining = float(total_amount or 0) - float(paid_amount or 0)
-        if remaining > 0:
-            total_unpaid += remaining
-    
-    cur.close()
-    conn.close()
-    return total_unpaid
-
-
-def get_monthly_revenue_with_comparison(year: int, month: int) -> Dict[str, any]:
-    """Get current month revenue (manual + auto-sale margin) with comparison to previous month"""
-    conn = get_connection(True)
-    cur = conn.cursor()
-
-    # Manual revenues
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM revenues WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (year, month)
-    )
-    manual_current = float(cur.fetchone()[0] or 0)
-
-    prev_date = datetime(year, month, 1) - timedelta(days=1)
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM revenues WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (prev_date.year, prev_date.month)
-    )
-    manual_prev = float(cur.fetchone()[0] or 0)
-
-    # Auto revenue from sold loans (sale_price - purchase_rate) by buyer updated_at
-    cur.execute(
-        """
-        SELECT COALESCE(SUM(lb.sale_price - l.purchase_rate), 0)
-        FROM loan_buyers lb
-        LEFT JOIN loans l ON lb.loan_id = l.id
-        WHERE lb.processing_status = 'loan_paid'
-          AND lb.sale_price IS NOT NULL AND l.purchase_rate IS NOT NULL
-          AND YEAR(lb.updated_at)=%s AND MONTH(lb.updated_at)=%s
-        """,
-        (year, month)
-    )
-    auto_current = float(cur.fetchone()[0] or 0)
-
-    cur.execute(
-        """
-        SELECT COALESCE(SUM(lb.sale_price - l.purchase_rate), 0)
-        FROM loan_buyers lb
-        LEFT JOIN loans l ON lb.loan_id = l.id
-        WHERE lb.processing_status = 'loan_paid'
-          AND lb.sale_price IS NOT NULL AND l.purchase_rate IS NOT NULL
-          AND YEAR(lb.updated_at)=%s AND MONTH(lb.updated_at)=%s
-        """,
-        (prev_date.year, prev_date.month)
-    )
-    auto_prev = float(cur.fetchone()[0] or 0)
-
-    current_revenue = manual_current + auto_current
-    prev_revenue = manual_prev + auto_prev
-
-    percentage_change = 0.0
-    if prev_revenue > 0:
-        percentage_change = ((current_revenue - prev_revenue) / prev_revenue) * 100
-    elif current_revenue > 0:
-        percentage_change = 100.0
+def _pct_change(current: float, previous: float, signed: bool = False) -> float:
+    """Month-over-month change in percent (100 when growing from zero).
+    signed=True compares against abs(previous), used for profit which may be negative.
+    """
+    change = 0.0
+    if (previous != 0) if signed else (previous > 0):
+        change = ((current - previous) / (abs(previous) if signed else previous)) * 100
+    elif current > 0:
+        change = 100.0
+    return round(change, 1)
 
-    cur.close()
-    conn.close()
 
-    return {
-        "amount": current_revenue,
-        "percentage_change": round(percentage_change, 1)
-    }
+def _compute_metrics_snapshot(year: int, month: int) -> Dict[str, float]:
+    """Fetch every figure the dashboard cards need in a single round trip.
 
+    One UNION ALL query returns the rollup rows (manual revenue, expenses,
+    auto-sale margin) for the given and the previous month plus the total
+    unpaid creditor balance.
+    """
+    prev = (year - 1, 12) if month == 1 else (year, month - 1)
 
-def get_net_profit_with_comparison(year: int, month: int) -> Dict[str, any]:
-    """Net profit = (manual revenue + auto-sale margin) - expenses, with comparison."""
     conn = get_connection(True)
     cur = conn.cursor()
-
-    # Manual revenues
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM revenues WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (year, month)
-    )
-    manual_current = float(cur.fetchone()[0] or 0)
-
-    prev_date = datetime(year, month, 1) - timedelta(days=1)
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM revenues WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (prev_date.year, prev_date.month)
-    )
-    manual_prev = float(cur.fetchone()[0] or 0)
-
-    # Auto revenue from sold loans (sale_price - purchase_rate)
     cur.execute(
         """
-        SELECT COALESCE(SUM(lb.sale_price - l.purchase_rate), 0)
-        FROM loan_buyers lb
-        LEFT JOIN loans l ON lb.loan_id = l.id
-        WHERE lb.processing_status = 'loan_paid'
-          AND lb.sale_price IS NOT NULL AND l.purchase_rate IS NOT NULL
-          AND YEAR(lb.updated_at)=%s AND MONTH(lb.updated_at)=%s
+        SELECT year, month, revenue, expenses, auto_margin
+        FROM finance_monthly_rollup
+        WHERE (year, month) IN ((%s,%s),(%s,%s))
+        UNION ALL
+        SELECT NULL, NULL, COALESCE(SUM(GREATEST(amount - paid_amount, 0)), 0), 0, 0
+        FROM creditors
+        WHERE settlement_status = 'unsettled'
         """,
-        (year, month)
+        (year, month, prev[0], prev[1]),
     )
-    auto_current = float(cur.fetchone()[0] or 0)
+    rows = cur.fetchall()
+    cur.close(); conn.close()
 
-    cur.execute(
-        """
-        SELECT COALESCE(SUM(lb.sale_price - l.purchase_rate), 0)
-        FROM loan_buyers lb
-        LEFT JOIN loans l ON lb.loan_id = l.id
-        WHERE lb.processing_status = 'loan_paid'
-          AND lb.sale_price IS NOT NULL AND l.purchase_rate IS NOT NULL
-          AND YEAR(lb.updated_at)=%s AND MONTH(lb.updated_at)=%s
-        """,
-        (prev_date.year, prev_date.month)
-    )
-    auto_prev = float(cur.fetchone()[0] or 0)
+    snap = {
+        "revenue_current": 0.0, "revenue_prev": 0.0,
+        "expense_current": 0.0, "expense_prev": 0.0,
+        "auto_current": 0.0, "auto_prev": 0.0,
+        "creditors_unpaid": 0.0,
+    }
+    for y, m, rev, exp, auto in rows:
+        if y is None:
+            snap["creditors_unpaid"] = float(rev or 0)
+            continue
+        bucket = "current" if (int(y), int(m)) == (year, month) else "prev"
+        snap[f"revenue_{bucket}"] = float(rev or 0)
+        snap[f"expense_{bucket}"] = float(exp or 0)
+        snap[f"auto_{bucket}"] = float(auto or 0)
+    return snap
+
+
+def _cards_from_snapshot(snap: Dict[str, float]) -> Dict[str, any]:
+    revenue_current = snap["revenue_current"] + snap["auto_current"]
+    revenue_prev = snap["revenue_prev"] + snap["auto_prev"]
+    profit_current = revenue_current - snap["expense_current"]
+    profit_prev = revenue_prev - snap["expense_prev"]
+    return {
+        "total_creditors": snap["creditors_unpaid"],
+        "monthly_revenue": {
+            "amount": revenue_current,
+            "percentage_change": _pct_change(revenue_current, revenue_prev),
+        },
+        "monthly_expenses": {
+            "amount": snap["expense_current"],
+            "percentage_change": _pct_change(snap["expense_current"], snap["expense_prev"]),
+        },
+        "net_profit": {
+            "amount": profit_current,
+            "percentage_change": _pct_change(profit_current, profit_prev, signed=True),
+        },
+    }
 
-    # Expenses
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (year, month)
-    )
-    current_expenses = float(cur.fetchone()[0] or 0)
 
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (prev_date.year, prev_date.month)
-    )
-    prev_expenses = float(cur.fetchone()[0] or 0)
+def get_total_unpaid_creditors() -> float:
+    """Calculate total unpaid loan amounts from unsettled creditors"""
+    now = datetime.now()
+    return _compute_metrics_snapshot(now.year, now.month)["creditors_unpaid"]
 
-    current_profit = (manual_current + auto_current) - current_expenses
-    prev_profit = (manual_prev + auto_prev) - prev_expenses
 
-    percentage_change = 0.0
-    if prev_profit != 0:
-        percentage_change = ((current_profit - prev_profit) / abs(prev_profit)) * 100
-    elif current_profit > 0:
-        percentage_change = 100.0
+def get_monthly_revenue_with_comparison(year: int, month: int) -> Dict[str, any]:
+    """Get current month revenue (manual + auto-sale margin) with comparison to previous month"""
+    return _cards_from_snapshot(_compute_metrics_snapshot(year, month))["monthly_revenue"]
 
-    cur.close()
-    conn.close()
 
-    return {
-        "amount": current_profit,
-        "percentage_change": round(percentage_change, 1)
-    }
+def get_net_profit_with_comparison(year: int, month: int) -> Dict[str, any]:
+    """Net profit = (manual revenue + auto-sale margin) - expenses, with comparison."""
+    return _cards_from_snapshot(_compute_metrics_snapshot(year, month))["net_profit"]
 
 
 def get_monthly_expenses_with_comparison(year: int, month: int) -> Dict[str, any]:
     """Get current month expenses with comparison to previous month (percentage)."""
-    conn = get_connection(True)
-    cur = conn.cursor()
-    
-    # Current month expenses
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (year, month)
-    )
-    current_exp = float(cur.fetchone()[0] or 0)
-    
-    # Previous month
-    from datetime import datetime, timedelta
-    prev_date = datetime(year, month, 1) - timedelta(days=1)
-    cur.execute(
-        "SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-        (prev_date.year, prev_date.month)
-    )
-    prev_exp = float(cur.fetchone()[0] or 0)
-    
-    change = 0.0
-    if prev_exp > 0:
-        change = ((current_exp - prev_exp) / prev_exp) * 100
-    elif current_exp > 0:
-        change = 100.0
-    
-    cur.close(); conn.close()
-    return {"amount": current_exp, "percentage_change": round(change, 1)}
+    return _cards_from_snapshot(_compute_metrics_snapshot(year, month))["monthly_expenses"]
 
 
 def get_financial_metrics() -> Dict[str, any]:
-    """Get all key financial metrics for the dashboard"""
+    """Get all key financial metrics for the dashboard (single query)."""
     now = datetime.now()
-    current_year = now.year
-    current_month = now.month
-    
-    return {
-        "total_creditors": get_total_unpaid_creditors(),
-        "monthly_revenue": get_monthly_revenue_with_comparison(current_year, current_month),
-        "monthly_expenses": get_monthly_expenses_with_comparison(current_year, current_month),
-        "net_profit": get_net_profit_with_comparison(current_year, current_month)
-    }
+    return _cards_from_snapshot(_compute_metrics_snapshot(now.year, now.month))
 
 
 def get_six_month_trend() -> List[Dict[str, any]]:
-    """Get revenue vs expenses trend for the past 12 months (Jalali month labels)."""
+    """Get revenue vs expenses trend for the past 12 Jalali months (true Jalali buckets)."""
+    months = last_jalali_months(datetime.now().date(), 12)
     conn = get_connection(True)
     cur = conn.cursor()
+    rollup = _read_rollup(cur, months, table=JALALI_ROLLUP)
+    cur.close()
+    conn.close()
 
-    persian_months = [
-        "فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
-        "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"
-    ]
-    
     trend_data = []
-    now = datetime.now()
-    
-    def gregorian_to_jalali(gy: int, gm: int, gd: int):
-        g_d_m = [0,31,59,90,120,151,181,212,243,273,304,334]
-        gy2 = gy - 1600
-        gm2 = gm - 1
-        gd2 = gd - 1
-        g_day_no = 365*gy2 + (gy2+3)//4 - (gy2+99)//100 + (gy2+399)//400
-        g_day_no += g_d_m[gm2] + gd2
-        if gm2 > 1 and ((gy % 4 == 0 and gy % 100 != 0) or (gy % 400 == 0)):
-            g_day_no += 1
-        j_day_no = g_day_no - 79
-        j_np = j_day_no // 12053
-        j_day_no = j_day_no % 12053
-        jy = 979 + 33*j_np + 4*(j_day_no//1461)
-        j_day_no %= 1461
-        if j_day_no >= 366:
-            jy += (j_day_no - 366)//365 + 1
-            j_day_no = (j_day_no - 366) % 365
-        if j_day_no < 186:
-            jm = 1 + j_day_no//31
-            jd = 1 + (j_day_no % 31)
-        else:
-            jm = 7 + (j_day_no - 186)//30
-            jd = 1 + ((j_day_no - 186) % 30)
-        return jy, jm, jd
-    
-    # Walk back month-by-month for a full year
-    g_year, g_month = now.year, now.month
-    for _ in range(12):
-        jy, jm, _ = gregorian_to_jalali(g_year, g_month, 1)
-        month_label = f"{persian_months[jm-1]} {jy}"
-
-        # Monthly sums in Gregorian buckets but labeled Jalali
-        cur.execute(
-            "SELECT COALESCE(SUM(amount), 0) FROM revenues WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-            (g_year, g_month)
-        )
-        manual_rev = float(cur.fetchone()[0] or 0)
-        cur.execute(
-            "SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE YEAR(created_at)=%s AND MONTH(created_at)=%s",
-            (g_year, g_month)
-        )
-        manual_exp = float(cur.fetchone()[0] or 0)
-
-        cur.execute(
-            """
-            SELECT COALESCE(SUM(lb.sale_price - l.purchase_rate), 0)
-            FROM loan_buyers lb
-            LEFT JOIN loans l ON lb.loan_id = l.id
-            WHERE lb.processing_status = 'loan_paid'
-              AND lb.sale_price IS NOT NULL AND l.purchase_rate IS NOT NULL
-              AND YEAR(lb.updated_at)=%s AND MONTH(lb.updated_at)=%s
-            """,
-            (g_year, g_month)
-        )
-        auto_rev = float(cur.fetchone()[0] or 0)
-
-        revenue = manual_rev + auto_rev
-        expenses = manual_exp
-
+    for jy, jm in months:
+        row = rollup[(jy, jm)]
+        revenue = row["revenue"] + row["auto_margin"]
+        expenses = row["expenses"]
         trend_data.append({
-            "month": month_label,
+            "month": month_label(jy, jm),
             "revenue": revenue,
             "expenses": expenses,
             "profit": revenue - expenses
         })
+    return trend_data
 
-        if g_month == 1:
-            g_month = 12
-            g_year -= 1
-        else:
-            g_month -= 1
 
-    trend_data.reverse()
-    
-    cur.close()
-    conn.close()
-    return trend_data
+# Feed order is (sort column, id, type), all in the same direction; 'revenue' sorts above 'expense'
+TRANSACTION_TYPES = {"revenue": "revenues", "expense": "expenses"}
+# Public sort names -> column present in both tables
+TRANSACTION_SORT_FIELDS = {"date": "created_at", "amount": "amount"}
 
 
-def list_transactions() -> List[Dict[str, any]]:
-    """Get all financial transactions (revenues and expenses) sorted by date"""
+def _transaction_branch(table: str, txn_type: str, limit: int, cursor: Optional[tuple],
+                        date_from=None, date_to=None, min_amount=None, max_amount=None,
+                        sort_col: str = "created_at", desc: bool = True, q: Optional[str] = None) -> tuple:
+    """One parenthesized UNION branch reading at most `limit` rows past the cursor."""
+    where, params = [], []
+    if cursor is not None:
+        c_val, c_id, c_type = cursor
+        # Ties on (sort value, id) across tables are broken by type
+        if desc:
+            op, id_op = "<", ("<=" if txn_type < c_type else "<")
+        else:
+            op, id_op = ">", (">=" if txn_type > c_type else ">")
+        where.append(f"({sort_col} {op} %s OR ({sort_col} = %s AND id {id_op} %s))")
+        params += [c_val, c_val, c_id]
+    if date_from is not None:
+        where.append("created_at >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("created_at < %s")
+        params.append(date_to)
+    if min_amount is not None:
+        where.append("amount >= %s")
+        params.append(min_amount)
+    if max_amount is not None:
+        where.append("amount <= %s")
+        params.append(max_amount)
+    if q:
+        where.append("source LIKE %s")
+        params.append(like_pattern(q))
+    direction = "DESC" if desc else "ASC"
+    sql = (
+        f"(SELECT id, '{txn_type}' AS type, source, amount, created_at FROM {table}"
+        + (" WHERE " + " AND ".join(where) if where else "")
+        + f" ORDER BY {sort_col} {direction}, id {direction} LIMIT %s)"
+    )
+    params.append(limit)
+    return sql, params
+
+
+def list_transactions(limit: int = 100, cursor: Optional[tuple] = None, txn_type: Optional[str] = None,
+                      date_from=None, date_to=None, min_amount=None, max_amount=None,
+                      sort: str = "date", desc: bool = True, q: Optional[str] = None) -> tuple:
+    """Return one page of revenues and expenses, newest first by default.
+
+    `sort` is a TRANSACTION_SORT_FIELDS name and `q` a substring of the source.
+    `cursor` is the (sort value, id, type) key of the last row of the previous
+    page. Returns (transactions, next_cursor); next_cursor is None on the last page.
+    `date_to` is exclusive.
+    """
+    sort_col = TRANSACTION_SORT_FIELDS[sort]
+    types = [txn_type] if txn_type else ["revenue", "expense"]
+    branches, params = [], []
+    for t in types:
+        sql, p = _transaction_branch(TRANSACTION_TYPES[t], t, limit + 1, cursor,
+                                     date_from, date_to, min_amount, max_amount,
+                                     sort_col=sort_col, desc=desc, q=q)
+        branches.append(sql)
+        params += p
+
+    direction = "DESC" if desc else "ASC"
     conn = get_connection(True)
     cur = conn.cursor()
-    
-    transactions = []
-    
-    # Get revenues
-    cur.execute(
-        "SELECT id, source, amount, created_at FROM revenues ORDER BY created_at DESC"
-    )
-    revenues = cur.fetchall()
-    
-    for txn_id, source, amount, created_at in revenues:
-        transactions.append({
-            "id": txn_id,
-            "type": "revenue",
-            "description": source,
-            "amount": float(amount or 0),
-            "date": created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else ""
-        })
-    
-    # Get expenses
     cur.execute(
-        "SELECT id, source, amount, created_at FROM expenses ORDER BY created_at DESC"
+        " UNION ALL ".join(branches)
+        + f" ORDER BY {sort_col} {direction}, id {direction}, type {direction} LIMIT %s",
+        tuple(params) + (limit + 1,),
     )
-    expenses = cur.fetchall()
-    
-    for txn_id, source, amount, created_at in expenses:
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = (last[4] if sort_col == "created_at" else last[3], int(last[0]), last[1])
+
+    transactions = []
+    for txn_id, t, source, amount, created_at in rows:
         transactions.append({
             "id": txn_id,
-            "type": "expense",
+            "type": t,
             "description": source,
             "amount": float(amount or 0),
             "date": created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else ""
         })
-    
-    # Sort by date descending
-    transactions.sort(key=lambda x: x["date"], reverse=True)
-    
-    cur.close()
-    conn.close()
-    return transactions
+    return transactions, next_cursor
 
 
 def delete_transaction(transaction_id: int, transaction_type: str) -> bool:
@@ -431,6 +504,7 @@ def delete_transaction(transaction_id: int, transaction_type: str) -> bool:
     exists = cur.fetchone()[0] > 0
     
     if exists:
+        rollup_apply_transaction(cur, table, transaction_id, sign=-1)
         cur.execute(f"DELETE FROM {table} WHERE id=%s", (transaction_id,))
         conn.commit()
     
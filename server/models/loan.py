@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 from typing import Optional, Dict, Any, List
 from database import get_connection
+from utils.list_query import ListQuery, fetch_page, like_pattern
+from utils.delta import fetch_delta
+from models.change_feed import record_deletion, list_changes
+from models.finance import rollup_apply_buyer_margin
 
 
 def ensure_loan_schema():
@@ -108,35 +112,152 @@ def list_loans() -> List[dict]:
     return [dict(zip(cols, r)) for r in rows]
 
 
-def list_loans_for_user(user_role: str, user_nid: Optional[str] = None) -> List[dict]:
+_ADMIN_COLS = [
+    "id","bank_name","loan_type","duration","amount","owner_full_name","owner_phone","visit_date","loan_status","introducer","payment_type","purchase_rate","created_by_id","created_by_name","created_by_nid"
+]
+_EMPLOYEE_COLS = ["id","bank_name","loan_type","duration","amount","loan_status"]
+LOAN_STATUSES = ("available", "failed", "purchased")
+# Public sort names for paged listings -> SQL key expression (kept non-NULL for keyset order)
+LOAN_SORT_FIELDS = {
+    "id": "id",
+    "amount": "amount",
+    "visit_date": "COALESCE(visit_date, '1000-01-01')",
+    "bank_name": "COALESCE(bank_name, '')",
+    "loan_type": "COALESCE(loan_type, '')",
+    "duration": "COALESCE(duration, '')",
+    # ENUMs order by position but compare as strings; sort on the string
+    "loan_status": "CAST(loan_status AS CHAR)",
+}
+# Employees only sort by the columns they can see
+EMPLOYEE_SORT_FIELDS = [f for f in LOAN_SORT_FIELDS if f in _EMPLOYEE_COLS]
+
+
+def ensure_loan_list_indexes():
+    """Composite indexes for the filtered, id-ordered loan listing."""
+    conn = get_connection(True)
+    cur = conn.cursor()
+    indexes = [
+        ("idx_loans_status_id", "(loan_status, id)"),
+        ("idx_loans_bank_status_id", "(bank_name, loan_status, id)"),
+        ("idx_loans_type_status_id", "(loan_type, loan_status, id)"),
+        ("idx_loans_visit_date", "(visit_date, id)"),
+    ]
+    for name, columns in indexes:
+        try:
+            cur.execute("""
+                SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'loans' AND INDEX_NAME = %s
+            """, (name,))
+            if cur.fetchone()[0] == 0:
+                cur.execute(f"CREATE INDEX {name} ON loans {columns}")
+        except Exception:
+            pass
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def list_loans_for_user(user_role: str, user_nid: Optional[str] = None, filters: Optional[Dict[str, Any]] = None,
+                        query: Optional[ListQuery] = None):
     """List loans based on user role and access permissions.
     - admin: sees all loans
     - employee: sees limited fields from non-purchased loans
+
+    filters (all optional): q (bank / owner name substring), bank_name, loan_type,
+    duration, loan_status (list), min_amount, max_amount, visit_from, visit_to.
+    Without `query` the full list is returned (legacy callers). With a
+    ListQuery (q/sort/cursor/limit), returns (items, next_cursor).
     """
+    filters = filters or {}
+    admin = user_role == "admin"
+    cols = _ADMIN_COLS if admin else _EMPLOYEE_COLS
+    where, params = [], []
+    if not admin:
+        # Employee/user sees limited fields and no purchased loans
+        where.append("loan_status != 'purchased'")
+    statuses = [st for st in (filters.get("loan_status") or []) if st in LOAN_STATUSES]
+    if statuses:
+        where.append(f"loan_status IN ({','.join(['%s'] * len(statuses))})")
+        params += statuses
+    for key in ("bank_name", "loan_type", "duration"):
+        if filters.get(key):
+            where.append(f"{key}=%s")
+            params.append(filters[key])
+    if filters.get("min_amount") is not None:
+        where.append("amount >= %s"); params.append(filters["min_amount"])
+    if filters.get("max_amount") is not None:
+        where.append("amount <= %s"); params.append(filters["max_amount"])
+    if filters.get("visit_from") is not None:
+        where.append("visit_date >= %s"); params.append(filters["visit_from"])
+    if filters.get("visit_to") is not None:
+        where.append("visit_date <= %s"); params.append(filters["visit_to"])
+    q = (filters.get("q") or "").strip()
+    if q:
+        like = like_pattern(q)
+        if admin:
+            where.append("(bank_name LIKE %s OR owner_full_name LIKE %s)"); params += [like, like]
+        else:
+            where.append("bank_name LIKE %s"); params.append(like)
+    if query is not None:
+        conn = get_connection(True)
+        cur = conn.cursor()
+        try:
+            return fetch_page(cur, "loans", cols, query, LOAN_SORT_FIELDS, where=where, params=params)
+        finally:
+            cur.close()
+            conn.close()
+
+    sql = f"SELECT {', '.join(cols)} FROM loans"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC"
+
     conn = get_connection(True)
     cur = conn.cursor()
-    
-    if user_role == "admin":
-        # Admin sees everything
-        cur.execute(
-            "SELECT id, bank_name, loan_type, duration, amount, owner_full_name, owner_phone, visit_date, loan_status, introducer, payment_type, purchase_rate, created_by_id, created_by_name, created_by_nid FROM loans ORDER BY id DESC"
-        )
-        cols = [
-            "id","bank_name","loan_type","duration","amount","owner_full_name","owner_phone","visit_date","loan_status","introducer","payment_type","purchase_rate","created_by_id","created_by_name","created_by_nid"
-        ]
-    else:
-        # Employee/user sees limited fields and no purchased loans
-        cur.execute(
-            "SELECT id, bank_name, loan_type, duration, amount, loan_status FROM loans WHERE loan_status != 'purchased' ORDER BY id DESC"
-        )
-        cols = ["id","bank_name","loan_type","duration","amount","loan_status"]
-    
+    cur.execute(sql, tuple(params))
     rows = cur.fetchall()
     cur.close()
     conn.close()
     return [dict(zip(cols, r)) for r in rows]
 
 
+def loans_delta_for_user(user_role: str, since=None) -> Dict[str, Any]:
+    """Loans changed since `since` for a client replica, with the same
+    role-based columns and visibility as list_loans_for_user."""
+    admin = user_role == "admin"
+    where = [] if admin else ["loan_status != 'purchased'"]
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        return fetch_delta(cur, "loans", _ADMIN_COLS if admin else _EMPLOYEE_COLS, since, where=where)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def loan_changes_for_user(user_role: str, since, limit: int, cursor=None) -> Dict[str, Any]:
+    """One page of the loans change feed (see models.change_feed). Employees
+    get their limited columns, and loans that became purchased as deletions."""
+    if user_role == "admin":
+        return list_changes("loans", _ADMIN_COLS, since, limit, cursor=cursor)
+    return list_changes("loans", _EMPLOYEE_COLS, since, limit, cursor=cursor,
+                        visible="loan_status != 'purchased'")
+
+
+def loan_filter_values(user_role: str) -> Dict[str, List[str]]:
+    """Distinct bank names, loan types and durations for filter drop-downs."""
+    conn = get_connection(True)
+    cur = conn.cursor()
+    scope = "" if user_role == "admin" else " WHERE loan_status != 'purchased'"
+    values: Dict[str, List[str]] = {}
+    for col in ("bank_name", "loan_type", "duration"):
+        cur.execute(f"SELECT DISTINCT {col} FROM loans{scope} ORDER BY {col}")
+        values[col] = [r[0] for r in cur.fetchall() if r[0]]
+    cur.close()
+    conn.close()
+    return values
+
+
 def get_loan(loan_id: int) -> Optional[dict]:
     conn = get_connection(True)
     cur = conn.cursor()
@@ -170,16 +291,32 @@ def update_loan(loan_id: int, data: Dict[str, Any]):
 
     conn = get_connection(True)
     cur = conn.cursor()
+    # A new purchase_rate changes the margin of every paid buyer of this loan
+    paid = _paid_buyer_ids(cur, loan_id) if "purchase_rate" in data else []
+    for buyer_id in paid:
+        rollup_apply_buyer_margin(cur, buyer_id, sign=-1)
     cur.execute(f"UPDATE loans SET {', '.join(fields)} WHERE id=%s", tuple(values))
+    for buyer_id in paid:
+        rollup_apply_buyer_margin(cur, buyer_id, sign=1)
     conn.commit()
     cur.close()
     conn.close()
 
 
+def _paid_buyer_ids(cur, loan_id: int) -> List[int]:
+    cur.execute("SELECT id FROM loan_buyers WHERE loan_id=%s AND processing_status='loan_paid'", (loan_id,))
+    return [int(r[0]) for r in cur.fetchall()]
+
+
 def delete_loan(loan_id: int):
     conn = get_connection(True)
     cur = conn.cursor()
+    # The FK nulls loan_buyers.loan_id, which drops their margins from the ledger
+    for buyer_id in _paid_buyer_ids(cur, loan_id):
+        rollup_apply_buyer_margin(cur, buyer_id, sign=-1)
     cur.execute("DELETE FROM loans WHERE id=%s", (loan_id,))
+    if cur.rowcount:
+        record_deletion(cur, "loans", loan_id)
     conn.commit()
     cur.close()
     conn.close()
\ No newline at end of file
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 from typing import Optional, Dict, Any, List
 from database import get_connection
+from models.finance import rollup_apply_buyer_margin
+from utils.list_query import ListQuery, fetch_page
+from utils.delta import fetch_delta
+from models.change_feed import record_deletion, list_changes
 
 
 def ensure_loan_buyer_schema():
@@ -29,6 +33,7 @@ def ensure_loan_buyer_schema():
             created_by_nid VARCHAR(10) NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_lb_status_updated (processing_status, updated_at, loan_id, sale_price),
             CONSTRAINT fk_lb_loan FOREIGN KEY (loan_id) REFERENCES loans(id) ON DELETE SET NULL
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
         """
@@ -47,6 +52,14 @@ def ensure_loan_buyer_schema():
     except Exception:
         pass
 
+    # Covering index for finance auto-margin sums (status='loan_paid' by updated_at range)
+    try:
+        cur.execute("SHOW INDEX FROM loan_buyers WHERE Key_name = 'idx_lb_status_updated'")
+        if not cur.fetchall():
+            cur.execute("CREATE INDEX idx_lb_status_updated ON loan_buyers (processing_status, updated_at, loan_id, sale_price)")
+    except Exception:
+        pass
+
     # Status history
     cur.execute(
         """
@@ -91,6 +104,8 @@ def create_loan_buyer(data: Dict[str, Any]) -> int:
     )
     buyer_id = cur.lastrowid
     _insert_status(cur, buyer_id, data.get("processing_status", "request_registered"), data.get("notes"))
+    if data.get("processing_status") == "loan_paid":
+        rollup_apply_buyer_margin(cur, buyer_id, sign=1)
     conn.commit()
     cur.close()
     conn.close()
@@ -113,10 +128,28 @@ def update_loan_buyer(buyer_id: int, data: Dict[str, Any]):
 
     conn = get_connection(True)
     cur = conn.cursor()
+    # Status, sale price and loan all feed the paid margin in the finance rollup
+    touches_margin = any(k in data for k in ("processing_status", "sale_price", "loan_id"))
+    pre_status = None
+    if touches_margin:
+        cur.execute("SELECT processing_status FROM loan_buyers WHERE id=%s", (buyer_id,))
+        row = cur.fetchone()
+        if not row:
+            cur.close(); conn.close()
+            return
+        pre_status = row[0]
+        # Take the old margin out; it is booked again below if the buyer is still paid
+        if pre_status == "loan_paid":
+            rollup_apply_buyer_margin(cur, buyer_id, sign=-1)
     cur.execute(f"UPDATE loan_buyers SET {', '.join(fields)} WHERE id=%s", tuple(values))
+    status = data.get("processing_status", pre_status)
     # If status changed, add history and handle business rules
+    if "processing_status" in data and status != pre_status:
+        _insert_status(cur, buyer_id, status, data.get("notes"))
+    # Newly paid books in this month; still paid keeps the month of its history row
+    if touches_margin and status == "loan_paid":
+        rollup_apply_buyer_margin(cur, buyer_id, sign=1)
     if "processing_status" in data:
-        _insert_status(cur, buyer_id, data["processing_status"], data.get("notes"))
         # If completed (loan paid), mark related loan as sold/purchased
         if data.get("processing_status") == "loan_paid":
             try:
@@ -134,32 +167,71 @@ def update_loan_buyer(buyer_id: int, data: Dict[str, Any]):
     conn.close()
 
 
-def list_loan_buyers_for_user(user_role: str, username: Optional[str]) -> List[dict]:
-    conn = get_connection(True)
-    cur = conn.cursor()
+_LIST_COLS = ["id","first_name","last_name","national_id","phone","requested_amount","bank_agent","visit_date","processing_status","loan_id","broker","sale_price","sale_type","created_by_name","created_at","updated_at"]
+# Public sort names for paged listings -> SQL key expression
+BUYER_SORT_FIELDS = {
+    "id": "id",
+    "last_name": "last_name",
+    "requested_amount": "COALESCE(requested_amount, 0)",
+    "visit_date": "COALESCE(visit_date, '1000-01-01')",
+    "processing_status": "CAST(processing_status AS CHAR)",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+BUYER_SEARCH_COLUMNS = ("first_name", "last_name", "national_id", "phone", "bank_agent", "broker")
+
+
+def _buyer_scope(user_role: str, username: Optional[str]):
+    """WHERE terms limiting loan_buyers to the rows the user may see."""
     if user_role == "admin":
-        cur.execute(
-            "SELECT id, first_name, last_name, national_id, phone, requested_amount, bank_agent, visit_date, processing_status, loan_id, broker, sale_price, sale_type, created_by_name, created_at, updated_at FROM loan_buyers ORDER BY id DESC"
-        )
-    elif user_role == "broker" and username:
-        cur.execute(
-            "SELECT id, first_name, last_name, national_id, phone, requested_amount, bank_agent, visit_date, processing_status, loan_id, broker, sale_price, sale_type, created_by_name, created_at, updated_at FROM loan_buyers WHERE broker=%s ORDER BY id DESC",
-            (username,),
-        )
-    else:
+        return [], []
+    if user_role == "broker" and username:
+        return ["broker=%s"], [username]
+    if username:
         # Regular employee/secretary: only own created records
-        if username:
-            cur.execute(
-                "SELECT id, first_name, last_name, national_id, phone, requested_amount, bank_agent, visit_date, processing_status, loan_id, broker, sale_price, sale_type, created_by_name, created_at, updated_at FROM loan_buyers WHERE created_by_nid=%s ORDER BY id DESC",
-                (username,),
-            )
-        else:
-            cur.execute("SELECT id, first_name, last_name, national_id, phone, requested_amount, bank_agent, visit_date, processing_status, loan_id, broker, sale_price, sale_type, created_by_name, created_at, updated_at FROM loan_buyers WHERE 1=0")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    cols = ["id","first_name","last_name","national_id","phone","requested_amount","bank_agent","visit_date","processing_status","loan_id","broker","sale_price","sale_type","created_by_name","created_at","updated_at"]
-    return [dict(zip(cols, r)) for r in rows]
+        return ["created_by_nid=%s"], [username]
+    return ["1=0"], []
+
+
+def list_loan_buyers_for_user(user_role: str, username: Optional[str], query: Optional[ListQuery] = None):
+    """Buyers visible to the user: admin sees all, brokers their own deals,
+    everyone else the records they created.
+    Without `query` the full list is returned; with a ListQuery, (items, next_cursor).
+    """
+    where, params = _buyer_scope(user_role, username)
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        if query is not None:
+            return fetch_page(cur, "loan_buyers", _LIST_COLS, query, BUYER_SORT_FIELDS,
+                              search_columns=BUYER_SEARCH_COLUMNS, where=where, params=params)
+        sql = f"SELECT {', '.join(_LIST_COLS)} FROM loan_buyers"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        cur.execute(sql + " ORDER BY id DESC", tuple(params))
+        return [dict(zip(_LIST_COLS, r)) for r in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def loan_buyers_delta_for_user(user_role: str, username: Optional[str], since=None) -> Dict[str, Any]:
+    """Buyers changed since `since` for a client replica (same visibility as the list)."""
+    where, params = _buyer_scope(user_role, username)
+    conn = get_connection(True)
+    cur = conn.cursor()
+    try:
+        return fetch_delta(cur, "loan_buyers", _LIST_COLS, since, where=where, params=params)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def loan_buyer_changes_for_user(user_role: str, username: Optional[str], since, limit: int,
+                                cursor=None) -> Dict[str, Any]:
+    """One page of the buyers change feed (see models.change_feed), same visibility as the list."""
+    where, params = _buyer_scope(user_role, username)
+    return list_changes("loan_buyers", _LIST_COLS, since, limit, cursor=cursor, where=where, params=params)
 
 
 def get_loan_buyer(buyer_id: int) -> Optional[Dict[str, Any]]:
@@ -192,5 +264,11 @@ def get_loan_buyer_history(buyer_id: int) -> List[Dict[str, Any]]:
 def delete_loan_buyer(buyer_id: int):
     conn = get_connection(True)
     cur = conn.cursor()
+    cur.execute("SELECT processing_status FROM loan_buyers WHERE id=%s", (buyer_id,))
+    row = cur.fetchone()
+    if row and row[0] == "loan_paid":
+        rollup_apply_buyer_margin(cur, buyer_id, sign=-1)
     cur.execute("DELETE FROM loan_buyers WHERE id=%s", (buyer_id,))
+    if cur.rowcount:
+        record_deletion(cur, "loan_buyers", buyer_id)
     conn.commit(); cur.close(); conn.close()
\ No newline at end of file
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Per-collection change counters.
+Each row counts committed mutations of one resource collection (loans,
+loan_buyers, creditors, transactions, ...). They back the ETags of the list
+endpoints (utils/etag.py): an unchanged counter means an unchanged list.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable
+from database import get_connection
+
+
+def ensure_resource_version_schema():
+    conn = get_connection(True)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS resource_versions (
+            name VARCHAR(64) PRIMARY KEY,
+            version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+        """
+    )
+    conn.commit(); cur.close(); conn.close()
+
+
+def get_versions(names: Iterable[str]) -> Dict[str, int]:
+    names = list(names)
+    if not names:
+        return {}
+    conn = get_connection(True)
+    cur = conn.cursor()
+    cur.execute(
+        f"SELECT name, version FROM resource_versions WHERE name IN ({','.join(['%s'] * len(names))})",
+        tuple(names),
+    )
+    versions = {n: 0 for n in names}
+    versions.update({name: int(v or 0) for name, v in cur.fetchall()})
+    cur.close(); conn.close()
+    return versions
+
+
+def bump_versions(names: Iterable[str]) -> None:
+    """Increment the counters; inside a request this joins the request's transaction."""
+    names = sorted(set(names))  # fixed order so concurrent bumps lock rows alike
+    if not names:
+        return
+    conn = get_connection(True)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        INSERT INTO resource_versions (name, version) VALUES {','.join(['(%s, 1)'] * len(names))}
+        ON DUPLICATE KEY UPDATE version = version + 1
+        """,
+        tuple(names),
+    )
+    conn.commit(); cur.close(); conn.close()
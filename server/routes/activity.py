@@ -2,7 +2,8 @@
 from datetime import datetime
 from flask import Blueprint, request, jsonify, g
 from utils.auth import require_roles, require_auth
-from models.activity import list_logs
+from models.activity import list_logs, list_logs_page, ACTIVITY_SORT_FIELDS
+from utils.list_query import wants_list_query, parse_list_query
 
 bp_activity = Blueprint("activity", __name__, url_prefix="/api/activity")
 
@@ -12,6 +13,9 @@ def activity_list():
     """Get activity logs based on user role:
     - Admin: sees all logs with full filtering
     - Employee: sees only their own recent activities (limited)
+    Passing q/sort/cursor returns keyset pages with `next_cursor`
+    (see utils.list_query); sort defaults to -created_at. A bare `limit`
+    keeps the plain newest-first list.
     """
     user = g.user
     role = user.get("role")
@@ -40,5 +44,18 @@ def activity_list():
     except Exception:
         return jsonify({"status": "error", "message": "Invalid date format"}), 400
     
+    if wants_list_query(request.args, ("q", "sort", "cursor")):
+        try:
+            query = parse_list_query(request.args, ACTIVITY_SORT_FIELDS, "-created_at")
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        if role != "admin":
+            # Employees stay limited to one page of their recent activities
+            query = query._replace(limit=min(query.limit, 50), cursor=None)
+        items, next_cursor = list_logs_page(query, user_id=user_id, date_from=date_from, date_to=date_to)
+        if role != "admin":
+            next_cursor = None
+        return jsonify({"status": "success", "items": items, "next_cursor": next_cursor})
+    
     items = list_logs(user_id=user_id, date_from=date_from, date_to=date_to, limit=limit)
     return jsonify({"status": "success", "items": items})
\ No newline at end of file
@@ -9,8 +9,10 @@ from models.attendance import (
     check_in as _check_in,
     check_out as _check_out,
     get_daily_status,
-    heartbeat as _heartbeat,
+    attendance_changes,
 )
+from services.presence import record_heartbeat, forget_employee
+from utils.delta import parse_feed_args
 
 bp_attendance = Blueprint("attendance", __name__, url_prefix="/api/attendance")
 
@@ -41,6 +43,7 @@ def attendance_check_in():
             day = datetime.strptime(day_str, "%Y-%m-%d").date()
         except Exception:
             return jsonify({"status": "error", "message": "Invalid date format"}), 400
+    forget_employee(int(emp_id))
     sid = _check_in(int(emp_id), day=day)
     # Log activity
     try:
@@ -69,6 +72,7 @@ def attendance_check_out():
             day = datetime.strptime(day_str, "%Y-%m-%d").date()
         except Exception:
             return jsonify({"status": "error", "message": "Invalid date format"}), 400
+    forget_employee(int(emp_id))
     sid = _check_out(int(emp_id), day=day)
     # Log activity
     try:
@@ -118,12 +122,32 @@ def attendance_heartbeat():
     if not emp_id:
         return jsonify({"status": "error", "message": "No user"}), 400
     try:
-        _heartbeat(int(emp_id))
+        record_heartbeat(int(emp_id))
         return jsonify({"status": "success"})
     except Exception as exc:
         return jsonify({"status": "error", "message": str(exc)}), 500
 
 
+# Change feed for replicas
+@bp_attendance.get("/changes")
+@require_auth
+def attendance_changes_feed():
+    """Attendance rows changed since ?since=<watermark> (see models.change_feed).
+    admin/accountant/secretary get every employee, others only their own rows."""
+    user = g.user or {}
+    emp_id = None
+    if user.get("role") not in ("admin", "accountant", "secretary"):
+        emp_id = user.get("user_id")
+        if not emp_id:
+            return jsonify({"status": "error", "message": "Forbidden"}), 403
+    try:
+        since, cursor, limit = parse_feed_args(request.args)
+        page = attendance_changes(since, limit, cursor, employee_id=emp_id)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", **page})
+
+
 # Per-employee daily summary
 @bp_attendance.get("/<int:employee_id>")
 @require_roles("admin", "accountant", "secretary")
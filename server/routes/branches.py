@@ -1,19 +1,24 @@
 # -*- coding: utf-8 -*-
 from flask import Blueprint, request, jsonify
+from utils.delta import parse_since
 from utils.auth import require_roles
-from models.branch import ensure_branch_schema, list_branches_with_counts, create_branch, delete_branch, get_branch_employees
-from models.employee import ensure_employee_schema
+from utils.cache import cached
+from models.branch import list_branches_with_counts, create_branch, delete_branch, get_branch_employees, branches_delta
 
 bp_branches = Blueprint("branches", __name__, url_prefix="/api/branches")
 
-# Ensure schema on import (app.startup also ensures)
-ensure_employee_schema()
-ensure_branch_schema()
-
 
 @bp_branches.get("")
 @require_roles("admin")
+@cached(tags=("branches",))
 def list_branches():
+    if "updated_since" in request.args:
+        # Replica delta (see utils.delta)
+        try:
+            since = parse_since(request.args.get("updated_since"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        return jsonify({"status": "success", **branches_delta(since)})
     items = list_branches_with_counts()
     return jsonify({"status": "success", "items": items})
 
@@ -9,19 +9,44 @@ from models.creditor import (
     delete_creditor,
     get_creditor,
     settle_creditor,
+    CREDITOR_SORT_FIELDS,
+    creditors_delta,
+    creditor_changes,
 )
 from utils.auth import require_roles, require_auth
+from utils.etag import conditional
+from utils.list_query import wants_list_query, parse_list_query
+from utils.delta import parse_since, parse_feed_args
 
 bp_creditors = Blueprint("creditors", __name__, url_prefix="/api/creditors")
 
 
 @bp_creditors.get("")
 @require_roles("admin")
+@conditional("creditors")
 def creditors_list():
+    """Creditors, optionally filtered by ?status=settled|unsettled.
+    Passing q/sort/cursor/limit returns keyset pages with `next_cursor`
+    (see utils.list_query); sort defaults to -id.
+    Passing `updated_since` returns a replica delta of all creditors (see utils.delta).
+    """
+    if "updated_since" in request.args:
+        try:
+            since = parse_since(request.args.get("updated_since"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        return jsonify({"status": "success", **creditors_delta(since)})
     status = request.args.get("status")
     status = status.lower() if status else None
     if status not in (None, "settled", "unsettled"):
         return jsonify({"status": "error", "message": "invalid status"}), 400
+    if wants_list_query(request.args):
+        try:
+            query = parse_list_query(request.args, CREDITOR_SORT_FIELDS, "-id")
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        items, next_cursor = list_creditors(status, query=query)
+        return jsonify({"status": "success", "items": items, "next_cursor": next_cursor})
     items = list_creditors(status)
     try:
         import logging
@@ -31,6 +56,19 @@ def creditors_list():
     return jsonify({"status": "success", "items": items})
 
 
+@bp_creditors.get("/changes")
+@require_roles("admin")
+def creditors_changes():
+    """Creditors changed since ?since=<watermark>, in (updated_at, id) pages
+    with deletions (see models.change_feed)."""
+    try:
+        since, cursor, limit = parse_feed_args(request.args)
+        page = creditor_changes(since, limit, cursor)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", **page})
+
+
 @bp_creditors.post("")
 @require_roles("admin")
 def creditors_create():
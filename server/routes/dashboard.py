@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from flask import Blueprint, jsonify, g
+from utils.auth import require_auth
+from utils.cache import cached
+from models.dashboard import dashboard_summary, DASHBOARD_CACHE_TTL
+
+bp_dashboard = Blueprint("dashboard", __name__, url_prefix="/api/dashboard")
+
+
+@bp_dashboard.get("/summary")
+@require_auth
+@cached(ttl=DASHBOARD_CACHE_TTL, tags=("loans", "loan_buyers", "employees"), per_user=True)
+def dashboard_summary_view():
+    """Loan totals by status, buyer counts by processing status and today's attendance."""
+    user = g.user or {}
+    try:
+        summary = dashboard_summary(user.get("role"), user.get("national_id"))
+        return jsonify({"status": "success", "summary": summary})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
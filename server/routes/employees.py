@@ -7,6 +7,7 @@ from models.employee import (
     get_branches,
 )
 from utils.auth import require_roles
+from utils.cache import cached
 from models.activity import add_log
 
 bp_employees = Blueprint("employees", __name__, url_prefix="/api/employees")
@@ -16,6 +17,7 @@ bp_employees = Blueprint("employees", __name__, url_prefix="/api/employees")
 
 @bp_employees.get("/meta")
 @require_roles("admin")
+@cached(tags=("branches",))
 def employees_meta():
     """Return branches for dropdowns."""
     brs = get_branches()
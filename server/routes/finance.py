@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 from flask import Blueprint, request, jsonify, g
+from datetime import datetime, timedelta
 from models.finance import (
     ensure_finance_schema, add_revenue, add_expense, monthly_summary,
-    get_financial_metrics, get_six_month_trend, list_transactions, delete_transaction
+    get_financial_metrics, get_six_month_trend, list_transactions, delete_transaction,
+    TRANSACTION_SORT_FIELDS,
 )
 from utils.auth import require_roles
+from utils.cache import cached
+from utils.etag import conditional
+from utils.list_query import parse_list_query, next_cursor as list_cursor
 from models.activity import add_log
 
 bp_finance = Blueprint("finance", __name__, url_prefix="/api/finance")
@@ -35,12 +40,14 @@ def finance_add_expense():
 
 @bp_finance.get("/summary/<int:year>/<int:month>")
 @require_roles("admin", "accountant")
+@cached(tags=("finance",))
 def finance_summary(year: int, month: int):
     return jsonify({"status": "success", "summary": monthly_summary(year, month)})
 
 
 @bp_finance.get("/metrics")
 @require_roles("admin", "accountant", "secretary")
+@cached(tags=("finance",))
 def finance_metrics():
     """Get key financial metrics for dashboard"""
     try:
@@ -52,6 +59,7 @@ def finance_metrics():
 
 @bp_finance.get("/trend")
 @require_roles("admin", "accountant", "secretary")
+@cached(tags=("finance",))
 def finance_trend():
     """Get 6-month revenue vs expenses trend"""
     try:
@@ -61,13 +69,54 @@ def finance_trend():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+def _parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def _parse_amount(value):
+    return float(value) if value not in (None, "") else None
+
+
 @bp_finance.get("/transactions")
 @require_roles("admin", "accountant", "secretary")
+@conditional("transactions")
 def finance_transactions():
-    """Get all financial transactions (revenues and expenses)"""
+    """Get one page of financial transactions (revenues and expenses), newest first.
+
+    Query: the standard q/sort/cursor/limit protocol (utils.list_query; q
+    matches the source, sort is date|amount, default -date), plus type
+    (revenue|expense), from/to (YYYY-MM-DD, inclusive), min_amount, max_amount.
+    """
+    args = request.args
+    try:
+        txn_type = args.get("type") or None
+        if txn_type not in (None, "revenue", "expense"):
+            raise ValueError("invalid type")
+        query = parse_list_query(args, TRANSACTION_SORT_FIELDS, "-date", key_size=3)
+        if query.cursor is not None and query.cursor[2] not in ("revenue", "expense"):
+            raise ValueError("invalid cursor")
+        date_from = _parse_day(args.get("from"))
+        date_to = _parse_day(args.get("to"))
+        if date_to is not None:
+            date_to += timedelta(days=1)
+        min_amount = _parse_amount(args.get("min_amount"))
+        max_amount = _parse_amount(args.get("max_amount"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     try:
-        transactions = list_transactions()
-        return jsonify({"status": "success", "transactions": transactions})
+        transactions, next_cursor = list_transactions(
+            limit=query.limit,
+            cursor=tuple(query.cursor) if query.cursor else None,
+            txn_type=txn_type,
+            date_from=date_from, date_to=date_to,
+            min_amount=min_amount, max_amount=max_amount,
+            sort=query.sort, desc=query.desc, q=query.q or None,
+        )
+        return jsonify({
+            "status": "success",
+            "transactions": transactions,
+            "next_cursor": list_cursor(query, next_cursor) if next_cursor else None,
+        })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -1,31 +1,69 @@
 # -*- coding: utf-8 -*-
 from flask import Blueprint, request, jsonify, g
-from models.loan_buyer import ensure_loan_buyer_schema, create_loan_buyer, update_loan_buyer, list_loan_buyers_for_user, get_loan_buyer, get_loan_buyer_history, delete_loan_buyer
+from models.loan_buyer import ensure_loan_buyer_schema, create_loan_buyer, update_loan_buyer, list_loan_buyers_for_user, get_loan_buyer, get_loan_buyer_history, delete_loan_buyer, BUYER_SORT_FIELDS, loan_buyers_delta_for_user, loan_buyer_changes_for_user
 from models.activity import add_log
 from utils.auth import require_roles, require_auth, require_admin, require_admin_or_owner
+from utils.etag import conditional
+from utils.list_query import wants_list_query, parse_list_query
+from utils.delta import parse_since, parse_feed_args
 
 bp_loan_buyers = Blueprint("loan_buyers", __name__, url_prefix="/api/loan-buyers")
 
 
 @bp_loan_buyers.get("")
 @require_auth
+@conditional("loan_buyers")
 def lb_list():
     """Get loan buyers list based on user role:
     - Admin: sees all buyers
     - Employee: sees only their own created buyers
+    Passing q/sort/cursor/limit returns keyset pages with `next_cursor`
+    (see utils.list_query); sort defaults to -id.
+    Passing `updated_since` returns a replica delta instead (see utils.delta).
     """
     user = g.user
     role = user.get("role")
     username = user.get("national_id")
+    if "updated_since" in request.args:
+        try:
+            since = parse_since(request.args.get("updated_since"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        scope = "admin" if role == "admin" else "employee"
+        return jsonify({"status": "success", **loan_buyers_delta_for_user(scope, username, since)})
+    query = None
+    if wants_list_query(request.args):
+        try:
+            query = parse_list_query(request.args, BUYER_SORT_FIELDS, "-id")
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
     
     # Updated logic: admin sees all, employees see only their own
     if role == "admin":
-        items = list_loan_buyers_for_user(user_role="admin", username=None)
+        result = list_loan_buyers_for_user(user_role="admin", username=None, query=query)
     else:
         # Employee/broker sees only own created records
-        items = list_loan_buyers_for_user(user_role="employee", username=username)
+        result = list_loan_buyers_for_user(user_role="employee", username=username, query=query)
     
-    return jsonify({"status": "success", "items": items})
+    if query is None:
+        return jsonify({"status": "success", "items": result})
+    items, next_cursor = result
+    return jsonify({"status": "success", "items": items, "next_cursor": next_cursor})
+
+
+@bp_loan_buyers.get("/changes")
+@require_auth
+def lb_changes():
+    """Buyers changed since ?since=<watermark>, in (updated_at, id) pages
+    with deletions (see models.change_feed)."""
+    user = g.user
+    try:
+        since, cursor, limit = parse_feed_args(request.args)
+        scope = "admin" if user.get("role") == "admin" else "employee"
+        page = loan_buyer_changes_for_user(scope, user.get("national_id"), since, limit, cursor)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", **page})
 
 
 @bp_loan_buyers.post("")
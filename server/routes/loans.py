@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 import logging
 from flask import Blueprint, request, jsonify, g, current_app
-from models.loan import ensure_loan_schema, create_loan, list_loans, get_loan, update_loan, delete_loan, list_loans_for_user
+from datetime import datetime
+from models.loan import (
+    ensure_loan_schema, create_loan, list_loans, get_loan, update_loan, delete_loan, list_loans_for_user,
+    loan_filter_values, LOAN_SORT_FIELDS, EMPLOYEE_SORT_FIELDS, loans_delta_for_user, loan_changes_for_user,
+)
 from models.creditor import create_creditor
 from models.activity import add_log
 from utils.auth import require_roles, require_auth, require_admin, require_admin_or_owner
+from utils.etag import conditional
+from utils.list_query import wants_list_query, parse_list_query
+from utils.delta import parse_since, parse_feed_args
 
 log = logging.getLogger(__name__)
 
@@ -13,21 +20,90 @@ bp_loans = Blueprint("loans", __name__, url_prefix="/api/loans")
 # Schema ensured in app startup
 
 
+def _loan_filters(args) -> dict:
+    """Parse list filters from the query string; raises ValueError on bad input."""
+    def _amount(name):
+        v = args.get(name)
+        return float(v) if v not in (None, "") else None
+
+    def _day(name):
+        v = args.get(name)
+        return datetime.strptime(v, "%Y-%m-%d").date() if v else None
+
+    statuses = [st.strip() for st in (args.get("loan_status") or "").split(",") if st.strip()]
+    return {
+        "q": args.get("q"),
+        "bank_name": args.get("bank_name"),
+        "loan_type": args.get("loan_type"),
+        "duration": args.get("duration"),
+        "loan_status": statuses,
+        "min_amount": _amount("min_amount"),
+        "max_amount": _amount("max_amount"),
+        "visit_from": _day("visit_from"),
+        "visit_to": _day("visit_to"),
+    }
+
+
 @bp_loans.get("")
 @require_auth
+@conditional("loans")
 def loans_list():
     """Get loans list based on user role:
     - Admin: sees all loans with full details
     - Employee: sees limited fields from available loans only (no purchased loans)
+
+    Optional filters: q, bank_name, loan_type, duration, loan_status (comma list),
+    min_amount, max_amount, visit_from, visit_to (YYYY-MM-DD).
+    Passing q/sort/cursor/limit switches to keyset pages with `next_cursor`
+    (see utils.list_query); sort defaults to -id.
+    Passing `updated_since` returns a replica delta instead (see utils.delta).
     """
     user = g.user
     role = user.get("role")
     user_nid = user.get("national_id")
-    
-    # Use role-based filtering from model
-    items = list_loans_for_user(role, user_nid)
-    
-    return jsonify({"status": "success", "items": items})
+    args = request.args
+    if "updated_since" in args:
+        try:
+            since = parse_since(args.get("updated_since"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        return jsonify({"status": "success", **loans_delta_for_user(role, since)})
+    try:
+        filters = _loan_filters(args)
+        query = None
+        if wants_list_query(args):
+            sort_fields = LOAN_SORT_FIELDS if role == "admin" else EMPLOYEE_SORT_FIELDS
+            query = parse_list_query(args, sort_fields, "-id")
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if query is None:
+        # Use role-based filtering from model
+        items = list_loans_for_user(role, user_nid, filters=filters)
+        return jsonify({"status": "success", "items": items})
+
+    items, next_cursor = list_loans_for_user(role, user_nid, filters=filters, query=query)
+    return jsonify({"status": "success", "items": items, "next_cursor": next_cursor})
+
+
+@bp_loans.get("/changes")
+@require_auth
+def loans_changes():
+    """Loans changed since ?since=<watermark>, in (updated_at, id) pages
+    with deletions (see models.change_feed)."""
+    try:
+        since, cursor, limit = parse_feed_args(request.args)
+        page = loan_changes_for_user(g.user.get("role"), since, limit, cursor)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", **page})
+
+
+@bp_loans.get("/filters")
+@require_auth
+def loans_filter_values():
+    """Distinct values for the bank / type / duration filter drop-downs."""
+    return jsonify({"status": "success", **loan_filter_values(g.user.get("role"))})
 
 
 @bp_loans.post("")
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+In-process presence tracker for attendance heartbeats.
+A client heartbeat for an employee whose open session is already known only
+updates a last-seen timestamp in memory; a daemon thread writes the latest
+state of all sessions to attendance_sessions/attendance in one batched
+transaction every PRESENCE_FLUSH_SECONDS (see models.attendance.flush_presence).
+Unknown employees, day changes and entries older than PRESENCE_REVALIDATE_SECONDS
+go through the regular database heartbeat, which also starts a session if needed.
+
+On startup, sessions not seen for PRESENCE_STALE_MINUTES are closed at their
+last-seen time, covering heartbeats lost in a crash.
+
+Settings (environment):
+- PRESENCE_FLUSH_SECONDS: seconds between batched flushes (default 30, 0 disables buffering)
+- PRESENCE_REVALIDATE_SECONDS: re-resolve the open session from the DB after N seconds (default 600)
+- PRESENCE_STALE_MINUTES: idle minutes before an open session is closed on startup (default 10)
+"""
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+from datetime import datetime, date
+import atexit
+import logging
+import os
+import threading
+import time
+
+from models.attendance import heartbeat as db_heartbeat, flush_presence, close_stale_sessions
+
+log = logging.getLogger(__name__)
+
+PRESENCE_FLUSH_SECONDS = float(os.getenv("PRESENCE_FLUSH_SECONDS", "30"))
+PRESENCE_REVALIDATE_SECONDS = float(os.getenv("PRESENCE_REVALIDATE_SECONDS", "600"))
+PRESENCE_STALE_MINUTES = float(os.getenv("PRESENCE_STALE_MINUTES", "10"))
+
+
+class PresenceTracker:
+    """employee_id -> (session_id, day, last_seen, resolved_at), flushed periodically."""
+
+    def __init__(self, flush_interval: float = PRESENCE_FLUSH_SECONDS,
+                 revalidate: float = PRESENCE_REVALIDATE_SECONDS):
+        self.flush_interval = max(float(flush_interval), 1.0)
+        self.revalidate = float(revalidate)
+        self.pid = os.getpid()
+        self._sessions: Dict[int, Tuple[int, date, datetime, float]] = {}
+        self._dirty: Dict[int, datetime] = {}  # session_id -> last_seen not yet written
+        self._lock = threading.Lock()
+        # Held while writing, so discard() never races a flush of the same session
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="presence-flusher", daemon=True)
+        self._thread.start()
+
+    def heartbeat(self, employee_id: int) -> None:
+        now = datetime.now().replace(microsecond=0)
+        with self._lock:
+            entry = self._sessions.get(employee_id)
+            if (entry is not None and entry[1] == now.date()
+                    and time.monotonic() - entry[3] < self.revalidate):
+                sid = entry[0]
+                self._sessions[employee_id] = (sid, entry[1], now, entry[3])
+                self._dirty[sid] = now
+                return
+        # Slow path: resolve (or start) the open session in the database
+        self.discard(employee_id)
+        sid = db_heartbeat(employee_id, day=now.date())
+        if sid:
+            with self._lock:
+                self._sessions[employee_id] = (int(sid), now.date(), now, time.monotonic())
+
+    def discard(self, employee_id: int) -> None:
+        """Forget an employee (before check-in/check-out change their sessions)."""
+        with self._flush_lock:
+            with self._lock:
+                entry = self._sessions.pop(employee_id, None)
+                if entry is not None:
+                    self._dirty.pop(entry[0], None)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                pending, self._dirty = self._dirty, {}
+            if not pending:
+                return
+            try:
+                closed = flush_presence(pending)
+            except Exception as exc:
+                log.error("Failed to flush %s presence heartbeat(s): %s", len(pending), exc)
+                with self._lock:
+                    for sid, seen in pending.items():
+                        if seen > self._dirty.get(sid, seen.min):
+                            self._dirty[sid] = seen
+                return
+            if closed:
+                closed_ids = set(closed)
+                with self._lock:
+                    for emp_id in [e for e, v in self._sessions.items() if v[0] in closed_ids]:
+                        self._sessions.pop(emp_id, None)
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as exc:
+                log.exception("Presence flush failed: %s", exc)
+
+
+_tracker: Optional[PresenceTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker() -> Optional[PresenceTracker]:
+    """Per-process tracker, or None when buffering is disabled."""
+    global _tracker
+    if PRESENCE_FLUSH_SECONDS <= 0:
+        return None
+    t = _tracker
+    if t is not None and t.pid == os.getpid():
+        return t
+    with _tracker_lock:
+        if _tracker is None or _tracker.pid != os.getpid():
+            _tracker = PresenceTracker()
+        return _tracker
+
+
+def record_heartbeat(employee_id: int) -> None:
+    tracker = get_tracker()
+    if tracker is None:
+        db_heartbeat(employee_id)
+    else:
+        tracker.heartbeat(employee_id)
+
+
+def forget_employee(employee_id: int) -> None:
+    t = _tracker
+    if t is not None and t.pid == os.getpid():
+        t.discard(employee_id)
+
+
+def flush_presence_buffer() -> None:
+    t = _tracker
+    if t is not None and t.pid == os.getpid():
+        try:
+            t.close()
+        except Exception:
+            pass
+
+
+atexit.register(flush_presence_buffer)
+
+
+def recover_stale_sessions(max_idle_minutes: float = PRESENCE_STALE_MINUTES) -> int:
+    """Close sessions left open by a crashed process; called once on startup."""
+    closed = close_stale_sessions(max_idle_minutes)
+    if closed:
+        log.info("Closed %s stale attendance session(s) idle for more than %s minutes", closed, max_idle_minutes)
+    return closed
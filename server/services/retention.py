@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Data retention job.
+Purges old activity logs, expired auth tokens and old change-feed tombstones
+in bounded chunks, either on a periodic in-process schedule (started from
+app.start_server) or once via `python server/app.py --run-retention`.
+
+Settings (environment):
+- LOG_RETENTION_DAYS: keep activity logs for N days (default 30)
+- TOMBSTONE_RETENTION_DAYS: keep deletion tombstones for N days (default 90)
+- RETENTION_INTERVAL_MINUTES: minutes between scheduled runs (default 60, 0 disables)
+- RETENTION_BATCH_SIZE: rows deleted per statement (default 1000)
+"""
+from __future__ import annotations
+from typing import Dict, Any, Optional
+from datetime import datetime
+import logging
+import os
+import threading
+import time
+
+from database import get_connection
+from models.activity import cleanup_old_logs, LOG_RETENTION_DAYS
+from models.auth_token import cleanup_expired_tokens
+from models.change_feed import cleanup_tombstones
+
+log = logging.getLogger(__name__)
+
+RETENTION_INTERVAL_MINUTES = float(os.getenv("RETENTION_INTERVAL_MINUTES", "60"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+# Short pause between chunks so concurrent writers are not starved
+RETENTION_CHUNK_PAUSE = 0.05
+
+# Named MySQL lock so only one worker process purges at a time
+_LOCK_NAME = "phonix_retention"
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Any] = {
+    "runs": 0,
+    "skipped": 0,
+    "errors": 0,
+    "activity_logs_deleted": 0,
+    "auth_tokens_deleted": 0,
+    "tombstones_deleted": 0,
+    "last_run_at": None,
+    "last_duration_ms": None,
+    "last_result": None,
+}
+
+
+def get_retention_metrics() -> Dict[str, Any]:
+    """Return a snapshot of counters for this process."""
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+def run_retention(log_days: int = LOG_RETENTION_DAYS, batch_size: int = RETENTION_BATCH_SIZE) -> Optional[Dict[str, int]]:
+    """Run one retention pass. Returns rows deleted per table, or None if another
+    process currently holds the retention lock.
+    """
+    started = time.monotonic()
+    lock_conn = get_connection(True, scoped=False)
+    cur = lock_conn.cursor()
+    try:
+        cur.execute("SELECT GET_LOCK(%s, 0)", (_LOCK_NAME,))
+        row = cur.fetchone()
+        if not row or int(row[0] or 0) != 1:
+            with _metrics_lock:
+                _metrics["skipped"] += 1
+            return None
+        try:
+            result = {"activity_logs": 0, "auth_tokens": 0, "tombstones": 0}
+            try:
+                result["activity_logs"] = cleanup_old_logs(days=log_days, batch_size=batch_size, pause=RETENTION_CHUNK_PAUSE)
+                result["auth_tokens"] = cleanup_expired_tokens(batch_size=batch_size, pause=RETENTION_CHUNK_PAUSE)
+                result["tombstones"] = cleanup_tombstones(batch_size=batch_size, pause=RETENTION_CHUNK_PAUSE)
+            except Exception:
+                with _metrics_lock:
+                    _metrics["errors"] += 1
+                raise
+            finally:
+                with _metrics_lock:
+                    _metrics["runs"] += 1
+                    _metrics["activity_logs_deleted"] += result["activity_logs"]
+                    _metrics["auth_tokens_deleted"] += result["auth_tokens"]
+                    _metrics["tombstones_deleted"] += result["tombstones"]
+                    _metrics["last_run_at"] = datetime.now().isoformat(timespec="seconds")
+                    _metrics["last_duration_ms"] = int((time.monotonic() - started) * 1000)
+                    _metrics["last_result"] = dict(result)
+            log.info(
+                "Retention: removed %s activity log(s) older than %s days, %s expired token(s) and %s tombstone(s) in %sms",
+                result["activity_logs"], log_days, result["auth_tokens"], result["tombstones"], _metrics["last_duration_ms"],
+            )
+            return result
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+            cur.fetchone()
+    finally:
+        cur.close(); lock_conn.close()
+
+
+class RetentionScheduler:
+    """Daemon thread that calls run_retention every `interval_minutes`."""
+
+    def __init__(self, interval_minutes: float = RETENTION_INTERVAL_MINUTES):
+        self.interval = max(float(interval_minutes), 1.0) * 60
+        self.pid = os.getpid()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="retention-scheduler", daemon=True)
+
+    def start(self) -> "RetentionScheduler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        # First pass right away (replaces the old startup cleanup), then periodic
+        while not self._stop.is_set():
+            try:
+                run_retention()
+            except Exception as exc:
+                log.exception("Retention run failed: %s", exc)
+            self._stop.wait(self.interval)
+
+
+_scheduler: Optional[RetentionScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def start_retention_scheduler() -> Optional[RetentionScheduler]:
+    """Start the per-process scheduler once; returns None when disabled."""
+    global _scheduler
+    if RETENTION_INTERVAL_MINUTES <= 0:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler.pid != os.getpid():
+            _scheduler = RetentionScheduler().start()
+        return _scheduler
@@ -8,7 +8,6 @@ from typing import Optional, Dict
 from flask import request, jsonify, g
 
 from models.auth_token import (
-    ensure_auth_token_schema,
     issue_db_token,
     get_user_by_token,
     revoke_db_token,
@@ -17,7 +16,6 @@ from models.auth_token import (
 
 
 def issue_token(user: dict, ttl_minutes: int = DEFAULT_TTL_MINUTES) -> str:
-    ensure_auth_token_schema()
     return issue_db_token(user, ttl_minutes=ttl_minutes)
 
 
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Short-TTL in-process cache for read-heavy GET endpoints.
+
+Usage (inside the auth decorator so g.user is known):
+
+    @bp.get("/metrics")
+    @require_roles("admin", "accountant")
+    @cached(ttl=30, tags=("finance",))
+    def metrics(): ...
+
+Entries are keyed by path, query string and role (plus the user's national id
+for non-admins with ``per_user=True``, for views whose body depends on who asks),
+and only successful (200) responses are stored. A successful mutating request evicts every entry tagged
+with one of the tags its blueprint affects (MUTATION_TAGS); the eviction runs
+at request teardown, after the unit of work has been committed. Code outside
+a request (CLI, background jobs) can call ``invalidate`` directly.
+
+The cache is per worker process, so other workers may serve an entry until
+its TTL runs out; keep TTLs short.
+
+Settings (environment):
+- RESPONSE_CACHE_TTL: default TTL in seconds (default 30, 0 disables caching)
+- RESPONSE_CACHE_SIZE: max entries per process (default 512)
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Tuple
+from collections import OrderedDict
+import functools
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+# Blueprint of a mutating request -> cache tags whose data it can change
+MUTATION_TAGS: Dict[str, Tuple[str, ...]] = {
+    "finance": ("finance",),
+    # Purchased loans create creditors; paid buyers feed the auto margin
+    "loans": ("finance", "loans", "loan_buyers"),
+    "loan_buyers": ("finance", "loan_buyers", "loans"),
+    "creditors": ("finance",),
+    # Branch listings carry employee counts and employee forms list branches
+    "employees": ("employees", "branches"),
+    "branches": ("branches", "employees"),
+}
+
+_MUTATING_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# key -> (expires_at, tags, body, status, mimetype)
+_entries: "OrderedDict[Tuple, Tuple[float, Tuple[str, ...], bytes, int, str]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _request_key(per_user: bool = False) -> Tuple:
+    user = getattr(g, "user", None) or {}
+    role = user.get("role")
+    query = tuple(sorted(request.args.items(multi=True)))
+    owner = user.get("national_id") if per_user and role != "admin" else None
+    return (request.path, query, role, owner)
+
+
+def cached(ttl: Optional[float] = None, tags: Iterable[str] = (), per_user: bool = False):
+    """Cache a GET view's 200 responses for `ttl` seconds under `tags`."""
+    tags = tuple(tags)
+
+    def dec(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            lifetime = RESPONSE_CACHE_TTL if ttl is None else float(ttl)
+            if request.method != "GET" or lifetime <= 0:
+                return fn(*args, **kwargs)
+            key = _request_key(per_user)
+            now = time.monotonic()
+            with _lock:
+                hit = _entries.get(key)
+                if hit is not None:
+                    if hit[0] > now:
+                        _entries.move_to_end(key)
+                        return Response(hit[2], status=hit[3], mimetype=hit[4])
+                    _entries.pop(key, None)
+            rv = fn(*args, **kwargs)
+            resp = rv if isinstance(rv, Response) else None
+            if resp is not None and resp.status_code == 200 and not resp.direct_passthrough:
+                with _lock:
+                    _entries[key] = (now + lifetime, tags, resp.get_data(), resp.status_code, resp.mimetype)
+                    _entries.move_to_end(key)
+                    while len(_entries) > RESPONSE_CACHE_SIZE:
+                        _entries.popitem(last=False)
+            return rv
+        return wrapper
+    return dec
+
+
+def invalidate(*tags: str) -> int:
+    """Drop every entry carrying one of `tags` (all entries when none given)."""
+    wanted = set(tags)
+    with _lock:
+        if not wanted:
+            count = len(_entries)
+            _entries.clear()
+            return count
+        stale = [k for k, v in _entries.items() if wanted.intersection(v[1])]
+        for k in stale:
+            del _entries[k]
+        return len(stale)
+
+
+def init_app(app) -> None:
+    """Evict affected tags after successful mutating requests."""
+
+    @app.after_request
+    def _mark_cache_invalidation(response):
+        if request.method in _MUTATING_METHODS and response.status_code < 400:
+            tags = MUTATION_TAGS.get(request.blueprint or "")
+            if tags:
+                g._cache_invalidate = tags
+        return response
+
+    @app.teardown_request
+    def _apply_cache_invalidation(exc):
+        tags = g.pop("_cache_invalidate", None)
+        if tags and exc is None:
+            invalidate(*tags)
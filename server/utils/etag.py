@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Conditional GET (ETag / If-None-Match) for list endpoints.
+
+A list view decorated with ``@conditional("loans")`` gets an ETag derived from
+the change counters of the listed resources (models/resource_version.py) plus
+everything else its body depends on: path, query string, role and user. When
+the client's If-None-Match matches, the view is skipped and an empty 304 is
+returned, so an unchanged poll costs one primary-key lookup.
+
+Counters are bumped for every successful mutating request, inside the same
+transaction, according to CHANGED_RESOURCES (keyed by blueprint name). Writes
+made outside requests (CLI jobs) should call ``bump_versions`` themselves.
+"""
+from __future__ import annotations
+from typing import Dict, Tuple
+import functools
+import hashlib
+
+from flask import g, request, Response
+
+from models.resource_version import get_versions, bump_versions
+
+# Blueprint of a mutating request -> resource collections it may change.
+# Attendance is left out on purpose: heartbeats would bump it every minute.
+CHANGED_RESOURCES: Dict[str, Tuple[str, ...]] = {
+    # Marking a loan purchased also creates its creditor; deleting one nulls loan_buyers.loan_id
+    "loans": ("loans", "creditors", "loan_buyers"),
+    # A buyer moved to loan_paid marks its loan purchased and creates a creditor
+    "loan_buyers": ("loan_buyers", "loans", "creditors"),
+    "creditors": ("creditors",),
+    "finance": ("transactions",),
+    "employees": ("employees",),
+    "branches": ("branches",),
+}
+
+_MUTATING_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def _compute_etag(resources: Tuple[str, ...]) -> str:
+    versions = get_versions(resources)
+    user = getattr(g, "user", None) or {}
+    parts = [
+        request.path,
+        request.query_string.decode("latin-1"),
+        str(user.get("role")),
+        str(user.get("user_id")),
+    ] + [f"{name}={versions[name]}" for name in resources]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def conditional(*resources: str):
+    """Answer 304 when the listed resources did not change since the client's ETag."""
+    resources = tuple(resources)
+
+    def dec(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return fn(*args, **kwargs)
+            try:
+                etag = _compute_etag(resources)
+            except Exception:
+                # Never fail a read because the counters are unavailable
+                return fn(*args, **kwargs)
+            if etag in request.if_none_match:
+                resp = Response(status=304)
+                resp.set_etag(etag)
+                return resp
+            rv = fn(*args, **kwargs)
+            if isinstance(rv, Response) and rv.status_code == 200:
+                rv.set_etag(etag)
+            return rv
+        return wrapper
+    return dec
+
+
+def init_app(app) -> None:
+    """Bump change counters for successful mutations, before the request commits."""
+
+    @app.after_request
+    def _bump_resource_versions(response):
+        if request.method in _MUTATING_METHODS and response.status_code < 400:
+            names = CHANGED_RESOURCES.get(request.blueprint or "")
+            if names:
+                try:
+                    bump_versions(names)
+                except Exception as exc:
+                    app.logger.warning("Could not bump resource versions %s: %s", names, exc)
+        return response
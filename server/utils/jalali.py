@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Jalali (Shamsi) calendar helpers for server-side reporting.
+- gregorian_to_jalali: same algorithm as the client's date picker
+- calendar_rows: (gdate, jy, jm, jd) rows used to fill the jalali_calendar table
+"""
+from __future__ import annotations
+from typing import Iterator, List, Tuple
+from datetime import date, timedelta
+
+PERSIAN_MONTHS = [
+    "فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
+    "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"
+]
+
+# Span covered by the jalali_calendar dimension table
+CALENDAR_START = date(1990, 1, 1)
+CALENDAR_END = date(2079, 12, 31)
+
+
+def gregorian_to_jalali(gy: int, gm: int, gd: int) -> Tuple[int, int, int]:
+    g_d_m = [0,31,59,90,120,151,181,212,243,273,304,334]
+    gy2 = gy - 1600
+    gm2 = gm - 1
+    gd2 = gd - 1
+    g_day_no = 365*gy2 + (gy2+3)//4 - (gy2+99)//100 + (gy2+399)//400
+    g_day_no += g_d_m[gm2] + gd2
+    if gm2 > 1 and ((gy % 4 == 0 and gy % 100 != 0) or (gy % 400 == 0)):
+        g_day_no += 1
+    j_day_no = g_day_no - 79
+    j_np = j_day_no // 12053
+    j_day_no = j_day_no % 12053
+    jy = 979 + 33*j_np + 4*(j_day_no//1461)
+    j_day_no %= 1461
+    if j_day_no >= 366:
+        jy += (j_day_no - 366)//365 + 1
+        j_day_no = (j_day_no - 366) % 365
+    if j_day_no < 186:
+        jm = 1 + j_day_no//31
+        jd = 1 + (j_day_no % 31)
+    else:
+        jm = 7 + (j_day_no - 186)//30
+        jd = 1 + ((j_day_no - 186) % 30)
+    return jy, jm, jd
+
+
+def month_label(jy: int, jm: int) -> str:
+    return f"{PERSIAN_MONTHS[jm-1]} {jy}"
+
+
+def last_jalali_months(today: date, count: int = 12) -> List[Tuple[int, int]]:
+    """(jy, jm) for the `count` Jalali months ending with today's, oldest first."""
+    jy, jm, _ = gregorian_to_jalali(today.year, today.month, today.day)
+    months = []
+    for _ in range(count):
+        months.append((jy, jm))
+        if jm == 1:
+            jy, jm = jy - 1, 12
+        else:
+            jm -= 1
+    months.reverse()
+    return months
+
+
+def calendar_rows(start: date = CALENDAR_START, end: date = CALENDAR_END) -> Iterator[Tuple[date, int, int, int]]:
+    d = start
+    one = timedelta(days=1)
+    while d <= end:
+        jy, jm, jd = gregorian_to_jalali(d.year, d.month, d.day)
+        yield d, jy, jm, jd
+        d += one
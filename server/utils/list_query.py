@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Standard list protocol shared by the paged list endpoints.
+
+    GET /api/<resource>?q=&sort=&cursor=&limit=
+
+- q: case-insensitive substring search over the endpoint's search columns
+- sort: one of the endpoint's sort fields; prefix with "-" for descending
+- cursor: the ``next_cursor`` of the previous page, passed back unchanged
+- limit: page size (default 100, max 500)
+
+The response carries ``items`` and ``next_cursor`` (None on the last page).
+Pages are keyset pages over (sort value, id), so deep pages cost the same as
+the first one. Cursors embed the sort they were issued for; a cursor used
+with a different sort is rejected.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils.pagination import encode_cursor, decode_cursor, clamp_limit
+
+QUERY_KEYS = ("q", "sort", "cursor", "limit")
+
+
+class ListQuery(NamedTuple):
+    q: str
+    sort: str          # field name, without the "-" prefix
+    desc: bool
+    cursor: Optional[List[Any]]  # [sort value, id, ...]
+    limit: int
+
+    @property
+    def sort_token(self) -> str:
+        return ("-" if self.desc else "") + self.sort
+
+
+def wants_list_query(args, keys: Iterable[str] = QUERY_KEYS) -> bool:
+    """True when the request uses the paged protocol rather than a legacy full list."""
+    return any(k in args for k in keys)
+
+
+def parse_list_query(args, sort_fields: Iterable[str], default_sort: str, key_size: int = 2) -> ListQuery:
+    """Parse q/sort/cursor/limit; raises ValueError on bad input.
+    `key_size` is the number of key values a cursor carries after the sort token.
+    """
+    token = (args.get("sort") or default_sort).strip()
+    desc = token.startswith("-")
+    sort = token.lstrip("-+")
+    if sort not in set(sort_fields):
+        raise ValueError("invalid sort")
+    query = ListQuery((args.get("q") or "").strip(), sort, desc, None, clamp_limit(args.get("limit")))
+    cursor = decode_cursor(args.get("cursor"), key_size + 1)
+    if cursor is not None:
+        if cursor[0] != query.sort_token:
+            raise ValueError("cursor does not match sort")
+        query = query._replace(cursor=cursor[1:])
+    return query
+
+
+def like_pattern(text: str) -> str:
+    """LIKE pattern matching `text` anywhere, with wildcards escaped."""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def next_cursor(query: ListQuery, key: Sequence[Any]) -> str:
+    return encode_cursor([query.sort_token] + list(key))
+
+
+def fetch_page(cur, table: str, columns: Sequence[str], query: ListQuery, sort_fields: Dict[str, str],
+               search_columns: Sequence[str] = (), where: Sequence[str] = (), params: Sequence[Any] = ()
+               ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Run one keyset page of `table` for `query`.
+
+    sort_fields maps public sort names to SQL expressions. Nullable columns
+    should be wrapped in COALESCE and ENUMs cast to CHAR, so ORDER BY and the
+    keyset comparison agree. Returns (items, next_cursor).
+    """
+    expr = sort_fields[query.sort]
+    where, params = list(where), list(params)
+    if query.q and search_columns:
+        pattern = like_pattern(query.q)
+        where.append("(" + " OR ".join(f"{c} LIKE %s" for c in search_columns) + ")")
+        params += [pattern] * len(search_columns)
+    if query.cursor is not None:
+        where.append(f"({expr}, id) {'<' if query.desc else '>'} (%s, %s)")
+        params += list(query.cursor)
+    direction = "DESC" if query.desc else "ASC"
+    sql = f"SELECT {', '.join(columns)}, {expr} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {expr} {direction}, id {direction} LIMIT %s"
+    params.append(query.limit + 1)
+    cur.execute(sql, tuple(params))
+    rows = cur.fetchall()
+
+    cursor = None
+    if len(rows) > query.limit:
+        rows = rows[:query.limit]
+        last = rows[-1]
+        cursor = next_cursor(query, [last[-1], last[list(columns).index("id")]])
+    return [dict(zip(columns, r[:-1])) for r in rows], cursor
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Keyset pagination helpers.
+Cursors are opaque URL-safe strings wrapping the sort key of the last row
+returned (e.g. [created_at, id, type]); clients pass them back unchanged.
+"""
+from __future__ import annotations
+from typing import Any, List, Optional
+from datetime import datetime, date
+from decimal import Decimal
+import base64
+import json
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def _to_jsonable(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return {"dt": v.isoformat()}
+    if isinstance(v, date):
+        return {"d": v.isoformat()}
+    if isinstance(v, Decimal):
+        # Keep exact: a float would not compare equal to the stored DECIMAL
+        return {"dec": str(v)}
+    return v
+
+
+def _from_jsonable(v: Any) -> Any:
+    if isinstance(v, dict):
+        if "dt" in v:
+            return datetime.fromisoformat(v["dt"])
+        if "d" in v:
+            return date.fromisoformat(v["d"])
+        if "dec" in v:
+            return Decimal(v["dec"])
+    return v
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps([_to_jsonable(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """Decode a cursor into `size` key values; raises ValueError when malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("invalid cursor")
+    return [_from_jsonable(v) for v in values]
+
+
+def clamp_limit(limit: Optional[int], default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    try:
+        limit = int(limit) if limit is not None else default
+    except Exception:
+        limit = default
+    return max(1, min(limit, maximum))